@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark: active-alert lookups, list scans vs. the AlertsService indexes
+- Synthetic supplies (default 100k, one in ten at or below threshold) and
+  alert history (default 1M dismissed/resolved alerts, archived to a
+  temporary directory as the retention job would)
+- "before": the linear scans over a list of every alert ever raised that
+  _get_existing_alert, dismiss_alert, get_all_alerts, get_alerts_by_type and
+  the statistics did; the per-supply lookup is timed on a sample and
+  extrapolated to a full check
+- "after": the (item_id, type), ID and per-type indexes, checked against "before"
+
+Usage: python benchmarks/bench_alert_index.py [supplies] [historical_alerts]
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.alert_archive import AlertArchive
+from services.alerts_service import Alert, AlertStatus, AlertType, AlertsService, MedicalSupply, SUPPLY_KIND
+from services.inventory_engine import InventoryEngine
+from services.stock_ledger import StockLedger
+
+
+def build_service(supplies: int, history: int, archive_dir: str):
+    """The service, and every alert it raised in creation order (what self.alerts used to hold)"""
+    engine = InventoryEngine()
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = AlertsService(engine, StockLedger(engine), AlertArchive(archive_dir))
+    service.scheduler.shutdown(wait=False)
+    raised = list(service._by_id.values())
+    # History: alerts that were raised and later dismissed or resolved
+    rng = random.Random(5)
+    now = datetime.now()
+    with service._lock:
+        for _ in range(history):
+            alert = Alert.model_construct(
+                alert_id=service._new_alert_id(), item_id=f"ms_{rng.randrange(supplies):06d}",
+                item_name="Supply", type=rng.choice((AlertType.LOW_STOCK, AlertType.EXPIRY)),
+                message="Low stock alert", created_at=now, status=AlertStatus.ACTIVE, severity="medium",
+                closed_at=None)
+            service._open(alert)
+            service._close(alert, rng.choice((AlertStatus.DISMISSED, AlertStatus.RESOLVED)))
+            raised.append(alert)
+    service._archive_closed_alerts()
+    history_end = service._alert_number
+    # Current supplies; the ones at or below threshold raise active alerts
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.add_many((
+            MedicalSupply(id=f"ms_{i:06d}", name=f"Supply {i}", current_stock=5 if i % 10 == 0 else 500,
+                          threshold_quantity=50, expiry_date=now + timedelta(days=400 + i % 365),
+                          supplier_id=f"sup_{i % 20:03d}", supplier_name=f"Supplier {i % 20}")
+            for i in range(supplies)
+        ), SUPPLY_KIND)
+    raised.extend(alert for alert in service._by_id.values() if int(alert.alert_id.split("_")[1]) > history_end)
+    return service, raised
+
+
+# Before: scans over the whole alert history
+
+def before_existing(alerts, item_id, alert_type):
+    for alert in alerts:
+        if alert.item_id == item_id and alert.type == alert_type and alert.status == AlertStatus.ACTIVE:
+            return alert
+    return None
+
+
+def before_find(alerts, alert_id):
+    for alert in alerts:
+        if alert.alert_id == alert_id:
+            return alert
+    return None
+
+
+def before_all(alerts):
+    return [alert for alert in alerts if alert.status == AlertStatus.ACTIVE]
+
+
+def before_by_type(alerts, alert_type):
+    return [alert for alert in alerts if alert.type == alert_type and alert.status == AlertStatus.ACTIVE]
+
+
+def before_statistics(alerts):
+    total_alerts = len(alerts)
+    active_alerts = len([a for a in alerts if a.status == AlertStatus.ACTIVE])
+    low_stock_alerts = len([a for a in alerts if a.type == AlertType.LOW_STOCK and a.status == AlertStatus.ACTIVE])
+    expiry_alerts = len([a for a in alerts if a.type == AlertType.EXPIRY and a.status == AlertStatus.ACTIVE])
+    resolved_alerts = len([a for a in alerts if a.status == AlertStatus.RESOLVED])
+    return {"total_alerts": total_alerts, "active_alerts": active_alerts, "low_stock_alerts": low_stock_alerts,
+            "expiry_alerts": expiry_alerts, "dismissed_alerts": total_alerts - active_alerts - resolved_alerts,
+            "resolved_alerts": resolved_alerts}
+
+
+def timed(fn, runs=1):
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = fn()
+    return result, (time.perf_counter() - start) / runs
+
+
+def main():
+    supplies = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    history = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+
+    start = time.perf_counter()
+    archive_dir = tempfile.TemporaryDirectory()
+    service, alerts = build_service(supplies, history, archive_dir.name)
+    print(f"{supplies:,} supplies, {len(alerts):,} alerts ({len(service.get_all_alerts()):,} active, "
+          f"{service.archive.count():,} archived), built in {time.perf_counter() - start:.1f} s")
+
+    # Per-supply lookup, as a full check does for every supply
+    rng = random.Random(7)
+    sample = [f"ms_{rng.randrange(supplies):06d}" for _ in range(20)]
+    expected, t_before = timed(lambda: [before_existing(alerts, item_id, AlertType.LOW_STOCK) for item_id in sample])
+    t_before /= len(sample)
+    item_ids = [f"ms_{i:06d}" for i in range(supplies)]
+    _, t_after = timed(lambda: [service._get_existing_alert(item_id, AlertType.LOW_STOCK) for item_id in item_ids])
+    t_after /= supplies
+    assert [service._get_existing_alert(item_id, AlertType.LOW_STOCK) for item_id in sample] == expected
+    print(f"existing-alert lookup   before {t_before * 1e6:12.1f} us   after {t_after * 1e6:8.2f} us   "
+          f"{t_before / t_after:9.0f}x")
+    print(f"  full check over {supplies:,} supplies: before ~{t_before * supplies:,.0f} s (extrapolated), "
+          f"after {t_after * supplies * 1000:.0f} ms")
+
+    comparisons = (
+        ("get_all_alerts", lambda: before_all(alerts), service.get_all_alerts),
+        ("get_alerts_by_type", lambda: before_by_type(alerts, AlertType.LOW_STOCK),
+         lambda: service.get_alerts_by_type(AlertType.LOW_STOCK)),
+        ("alert by id", lambda: before_find(alerts, alerts[-1].alert_id),
+         lambda: service.get_alert(alerts[-1].alert_id)),
+        ("statistics", lambda: before_statistics(alerts),
+         lambda: {key: value for key, value in service.get_alert_statistics().items() if key != "archived_alerts"}),
+    )
+    for label, before, after in comparisons:
+        expected, t_before = timed(before, 3)
+        got, t_after = timed(after, 100)
+        assert got == expected, f"{label}: indexes disagree with the scan"
+        print(f"{label:<22}  before {t_before * 1e3:10.2f} ms   after {t_after * 1e3:8.3f} ms   "
+              f"{t_before / t_after:9.0f}x")
+    archive_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
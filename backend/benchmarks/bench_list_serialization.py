@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark: list endpoint serialization, hand-built dicts vs. cached serializers
+- "before": per-item dict built in Python, then FastAPI's jsonable_encoder + json.dumps
+- "after": json_encoding.serializer_for + dumps (orjson when installed)
+- Covers the payloads of /inventory/supplies, /inventory/purchase-orders and /medicine/all
+
+Usage: python benchmarks/bench_list_serialization.py [items]
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.encoders import jsonable_encoder
+
+from medicine_recommendation_system import Medicine, MedicineCategory
+from services import json_encoding
+from services.json_encoding import dumps, serializer_for
+from services.alerts_service import MedicalSupply
+from services.purchase_order_service import PurchaseOrder, PurchaseOrderStatus
+
+MEDICINE_LIST_FIELDS = ("id", "name", "category", "description", "dosage", "price", "stock_quantity",
+                        "prescription_required", "symptoms_treated", "conditions_treated")
+SUPPLY_COMPUTED = (
+    ("status", lambda supply: "low_stock" if supply.current_stock <= supply.threshold_quantity else "normal"),
+)
+
+
+def build_items(count: int):
+    now = datetime.now()
+    supplies = [
+        MedicalSupply(id=f"ms_{i:06d}", name=f"Supply {i}", current_stock=i % 500, threshold_quantity=50,
+                      expiry_date=now + timedelta(days=i % 365), supplier_id=f"sup_{i % 20:03d}",
+                      supplier_name=f"Supplier {i % 20}", unit="boxes")
+        for i in range(count)
+    ]
+    orders = [
+        PurchaseOrder(order_id=f"po_{i:06d}", item_id=f"ms_{i:06d}", item_name=f"Supply {i}", quantity=100,
+                      supplier_id="sup_001", supplier_name="Supplier 1", supplier_email="orders@example.com",
+                      status=PurchaseOrderStatus.SENT, created_at=now, sent_at=now,
+                      notes="Auto-generated order due to low stock", unit_price=2.5, total_amount=250.0)
+        for i in range(count)
+    ]
+    medicines = [
+        Medicine(id=f"med_{i}", name=f"Medicine {i}", category=MedicineCategory.PAIN_RELIEF,
+                 description="Pain reliever and fever reducer", dosage="500mg every 4-6 hours",
+                 side_effects=["nausea", "rash"], contraindications=["liver disease"], price=5.99,
+                 stock_quantity=i % 200, min_stock_level=20, prescription_required=False,
+                 symptoms_treated=["pain", "fever", "headache"], conditions_treated=["common cold"])
+        for i in range(count)
+    ]
+    return supplies, orders, medicines
+
+
+def before_supplies(supplies):
+    return [
+        {
+            "id": supply.id,
+            "name": supply.name,
+            "current_stock": supply.current_stock,
+            "threshold_quantity": supply.threshold_quantity,
+            "expiry_date": supply.expiry_date.isoformat() if supply.expiry_date else None,
+            "supplier_id": supply.supplier_id,
+            "supplier_name": supply.supplier_name,
+            "unit": supply.unit,
+            "status": "low_stock" if supply.current_stock <= supply.threshold_quantity else "normal"
+        }
+        for supply in supplies
+    ]
+
+
+def before_orders(orders):
+    return [
+        {
+            "order_id": order.order_id,
+            "item_id": order.item_id,
+            "item_name": order.item_name,
+            "quantity": order.quantity,
+            "supplier_id": order.supplier_id,
+            "supplier_name": order.supplier_name,
+            "supplier_email": order.supplier_email,
+            "status": order.status.value,
+            "created_at": order.created_at.isoformat(),
+            "sent_at": order.sent_at.isoformat() if order.sent_at else None,
+            "confirmed_at": order.confirmed_at.isoformat() if order.confirmed_at else None,
+            "received_at": order.received_at.isoformat() if order.received_at else None,
+            "notes": order.notes,
+            "unit_price": order.unit_price,
+            "total_amount": order.total_amount
+        }
+        for order in orders
+    ]
+
+
+def before_medicines(medicines):
+    return [
+        {
+            "id": med.id,
+            "name": med.name,
+            "category": med.category.value,
+            "description": med.description,
+            "dosage": med.dosage,
+            "price": med.price,
+            "stock_quantity": med.stock_quantity,
+            "prescription_required": med.prescription_required,
+            "symptoms_treated": med.symptoms_treated,
+            "conditions_treated": med.conditions_treated
+        }
+        for med in medicines
+    ]
+
+
+def before(build, items) -> bytes:
+    # What FastAPI does with a returned list: jsonable_encoder, then JSONResponse.render
+    return json.dumps(jsonable_encoder(build(items)), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def after(item_type, list_fields, computed, items) -> bytes:
+    serialize = serializer_for(item_type, list_fields, computed)
+    return dumps([serialize(item) for item in items])
+
+
+def timed(func, runs: int = 5) -> float:
+    func()  # warm-up
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    supplies, orders, medicines = build_items(count)
+    encoder = "orjson" if json_encoding.orjson is not None else "json (orjson not installed)"
+    print(f"{count:,} items per list, encoder: {encoder}\n")
+
+    cases = [
+        ("/inventory/supplies", before_supplies, supplies, (MedicalSupply, None, SUPPLY_COMPUTED)),
+        ("/inventory/purchase-orders", before_orders, orders, (PurchaseOrder, None, ())),
+        ("/medicine/all", before_medicines, medicines, (Medicine, MEDICINE_LIST_FIELDS, ())),
+    ]
+    for label, build, items, spec in cases:
+        old = before(build, items)
+        new = after(*spec, items)
+        assert json.loads(old) == json.loads(new), f"{label}: payloads differ"
+        t_before = timed(lambda: before(build, items))
+        t_after = timed(lambda: after(*spec, items))
+        print(f"{label:<28} before {t_before * 1000:8.1f} ms   after {t_after * 1000:7.1f} ms   "
+              f"{t_before / t_after:5.1f}x   ({len(new) / 1024:,.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
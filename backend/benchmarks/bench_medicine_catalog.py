@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark: loading a large formulary, one dataclass per medicine vs. MedicineCatalog
+- Synthetic CSV (default 100k medicines) with realistic list fields
+- "before": csv rows -> dict of Medicine dataclasses (what _initialize_medicines grew into)
+- "after": MedicineCatalog.from_csv, snapshot write, and memory-mapped snapshot open
+- Python heap (tracemalloc) after loading, ID lookups and symptom -> medicines queries
+
+Usage: python benchmarks/bench_medicine_catalog.py [medicines]
+"""
+
+import csv
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from medicine_recommendation_system import Medicine, MedicineCategory
+from services.medicine_catalog import LIST_SEPARATOR, MedicineCatalog, load_catalog, snapshot_path
+
+SYMPTOMS = ["headache", "fever", "pain", "body aches", "inflammation", "swelling", "depression", "anxiety",
+            "insomnia", "fatigue", "nausea", "cough", "congestion", "rash", "itching", "dizziness"]
+CONDITIONS = [f"condition {i}" for i in range(400)]
+SIDE_EFFECTS = ["Nausea", "Drowsiness", "Stomach upset", "Headache", "Dry mouth", "Dizziness", "Rash"]
+
+
+def write_csv(path: str, count: int, rng: random.Random):
+    categories = [category.value for category in MedicineCategory]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "category", "description", "dosage", "side_effects", "contraindications",
+                         "price", "stock_quantity", "min_stock_level", "prescription_required",
+                         "symptoms_treated", "conditions_treated"])
+        for i in range(count):
+            writer.writerow([
+                f"med_{i:06d}", f"Medicine {i}", rng.choice(categories), f"Synthetic medicine number {i}",
+                f"{rng.choice([50, 100, 250, 500])}mg every {rng.choice([4, 6, 8, 12])} hours",
+                LIST_SEPARATOR.join(rng.sample(SIDE_EFFECTS, 2)), LIST_SEPARATOR.join(rng.sample(CONDITIONS, 2)),
+                round(rng.uniform(1, 100), 2), rng.randint(0, 500), rng.randint(10, 50), rng.random() < 0.3,
+                LIST_SEPARATOR.join(rng.sample(SYMPTOMS, 3)), LIST_SEPARATOR.join(rng.sample(CONDITIONS, 2))
+            ])
+
+
+def before(path: str):
+    medicines = {}
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            medicines[row["id"]] = Medicine(
+                id=row["id"], name=row["name"], category=MedicineCategory(row["category"]),
+                description=row["description"], dosage=row["dosage"],
+                side_effects=row["side_effects"].split(LIST_SEPARATOR),
+                contraindications=row["contraindications"].split(LIST_SEPARATOR),
+                price=float(row["price"]), stock_quantity=int(row["stock_quantity"]),
+                min_stock_level=int(row["min_stock_level"]), prescription_required=row["prescription_required"] == "True",
+                symptoms_treated=row["symptoms_treated"].split(LIST_SEPARATOR),
+                conditions_treated=row["conditions_treated"].split(LIST_SEPARATOR)
+            )
+    return medicines
+
+
+def measured(func):
+    """(result, seconds, bytes the result keeps on the Python heap); timed without tracing"""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = func()
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, allocated
+
+
+def timed(func, runs: int = 1000) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(5)
+    workdir = tempfile.mkdtemp(prefix="catalog_bench_")
+    try:
+        source = os.path.join(workdir, "medicines.csv")
+        write_csv(source, count, rng)
+
+        medicines, t_before, m_before = measured(lambda: before(source))
+        catalog, t_csv, m_csv = measured(lambda: MedicineCatalog.from_csv(source))
+        start = time.perf_counter()
+        catalog.save_snapshot(snapshot_path(source), source)
+        t_save = time.perf_counter() - start
+        mapped, t_open, m_open = measured(lambda: load_catalog(source))
+
+        assert mapped.record(count // 2) == catalog.record(count // 2)
+        expected = sorted(m.id for m in medicines.values() if "fever" in m.symptoms_treated)
+        assert sorted(mapped.ids()[row] for row in mapped.rows_treating("fever").tolist()) == expected
+
+        ids = [f"med_{rng.randrange(count):06d}" for _ in range(1000)]
+        t_lookup = timed(lambda: [mapped.record(mapped.row_of(i)) for i in ids], runs=5) / len(ids)
+        t_scan = timed(lambda: [m.id for m in medicines.values() if "fever" in m.symptoms_treated], runs=5)
+        t_index = timed(lambda: mapped.rows_treating("fever"))
+
+        mib = 1024 * 1024
+        print(f"{count:,} medicines\n")
+        print(f"before  dataclasses from CSV    {t_before * 1000:8.0f} ms   {m_before / mib:7.1f} MiB heap")
+        print(f"after   columns from CSV        {t_csv * 1000:8.0f} ms   {m_csv / mib:7.1f} MiB heap")
+        print(f"        snapshot write          {t_save * 1000:8.0f} ms")
+        print(f"        snapshot open (mmap)    {t_open * 1000:8.0f} ms   {m_open / mib:7.1f} MiB heap")
+        print()
+        print(f"record by id                    {t_lookup * 1e6:8.1f} us")
+        print(f"'fever' scan over dataclasses   {t_scan * 1000:8.2f} ms")
+        print(f"'fever' inverted index          {t_index * 1e6:8.2f} us  ({mapped.rows_treating('fever').size:,} rows)")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
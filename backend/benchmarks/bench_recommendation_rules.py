@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: recommendation scoring over a large synthetic rule table
+- Synthetic catalog (default 20k medicines, 50k rules over 100 symptoms)
+- "before": one Python pass over every rule per patient (what an if-chain scales to)
+- "after": RuleMatrix.score (matrix-vector + argpartition) and score_many (matrix-matrix)
+- score_many batches only patients reporting the same symptoms (a mixed batch
+  would multiply every row by the union of its columns), so on a cohort of
+  distinct symptom sets it matches score and gains on repeated complaints
+
+Usage: python benchmarks/bench_recommendation_rules.py [medicines] [rules] [patients] [symptoms]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.recommendation_rules import RecommendationRule, RuleMatrix
+
+def build_rules(medicines: int, rules: int, symptom_count: int, rng: random.Random):
+    symptoms = [f"symptom_{i}" for i in range(symptom_count)]
+    medicine_ids = [f"med_{i}" for i in range(medicines)]
+    table = []
+    for i in range(rules):
+        weights = {s: rng.choice([1.0, 2.0, 3.0]) for s in rng.sample(symptoms, rng.randint(1, 3))}
+        table.append(RecommendationRule(
+            rule_id=f"rule_{i}", medicine_id=rng.choice(medicine_ids), weights=weights,
+            reasoning="synthetic", dosage_instructions="as directed",
+            min_score=rng.choice([0.1, 0.3, 0.5]), max_confidence=rng.choice([0.6, 0.8, 0.9]),
+            group=f"group_{i % 2000}" if rng.random() < 0.3 else None
+        ))
+    return table, symptoms, medicine_ids
+
+
+def before(rules, symptoms, k):
+    # Every rule evaluated in Python, then sorted (ties in table order);
+    # a group is represented by its largest activation
+    fired, winners = [], {}
+    for index, rule in enumerate(rules):
+        activation = sum(symptoms.get(s, 0.0) * w for s, w in rule.weights.items())
+        if activation > rule.min_score:
+            fired.append((min(activation, rule.max_confidence), index, rule))
+            if rule.group and (rule.group not in winners or activation > winners[rule.group][0]):
+                winners[rule.group] = (activation, index)
+    fired.sort(key=lambda item: (-item[0], item[1]))
+    chosen, groups, medicines = [], set(), set()
+    for confidence, index, rule in fired:
+        group = rule.group or f"rule:{rule.rule_id}"
+        if group in groups or rule.medicine_id in medicines:
+            continue
+        if rule.group and winners[rule.group][1] != index:
+            continue
+        groups.add(group)
+        medicines.add(rule.medicine_id)
+        chosen.append((rule, confidence))
+        if len(chosen) == k:
+            break
+    return chosen
+
+
+def timed(func, runs: int = 3) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    medicines = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rule_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    patients = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    symptom_count = int(sys.argv[4]) if len(sys.argv) > 4 else 100
+    rng = random.Random(11)
+    rules, symptoms, medicine_ids = build_rules(medicines, rule_count, symptom_count, rng)
+    cohort = [{s: round(rng.random() * 0.4, 3) for s in rng.sample(symptoms, rng.randint(1, 6))}
+              for _ in range(patients)]
+
+    start = time.perf_counter()
+    matrix = RuleMatrix(rules, symptoms, set(medicine_ids))
+    build = time.perf_counter() - start
+
+    for patient in cohort[:20]:
+        expected = [(r.rule_id, round(c, 6)) for r, c in before(rules, patient, 5)]
+        actual = [(r.rule_id, round(c, 6)) for r, c in matrix.score(patient, 5)]
+        assert expected == actual, "matrix scoring disagrees with the reference loop"
+
+    t_before = timed(lambda: [before(rules, p, 5) for p in cohort[:20]], runs=1) / 20
+    t_single = timed(lambda: [matrix.score(p, 5) for p in cohort]) / patients
+    t_batch = timed(lambda: matrix.score_many(cohort, 5)) / patients
+    # The same patients drawn from 20 common complaints
+    repeated = [dict(rng.choice(cohort[:20])) for _ in range(patients)]
+    assert matrix.score_many(repeated, 5) == [matrix.score(p, 5) for p in repeated]
+    t_single_repeated = timed(lambda: [matrix.score(p, 5) for p in repeated]) / patients
+    t_batch_repeated = timed(lambda: matrix.score_many(repeated, 5)) / patients
+
+    print(f"{medicines:,} medicines, {rule_count:,} rules, {symptom_count} symptoms; compiled in {build * 1000:.0f} ms")
+    print(f"before (Python loop)        {t_before * 1000:8.2f} ms/patient")
+    print(f"after  (score, one patient) {t_single * 1000:8.2f} ms/patient   {t_before / t_single:6.1f}x")
+    print(f"after  (score_many, {patients})  {t_batch * 1000:8.2f} ms/patient   {t_before / t_batch:6.1f}x")
+    print(f"20 repeated complaints: score {t_single_repeated * 1000:.2f} ms/patient, "
+          f"score_many {t_batch_repeated * 1000:.2f} ms/patient")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark: typo correction, pairwise edit distance vs. the symmetric-delete index
+- Synthetic vocabulary (default 10k words, 6-14 letters)
+- Misspellings made by one or two random edits (delete, insert, substitute, transpose)
+- "before": edit distance to every vocabulary word, closest first
+- "after": SpellingCorrector lookups, checked against "before"; then a
+  typo-tolerant SymptomScanner over the same vocabulary on a short sentence
+
+Usage: python benchmarks/bench_spelling_correction.py [terms] [queries]
+"""
+
+import os
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.spelling_correction import SpellingCorrector, allowed_distance, edit_distance, extends_at_edge
+from services.symptom_scanner import SymptomScanner
+
+
+def build_vocabulary(terms: int, rng: random.Random):
+    syllables = ["ab", "ca", "de", "fi", "go", "hu", "ki", "lo", "me", "no", "pa", "ri", "su", "ta", "ve", "zo",
+                 "ar", "el", "in", "os", "um", "ex", "th", "st"]
+    words = {}
+    while len(words) < terms:
+        word = "".join(rng.choices(syllables, k=rng.randint(3, 7)))
+        words[word] = None
+    return list(words)
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    for _ in range(rng.choice([1, 1, 1, 2])):
+        i = rng.randrange(len(word))
+        op = rng.choice(["delete", "insert", "substitute", "transpose"])
+        if op == "delete" and len(word) > 1:
+            word = word[:i] + word[i + 1:]
+        elif op == "insert":
+            word = word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+        elif op == "substitute":
+            word = word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+        elif i + 1 < len(word):
+            word = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word
+
+
+def before(vocabulary, word, max_edit_distance):
+    # Distance to every vocabulary word; closest first, ties in vocabulary order
+    if word in vocabulary:
+        return word
+    distance = allowed_distance(word, max_edit_distance)
+    if not distance:
+        return word
+    best = None
+    for rank, candidate in enumerate(vocabulary):
+        d = edit_distance(word, candidate, distance)
+        if d <= distance and (best is None or (d, rank) < best):
+            best = (d, rank)
+    if best is None or extends_at_edge(word, vocabulary[best[1]]):
+        return word
+    return vocabulary[best[1]]
+
+
+def main():
+    terms = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(11)
+    vocabulary = build_vocabulary(terms, rng)
+    typos = [misspell(rng.choice(vocabulary), rng) for _ in range(queries)]
+
+    start = time.perf_counter()
+    corrector = SpellingCorrector(vocabulary, max_edit_distance=2)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [before(vocabulary, typo, 2) for typo in typos]
+    t_before = (time.perf_counter() - start) / queries
+
+    start = time.perf_counter()
+    got = [corrector._correct(typo) for typo in typos]
+    t_after = (time.perf_counter() - start) / queries
+    assert got == expected, "index disagrees with pairwise reference"
+
+    corrected = sum(1 for typo, word in zip(typos, got) if typo != word)
+    for typo in typos:
+        corrector.correct(typo)
+    start = time.perf_counter()
+    for typo in typos:
+        corrector.correct(typo)
+    t_cached = (time.perf_counter() - start) / queries
+
+    # Index memory, measured apart from the timings
+    tracemalloc.start()
+    measured = SpellingCorrector(vocabulary, max_edit_distance=2)
+    index_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del measured
+
+    groups = {f"group_{g}": vocabulary[g::200] for g in range(200)}
+    scanner = SymptomScanner(groups, max_edit_distance=2)
+    exact = SymptomScanner(groups)
+    sentence = "the patient reported " + " and ".join(misspell(rng.choice(vocabulary), rng) for _ in range(4))
+    runs = 1000
+    start = time.perf_counter()
+    for _ in range(runs):
+        exact.count_groups(sentence)
+    t_exact = (time.perf_counter() - start) / runs
+    start = time.perf_counter()
+    for _ in range(runs):
+        scanner.count_groups(sentence)
+    t_fuzzy = (time.perf_counter() - start) / runs
+
+    print(f"{terms:,} words; index of {corrector.stats()['deletes']:,} deletes built in {build * 1000:.0f} ms, "
+          f"{index_bytes / 2 ** 20:.1f} MiB")
+    print(f"{queries} misspellings, {corrected} corrected (same answers as the pairwise reference)")
+    print(f"before (pairwise edit distance) {t_before * 1e6:10.1f} us/word")
+    print(f"after  (symmetric delete)       {t_after * 1e6:10.1f} us/word   {t_before / t_after:7.0f}x")
+    print(f"after, memoized                 {t_cached * 1e6:10.1f} us/word")
+    print(f"sentence scan: exact {t_exact * 1e6:.1f} us, typo-tolerant {t_fuzzy * 1e6:.1f} us (memoized)")
+
+
+if __name__ == "__main__":
+    main()
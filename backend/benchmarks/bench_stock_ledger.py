@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent stock movements, read-then-set vs. the striped stock ledger
+- Synthetic inventory (default 1k items), several terminal threads (default 8)
+  each making random dispenses/receipts of one unit
+- "before": read current_stock, then set the new absolute value (what
+  update_stock callers did); lost updates are counted against the expected total
+- "after": StockLedger.dispense/receive with 64 stripes and with a single
+  lock; totals must match exactly
+- Each mode is run with movements spread over all items and with every
+  thread hitting the same item
+- Scaling: ledger throughput at 1-8 threads with a change feed subscriber
+  attached (as the alert and medicine services are), spread vs. one hot
+  item. Subscribers run after the stripe and engine lock are released, so
+  a hot item only slows its own movements. Pure-Python work still shares
+  the interpreter lock, so totals level off rather than multiply
+
+Usage: python benchmarks/bench_stock_ledger.py [items] [threads] [movements_per_thread]
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.inventory_engine import InventoryEngine, StockItem
+from services.stock_ledger import StockLedger
+
+INITIAL_STOCK = 1_000_000
+
+
+def build_engine(items: int, subscriber=None) -> InventoryEngine:
+    engine = InventoryEngine(feed_size=1000)
+    engine.add_many((StockItem(f"item_{i}", f"Item {i}", INITIAL_STOCK, 10) for i in range(items)), "supply")
+    if subscriber is not None:
+        engine.subscribe(subscriber)
+    return engine
+
+
+def low_stock_watcher(engine_ref):
+    """A subscriber doing what the alert service does: read the item, compare, count"""
+    low = {}
+
+    def on_change(change):
+        item = engine_ref[0].get(change.item_id)
+        if item.current_stock <= item.threshold_quantity:
+            low[change.item_id] = item.current_stock
+        else:
+            low.pop(change.item_id, None)
+    return on_change
+
+
+def read_then_set(engine: InventoryEngine):
+    def move(item_id: str, delta: int):
+        current = engine.get(item_id).current_stock
+        engine.set_stock(item_id, current + delta)
+    return move
+
+
+def through_ledger(ledger: StockLedger):
+    def move(item_id: str, delta: int):
+        if delta > 0:
+            ledger.receive(item_id, delta)
+        else:
+            ledger.dispense(item_id, -delta)
+    return move
+
+
+def run(engine: InventoryEngine, move, item_ids, threads: int, movements: int):
+    plans = []
+    for t in range(threads):
+        rng = random.Random(t)
+        plans.append([(rng.choice(item_ids), rng.choice((1, -1))) for _ in range(movements)])
+    expected = {}
+    for plan in plans:
+        for item_id, delta in plan:
+            expected[item_id] = expected.get(item_id, 0) + delta
+
+    def worker(plan):
+        for item_id, delta in plan:
+            move(item_id, delta)
+
+    workers = [threading.Thread(target=worker, args=(plan,)) for plan in plans]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    lost = sum(abs(engine.get(item_id).current_stock - INITIAL_STOCK - delta) for item_id, delta in expected.items())
+    return threads * movements / elapsed, lost
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    movements = int(sys.argv[3]) if len(sys.argv) > 3 else 20_000
+    # Switch threads often, as a busy server would, so races actually interleave
+    sys.setswitchinterval(1e-5)
+
+    print(f"{items:,} items, {threads} threads x {movements:,} movements")
+    for label, item_count in (("spread over all items", items), ("one hot item", 1)):
+        print(f"-- {label}")
+        item_ids = [f"item_{i}" for i in range(item_count)]
+        engine = build_engine(items)
+        rate, lost = run(engine, read_then_set(engine), item_ids, threads, movements)
+        print(f"before (read, then set)   {rate:10,.0f} movements/s   lost updates: {lost:,}")
+        for stripes in (64, 1):
+            engine = build_engine(items)
+            rate, lost = run(engine, through_ledger(StockLedger(engine, stripes=stripes)), item_ids, threads, movements)
+            assert lost == 0, "ledger lost updates"
+            print(f"ledger, {stripes:2d} stripe(s)        {rate:10,.0f} movements/s   lost updates: {lost:,}")
+
+    print("-- scaling, 64 stripes, with a change feed subscriber")
+    per_thread = max(1, movements * threads // 8)
+    for thread_count in (1, 2, 4, 8):
+        rates = []
+        for item_count in (items, 1):
+            engine_ref = []
+            engine = build_engine(items, low_stock_watcher(engine_ref))
+            engine_ref.append(engine)
+            item_ids = [f"item_{i}" for i in range(item_count)]
+            rate, lost = run(engine, through_ledger(StockLedger(engine)), item_ids, thread_count, per_thread)
+            assert lost == 0, "ledger lost updates"
+            rates.append(rate)
+        print(f"{thread_count} thread(s)   spread {rates[0]:10,.0f} movements/s   one hot item {rates[1]:10,.0f} movements/s")
+
+
+if __name__ == "__main__":
+    main()
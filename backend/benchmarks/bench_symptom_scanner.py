@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: symptom matching, per-keyword substring search vs. SymptomScanner
+- Synthetic clinical vocabulary (default 10k terms, 1-3 words each) in 200 groups
+- Voice-transcript-sized texts (default 5k words)
+- "before": the old analyze_symptoms loop (one `in` search per keyword)
+- "after": one Aho-Corasick pass; hits checked against a word-boundary reference
+
+Usage: python benchmarks/bench_symptom_scanner.py [terms] [words]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.symptom_scanner import SymptomScanner, tokenize
+
+
+def build_vocabulary(terms: int, rng: random.Random):
+    syllables = ["ab", "ca", "de", "fi", "go", "hu", "ki", "lo", "me", "no", "pa", "ri", "su", "ta", "ve", "zo"]
+    words = sorted({"".join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(terms)})
+    groups = {f"group_{g}": [] for g in range(200)}
+    names = list(groups)
+    for _ in range(terms):
+        phrase = " ".join(rng.choices(words, k=rng.choice([1, 1, 2, 3])))
+        groups[rng.choice(names)].append(phrase)
+    return groups, words
+
+
+def before(groups, text):
+    # The original analyze_symptoms loop
+    text_lower = text.lower()
+    counts = {}
+    for group, keywords in groups.items():
+        score = 0
+        for keyword in keywords:
+            if keyword in text_lower:
+                score += 1
+        if score:
+            counts[group] = score
+    return counts
+
+
+def reference(groups, text):
+    # Same question with word boundaries: keyword tokens as a contiguous token run
+    tokens = tokenize(text)
+    ngrams = {tuple(tokens[i:i + n]) for n in (1, 2, 3) for i in range(len(tokens) - n + 1)}
+    counts = {}
+    for group, keywords in groups.items():
+        hits = len({tuple(tokenize(k)) for k in keywords} & ngrams)
+        if hits:
+            counts[group] = hits
+    return counts
+
+
+def timed(func, runs: int = 3) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    terms = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    words = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    rng = random.Random(7)
+    groups, vocabulary = build_vocabulary(terms, rng)
+    filler = ["the", "patient", "said", "today", "and", "was", "feeling", "after", "lunch"]
+    text = " ".join(rng.choice(vocabulary) if rng.random() < 0.2 else rng.choice(filler) for _ in range(words))
+
+    start = time.perf_counter()
+    scanner = SymptomScanner(groups)
+    build = time.perf_counter() - start
+
+    assert scanner.count_groups(text) == reference(groups, text), "scanner disagrees with reference"
+
+    t_before = timed(lambda: before(groups, text))
+    t_after = timed(lambda: scanner.count_groups(text))
+    short = "I have a headache and a sore throat since yesterday"
+    t_short = timed(lambda: scanner.count_groups(short), runs=1000)
+
+    print(f"{terms:,} terms, {words:,}-word transcript; automaton built in {build * 1000:.0f} ms")
+    print(f"before (substring per keyword) {t_before * 1000:8.1f} ms")
+    print(f"after  (single pass)           {t_after * 1000:8.1f} ms   {t_before / t_after:5.1f}x")
+    print(f"short sentence                 {t_short * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
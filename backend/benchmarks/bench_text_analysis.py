@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: compiled TextAnalyzer vs the original per-call implementation
+- Verifies both produce identical results on the sample corpus
+- Reports throughput in texts per second
+
+Usage: python benchmarks/bench_text_analysis.py [iterations]
+"""
+
+import os
+import re
+import sys
+import time
+from typing import Dict, Any
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.text_analysis import text_analyzer
+
+SAMPLE_TEXTS = [
+    "Patient reported feeling better today. Symptoms have improved significantly.",
+    "I am not feeling good, I cannot remember where I put my medicine and my heart is racing",
+    "Feeling good after the appointment, the doctor said my blood pressure is fine",
+    "I want to end it, everything is hopeless and I am so tired and alone",
+    "Had a checkup at the hospital. test results normal, pulse and temperature ok",
+    "Image uploaded with caption: rash on arm. Image appears to show medical documentation.",
+    "much improved sleep, getting better every day, very happy with the therapy",
+    "dizzy and nausea since morning, fever and chills, worried it is the flu",
+    "Nothing special today, went for a walk and had lunch with family.",
+    "memory loss is getting worse, I dont remember my daughter's name, not able to focus " * 4,
+]
+
+
+def legacy_analyze_sentiment_advanced(text: str) -> Dict[str, Any]:
+    """Reference copy of the original per-call implementation"""
+    text_lower = text.lower()
+    words = text_lower.split()
+    
+    # Comprehensive word lists
+    positive_words = [
+        'good', 'better', 'improved', 'healthy', 'recovered', 'well', 'fine', 'great', 
+        'excellent', 'amazing', 'wonderful', 'happy', 'relieved', 'comfortable', 
+        'strong', 'energetic', 'positive', 'optimistic', 'confident', 'peaceful',
+        'calm', 'relaxed', 'satisfied', 'content', 'joyful', 'excited', 'grateful'
+    ]
+    
+    negative_words = [
+        'pain', 'sick', 'worse', 'bad', 'problem', 'hurt', 'ache', 'suffering', 
+        'terrible', 'awful', 'horrible', 'depressed', 'sad', 'angry', 'frustrated',
+        'worried', 'anxious', 'scared', 'afraid', 'fear', 'dead', 'dying', 'suicide',
+        'kill', 'death', 'hopeless', 'helpless', 'lonely', 'alone', 'empty', 'numb',
+        'tired', 'exhausted', 'weak', 'dizzy', 'nausea', 'vomit', 'bleeding', 'swelling',
+        'fever', 'chills', 'cough', 'cold', 'flu', 'infection', 'disease', 'cancer',
+        'heart', 'attack', 'stroke', 'emergency', 'urgent', 'critical', 'severe',
+        'remember', 'memory', 'forget', 'forgetting', 'confused', 'confusion', 'lost',
+        'disoriented', 'unable', 'cannot', 'cant', 'dont', 'not', 'never', 'hate',
+        'despise', 'loathe', 'miserable', 'desperate', 'panic', 'terrified', 'devastated'
+    ]
+    
+    # Medical/health keywords
+    medical_keywords = [
+        'medicine', 'patient', 'doctor', 'hospital', 'treatment', 'symptoms', 'diagnosis',
+        'health', 'medical', 'therapy', 'medication', 'prescription', 'appointment',
+        'checkup', 'examination', 'test', 'scan', 'x-ray', 'blood', 'pressure',
+        'temperature', 'pulse', 'heart', 'lung', 'brain', 'stomach', 'pain'
+    ]
+    
+    # Count words
+    positive_count = sum(1 for word in words if word in positive_words)
+    negative_count = sum(1 for word in words if word in negative_words)
+    medical_count = sum(1 for word in words if word in medical_keywords)
+    
+    # Pattern matching for complex phrases
+    negative_patterns = [
+        r'\bnot\s+feeling\b', r'\bnot\s+alive\b', r'\btoo\s+depressed\b',
+        r'\bwant\s+to\s+die\b', r'\bkill\s+myself\b', r'\bnot\s+being\s+able\s+to\b',
+        r'\bcannot\s+remember\b', r'\bunable\s+to\b', r'\bnot\s+able\s+to\b',
+        r'\bdont\s+remember\b', r'\bcant\s+remember\b', r'\bforgetting\s+everything\b',
+        r'\bmemory\s+loss\b', r'\bnot\s+working\b', r'\bnot\s+functioning\b',
+        r'\bbroken\b', r'\bdamaged\b', r'\bhopeless\b', r'\bhelpless\b',
+        r'\bwant\s+to\s+end\s+it\b', r'\bno\s+point\b', r'\bworthless\b'
+    ]
+    
+    positive_patterns = [
+        r'\bfeeling\s+good\b', r'\bmuch\s+better\b', r'\brecovering\s+well\b',
+        r'\bimproving\b', r'\bgetting\s+better\b', r'\bfeeling\s+better\b',
+        r'\bmuch\s+improved\b', r'\bvery\s+happy\b', r'\bexcellent\s+progress\b'
+    ]
+    
+    # Check patterns
+    negative_pattern_matches = sum(1 for pattern in negative_patterns if re.search(pattern, text_lower))
+    positive_pattern_matches = sum(1 for pattern in positive_patterns if re.search(pattern, text_lower))
+    
+    # Calculate sentiment score
+    sentiment_score = (positive_count + positive_pattern_matches) - (negative_count + negative_pattern_matches)
+    
+    # Determine sentiment
+    if sentiment_score > 0:
+        sentiment = "positive"
+    elif sentiment_score < 0:
+        sentiment = "negative"
+    else:
+        sentiment = "neutral"
+    
+    # Determine urgency level
+    urgency_level = "normal"
+    if negative_count > 3 or negative_pattern_matches > 0:
+        urgency_level = "high"
+    elif negative_count > 1:
+        urgency_level = "medium"
+    
+    return {
+        "sentiment": sentiment,
+        "sentiment_score": sentiment_score,
+        "positive_count": positive_count,
+        "negative_count": negative_count,
+        "medical_count": medical_count,
+        "negative_patterns": negative_pattern_matches,
+        "positive_patterns": positive_pattern_matches,
+        "urgency_level": urgency_level
+    }
+
+def legacy_analyze_text_improved(text: str) -> Dict[str, Any]:
+    """Reference copy of the original per-call implementation"""
+    sentiment_analysis = legacy_analyze_sentiment_advanced(text)
+    
+    # Extract medical entities
+    words = text.lower().split()
+    medical_keywords = [
+        'medicine', 'patient', 'doctor', 'hospital', 'treatment', 'symptoms', 'diagnosis',
+        'health', 'medical', 'therapy', 'medication', 'prescription', 'appointment',
+        'checkup', 'examination', 'test', 'scan', 'x-ray', 'blood', 'pressure',
+        'temperature', 'pulse', 'heart', 'lung', 'brain', 'stomach', 'pain'
+    ]
+    found_keywords = [word for word in words if word in medical_keywords]
+    
+    # Calculate importance score
+    base_score = 0.3
+    medical_bonus = len(found_keywords) * 0.1
+    sentiment_bonus = 0.3 if sentiment_analysis["sentiment"] == "negative" else 0.1 if sentiment_analysis["sentiment"] == "positive" else 0.05
+    urgency_bonus = 0.2 if sentiment_analysis["urgency_level"] == "high" else 0.1 if sentiment_analysis["urgency_level"] == "medium" else 0.0
+    length_bonus = min(0.2, len(text) / 1000)
+    
+    importance_score = min(1.0, base_score + medical_bonus + sentiment_bonus + urgency_bonus + length_bonus)
+    
+    # Generate summary based on sentiment and content
+    if sentiment_analysis["sentiment"] == "negative":
+        if sentiment_analysis["urgency_level"] == "high":
+            summary = f"URGENT: Patient reported severe concerning symptoms. Key topics: {', '.join(found_keywords[:3]) if found_keywords else 'mental health'}"
+        else:
+            summary = f"Patient reported concerning symptoms. Key topics: {', '.join(found_keywords[:3]) if found_keywords else 'mental health'}"
+        action_items = ["Immediate follow-up required", "Schedule urgent appointment", "Consider mental health support"]
+    elif sentiment_analysis["sentiment"] == "positive":
+        summary = f"Patient reported improvement. Key topics: {', '.join(found_keywords[:3]) if found_keywords else 'recovery'}"
+        action_items = ["Continue current treatment", "Schedule follow-up appointment"]
+    else:
+        summary = f"Patient interaction recorded. Key topics: {', '.join(found_keywords[:3]) if found_keywords else 'general health'}"
+        action_items = ["Follow up with patient", "Schedule next appointment"] if importance_score > 0.5 else None
+    
+    # Determine topics
+    topics = found_keywords[:3] if found_keywords else ['general health']
+    if sentiment_analysis["sentiment"] == "negative" and not found_keywords:
+        topics = ['mental health']
+    
+    return dict(
+        importance_score=importance_score,
+        summary=summary,
+        entities=found_keywords,
+        sentiment=sentiment_analysis["sentiment"],
+        topics=topics,
+        action_items=action_items,
+        urgency_level=sentiment_analysis["urgency_level"]
+    )
+
+
+def run(label: str, func, texts, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in texts:
+            func(text)
+    elapsed = time.perf_counter() - start
+    rate = iterations * len(texts) / elapsed
+    print(f"{label:<32} {rate:>12,.0f} texts/s")
+    return rate
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    for text in SAMPLE_TEXTS:
+        assert text_analyzer.sentiment(text) == legacy_analyze_sentiment_advanced(text), text
+        assert text_analyzer.analyze(text) == legacy_analyze_text_improved(text), text
+    print(f"Results identical on {len(SAMPLE_TEXTS)} sample texts\n")
+
+    legacy = run("legacy analyze_text_improved", legacy_analyze_text_improved, SAMPLE_TEXTS, iterations)
+    compiled = run("TextAnalyzer.analyze", text_analyzer.analyze, SAMPLE_TEXTS, iterations)
+    print(f"\nSpeed-up: {compiled / legacy:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
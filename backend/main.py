@@ -10,8 +10,12 @@ Improved Infinite Memory Backend
 
 import sys
 import os
-from typing import Optional, List, Dict, Any
+import asyncio
+import threading
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
 import json
+import csv
+from collections import deque
 from datetime import datetime, timedelta
 import random
 import re
@@ -19,18 +23,42 @@ import re
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 
 # Import medicine recommendation system
-from medicine_recommendation_system import medicine_engine
+from medicine_recommendation_system import medicine_engine, Medicine
 
 # Import inventory management services
-from services.alerts_service import alerts_service, AlertType, AlertStatus
-from services.purchase_order_service import purchase_order_service, PurchaseOrderStatus
+from services.alerts_service import alerts_service, AlertType, AlertStatus, MedicalSupply
+from services.purchase_order_service import purchase_order_service, PurchaseOrderStatus, PurchaseOrder, Supplier
+from services.stock_ledger import ledger, StockError, StockMovement, UnknownItemError
+
+# Import durable patient memory store
+from services.memory_store import create_memory_store
+from services.memory_aggregates import MemoryAggregates
+from services.memory_search import MemorySearchIndex
+
+# Import indexed admin alert store
+from services.admin_alerts import AdminAlertStore
+
+# Import due-date indexed task scheduler
+from services.task_scheduler import TaskScheduler
+
+# Import shared paging/projection/ETag layer for list endpoints
+from services.list_responses import list_response, page_response, make_etag, not_modified
+
+# Import bounded executors for CPU-bound work
+from services.execution import BoundedExecutor, configure_routes
+
+# Import precompiled text analyzer
+from services.text_analysis import text_analyzer, analyze_batch
+
+# Import the voice assistant, served from this process so it shares the inventory engine
+from voice_medicine_service import app as voice_app
 
 app = FastAPI(title="Infinite Memory API - Improved", version="2.0.0")
 
@@ -41,12 +69,71 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Retry-After"],
 )
 
+# Voice assistant routes under /voice (e.g. /voice/api/voice-medicine-analysis): its
+# stock lookups and changes go through the same engine as medicines and supplies
+app.mount("/voice", voice_app)
+
 # Global data storage
-memory_data = {}
-tasks_data = {}
-alerts_data = []
+memory_store = create_memory_store()
+memory_aggregates = MemoryAggregates(memory_store)
+memory_search = MemorySearchIndex(memory_store)
+task_scheduler = TaskScheduler()
+alert_store = AdminAlertStore()
+
+# Batch ingestion settings
+BATCH_CHUNK_SIZE = int(os.environ.get("BATCH_CHUNK_SIZE", "256"))
+MEDICINE_BATCH_MAX_ITEMS = int(os.environ.get("MEDICINE_BATCH_MAX_ITEMS", "1000"))
+# Rows of a bulk stock count upload applied per pool call
+STOCK_COUNT_CHUNK_SIZE = int(os.environ.get("STOCK_COUNT_CHUNK_SIZE", "1000"))
+ANALYSIS_POOL_WORKERS = int(os.environ.get("ANALYSIS_POOL_WORKERS", str(os.cpu_count() or 2)))
+# Chunks of one batch upload being analyzed/stored at a time
+BATCH_MAX_IN_FLIGHT = int(os.environ.get("BATCH_MAX_IN_FLIGHT", str(ANALYSIS_POOL_WORKERS * 2)))
+
+# CPU work runs off the event loop: a process pool for bulk text analysis and
+# a thread pool for calls that touch in-process state (stores, engines)
+CPU_POOL_WORKERS = int(os.environ.get("CPU_POOL_WORKERS", str(min(32, (os.cpu_count() or 2) * 2))))
+CPU_POOL_MAX_QUEUE = int(os.environ.get("CPU_POOL_MAX_QUEUE", "256"))
+analysis_executor = BoundedExecutor("analysis", ANALYSIS_POOL_WORKERS, max_queue=ANALYSIS_POOL_WORKERS * 4,
+                                    processes=True)
+cpu_executor = BoundedExecutor("cpu", CPU_POOL_WORKERS, max_queue=CPU_POOL_MAX_QUEUE)
+
+# Per-route (concurrency, max_waiting) limits
+configure_routes(analysis_executor, {"process-text/batch": (ANALYSIS_POOL_WORKERS, ANALYSIS_POOL_WORKERS * 4)})
+configure_routes(cpu_executor, {
+    "process-text": (16, 128),
+    "query": (8, 64),
+    "memory-report": (4, 32),
+    "medicine/recommend": (8, 64),
+    "medicine/recommend/batch": (2, 8),
+    "purchase-orders/auto-generate": (1, 4),
+    "supplies/bulk-update-stock": (1, 4),
+    "alerts/archive": (2, 16),
+    "rfid": (2, 8),
+})
+
+def save_memory(user_id: str, record: Dict[str, Any]):
+    """Persist one interaction and update the patient's rolling aggregates"""
+    seq = memory_store.append(user_id, record)
+    memory_aggregates.add(user_id, seq, record)
+    memory_search.add(user_id, seq, record)
+
+def save_memories(records: List[Tuple[str, Dict[str, Any]]]):
+    """Persist many (user_id, record) pairs and update aggregates once per patient"""
+    seqs = memory_store.append_many(records)
+    grouped: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+    for (user_id, record), seq in zip(records, seqs):
+        grouped.setdefault(user_id, []).append((seq, record))
+    for user_id, items in grouped.items():
+        memory_aggregates.add_many(user_id, items)
+        memory_search.add_many(user_id, items)
+
+@app.on_event("shutdown")
+def shutdown_executors():
+    analysis_executor.shutdown()
+    cpu_executor.shutdown()
 
 class ProcessTextRequest(BaseModel):
     user_id: str
@@ -88,6 +175,18 @@ class UpdateMedicalSupplyStockRequest(BaseModel):
     item_id: str
     new_quantity: int
 
+class StockMovementRequest(BaseModel):
+    quantity: int
+    expected_version: Optional[int] = None
+    reason: Optional[str] = None
+    reference: Optional[str] = None
+
+class StockAdjustmentRequest(BaseModel):
+    delta: int
+    reason: str
+    expected_version: Optional[int] = None
+    reference: Optional[str] = None
+
 class DismissAlertRequest(BaseModel):
     alert_id: str
 
@@ -141,147 +240,25 @@ class MemoryReport(BaseModel):
 
 def analyze_sentiment_advanced(text: str) -> Dict[str, Any]:
     """Advanced sentiment analysis with multiple approaches"""
-    text_lower = text.lower()
-    words = text_lower.split()
-    
-    # Comprehensive word lists
-    positive_words = [
-        'good', 'better', 'improved', 'healthy', 'recovered', 'well', 'fine', 'great', 
-        'excellent', 'amazing', 'wonderful', 'happy', 'relieved', 'comfortable', 
-        'strong', 'energetic', 'positive', 'optimistic', 'confident', 'peaceful',
-        'calm', 'relaxed', 'satisfied', 'content', 'joyful', 'excited', 'grateful'
-    ]
-    
-    negative_words = [
-        'pain', 'sick', 'worse', 'bad', 'problem', 'hurt', 'ache', 'suffering', 
-        'terrible', 'awful', 'horrible', 'depressed', 'sad', 'angry', 'frustrated',
-        'worried', 'anxious', 'scared', 'afraid', 'fear', 'dead', 'dying', 'suicide',
-        'kill', 'death', 'hopeless', 'helpless', 'lonely', 'alone', 'empty', 'numb',
-        'tired', 'exhausted', 'weak', 'dizzy', 'nausea', 'vomit', 'bleeding', 'swelling',
-        'fever', 'chills', 'cough', 'cold', 'flu', 'infection', 'disease', 'cancer',
-        'heart', 'attack', 'stroke', 'emergency', 'urgent', 'critical', 'severe',
-        'remember', 'memory', 'forget', 'forgetting', 'confused', 'confusion', 'lost',
-        'disoriented', 'unable', 'cannot', 'cant', 'dont', 'not', 'never', 'hate',
-        'despise', 'loathe', 'miserable', 'desperate', 'panic', 'terrified', 'devastated'
-    ]
-    
-    # Medical/health keywords
-    medical_keywords = [
-        'medicine', 'patient', 'doctor', 'hospital', 'treatment', 'symptoms', 'diagnosis',
-        'health', 'medical', 'therapy', 'medication', 'prescription', 'appointment',
-        'checkup', 'examination', 'test', 'scan', 'x-ray', 'blood', 'pressure',
-        'temperature', 'pulse', 'heart', 'lung', 'brain', 'stomach', 'pain'
-    ]
-    
-    # Count words
-    positive_count = sum(1 for word in words if word in positive_words)
-    negative_count = sum(1 for word in words if word in negative_words)
-    medical_count = sum(1 for word in words if word in medical_keywords)
-    
-    # Pattern matching for complex phrases
-    negative_patterns = [
-        r'\bnot\s+feeling\b', r'\bnot\s+alive\b', r'\btoo\s+depressed\b',
-        r'\bwant\s+to\s+die\b', r'\bkill\s+myself\b', r'\bnot\s+being\s+able\s+to\b',
-        r'\bcannot\s+remember\b', r'\bunable\s+to\b', r'\bnot\s+able\s+to\b',
-        r'\bdont\s+remember\b', r'\bcant\s+remember\b', r'\bforgetting\s+everything\b',
-        r'\bmemory\s+loss\b', r'\bnot\s+working\b', r'\bnot\s+functioning\b',
-        r'\bbroken\b', r'\bdamaged\b', r'\bhopeless\b', r'\bhelpless\b',
-        r'\bwant\s+to\s+end\s+it\b', r'\bno\s+point\b', r'\bworthless\b'
-    ]
-    
-    positive_patterns = [
-        r'\bfeeling\s+good\b', r'\bmuch\s+better\b', r'\brecovering\s+well\b',
-        r'\bimproving\b', r'\bgetting\s+better\b', r'\bfeeling\s+better\b',
-        r'\bmuch\s+improved\b', r'\bvery\s+happy\b', r'\bexcellent\s+progress\b'
-    ]
-    
-    # Check patterns
-    negative_pattern_matches = sum(1 for pattern in negative_patterns if re.search(pattern, text_lower))
-    positive_pattern_matches = sum(1 for pattern in positive_patterns if re.search(pattern, text_lower))
-    
-    # Calculate sentiment score
-    sentiment_score = (positive_count + positive_pattern_matches) - (negative_count + negative_pattern_matches)
-    
-    # Determine sentiment
-    if sentiment_score > 0:
-        sentiment = "positive"
-    elif sentiment_score < 0:
-        sentiment = "negative"
-    else:
-        sentiment = "neutral"
-    
-    # Determine urgency level
-    urgency_level = "normal"
-    if negative_count > 3 or negative_pattern_matches > 0:
-        urgency_level = "high"
-    elif negative_count > 1:
-        urgency_level = "medium"
-    
-    return {
-        "sentiment": sentiment,
-        "sentiment_score": sentiment_score,
-        "positive_count": positive_count,
-        "negative_count": negative_count,
-        "medical_count": medical_count,
-        "negative_patterns": negative_pattern_matches,
-        "positive_patterns": positive_pattern_matches,
-        "urgency_level": urgency_level
-    }
+    return text_analyzer.sentiment(text)
 
 def analyze_text_improved(text: str) -> MemoryAnalysis:
     """Improved text analysis with better sentiment detection"""
-    sentiment_analysis = analyze_sentiment_advanced(text)
-    
-    # Extract medical entities
-    words = text.lower().split()
-    medical_keywords = [
-        'medicine', 'patient', 'doctor', 'hospital', 'treatment', 'symptoms', 'diagnosis',
-        'health', 'medical', 'therapy', 'medication', 'prescription', 'appointment',
-        'checkup', 'examination', 'test', 'scan', 'x-ray', 'blood', 'pressure',
-        'temperature', 'pulse', 'heart', 'lung', 'brain', 'stomach', 'pain'
-    ]
-    found_keywords = [word for word in words if word in medical_keywords]
-    
-    # Calculate importance score
-    base_score = 0.3
-    medical_bonus = len(found_keywords) * 0.1
-    sentiment_bonus = 0.3 if sentiment_analysis["sentiment"] == "negative" else 0.1 if sentiment_analysis["sentiment"] == "positive" else 0.05
-    urgency_bonus = 0.2 if sentiment_analysis["urgency_level"] == "high" else 0.1 if sentiment_analysis["urgency_level"] == "medium" else 0.0
-    length_bonus = min(0.2, len(text) / 1000)
-    
-    importance_score = min(1.0, base_score + medical_bonus + sentiment_bonus + urgency_bonus + length_bonus)
-    
-    # Generate summary based on sentiment and content
-    if sentiment_analysis["sentiment"] == "negative":
-        if sentiment_analysis["urgency_level"] == "high":
-            summary = f"URGENT: Patient reported severe concerning symptoms. Key topics: {', '.join(found_keywords[:3]) if found_keywords else 'mental health'}"
-        else:
-            summary = f"Patient reported concerning symptoms. Key topics: {', '.join(found_keywords[:3]) if found_keywords else 'mental health'}"
-        action_items = ["Immediate follow-up required", "Schedule urgent appointment", "Consider mental health support"]
-    elif sentiment_analysis["sentiment"] == "positive":
-        summary = f"Patient reported improvement. Key topics: {', '.join(found_keywords[:3]) if found_keywords else 'recovery'}"
-        action_items = ["Continue current treatment", "Schedule follow-up appointment"]
-    else:
-        summary = f"Patient interaction recorded. Key topics: {', '.join(found_keywords[:3]) if found_keywords else 'general health'}"
-        action_items = ["Follow up with patient", "Schedule next appointment"] if importance_score > 0.5 else None
+    return MemoryAnalysis(**text_analyzer.analyze(text))
+
+def generate_smart_answer(query: str, user_memories: List[Dict], related_memories: Optional[List[Dict]] = None) -> str:
+    """Generate context-aware answers based on user history"""
+    answer = _generate_base_answer(query, user_memories)
     
-    # Determine topics
-    topics = found_keywords[:3] if found_keywords else ['general health']
-    if sentiment_analysis["sentiment"] == "negative" and not found_keywords:
-        topics = ['mental health']
+    # Point at the most relevant past interaction found by the search index
+    if related_memories:
+        best = related_memories[0]
+        entries = "entry" if len(related_memories) == 1 else "entries"
+        answer += f" I also found {len(related_memories)} related {entries} in your history; the most relevant, from {best['timestamp'][:10]}, notes: \"{best['analysis']['summary']}\""
     
-    return MemoryAnalysis(
-        importance_score=importance_score,
-        summary=summary,
-        entities=found_keywords,
-        sentiment=sentiment_analysis["sentiment"],
-        topics=topics,
-        action_items=action_items,
-        urgency_level=sentiment_analysis["urgency_level"]
-    )
+    return answer
 
-def generate_smart_answer(query: str, user_memories: List[Dict]) -> str:
-    """Generate context-aware answers based on user history"""
+def _generate_base_answer(query: str, user_memories: List[Dict]) -> str:
     query_lower = query.lower()
     
     # Check recent memory for context
@@ -329,82 +306,212 @@ def read_root():
 def health_check():
     return {"status": "healthy", "service": "infinite-memory-api", "version": "2.0.0"}
 
+def _process_text(user_id: str, text: str) -> MemoryAnalysis:
+    analysis = analyze_text_improved(text)
+    
+    # Store in memory
+    save_memory(user_id, {
+        "text": text,
+        "analysis": analysis.model_dump(),
+        "timestamp": datetime.now().isoformat()
+    })
+    
+    # Create alert for high urgency
+    if analysis.urgency_level == "high":
+        alert_store.add(user_id, "high_urgency", f"High urgency interaction: {analysis.summary}")
+    
+    return analysis
+
 @app.post("/process-text")
 async def process_text(request: ProcessTextRequest):
     """Process text input and return analysis"""
     try:
-        analysis = analyze_text_improved(request.text)
-        
-        # Store in memory
-        if request.user_id not in memory_data:
-            memory_data[request.user_id] = []
-        
-        memory_data[request.user_id].append({
-            "text": request.text,
-            "analysis": analysis.model_dump(),
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        # Create alert for high urgency
-        if analysis.urgency_level == "high":
-            alert = {
-                "alert_id": f"alert_{len(alerts_data) + 1}",
-                "patient_id": request.user_id,
-                "type": "high_urgency",
-                "message": f"High urgency interaction: {analysis.summary}",
-                "timestamp": datetime.now().isoformat(),
-                "acknowledged": False
-            }
-            alerts_data.append(alert)
-        
-        return analysis
+        return await cpu_executor.run("process-text", _process_text, request.user_id, request.text)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
 
+async def iter_batch_records(request: Request) -> AsyncIterator[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """Yield (record, error) pairs from an NDJSON body as it streams in"""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                try:
+                    yield json.loads(line), None
+                except ValueError as e:
+                    yield None, f"Invalid JSON line: {str(e)}"
+    if buffer.strip():
+        try:
+            yield json.loads(buffer), None
+        except ValueError as e:
+            yield None, f"Invalid JSON line: {str(e)}"
+
+def store_batch_results(chunk: List[Tuple[int, str, str]], analyses: List[Dict[str, Any]]) -> List[str]:
+    """Append one analyzed chunk to the memory store and alert store in bulk; return NDJSON lines"""
+    timestamp = datetime.now().isoformat()
+    records = []
+    new_alerts = []
+    lines = []
+    for (index, user_id, text), analysis in zip(chunk, analyses):
+        records.append((user_id, {
+            "text": text,
+            "analysis": analysis,
+            "timestamp": timestamp,
+            "source": "batch"
+        }))
+        if analysis["urgency_level"] == "high":
+            new_alerts.append((user_id, f"High urgency interaction: {analysis['summary']}"))
+        lines.append(json.dumps({"index": index, "user_id": user_id, "analysis": analysis}) + "\n")
+
+    save_memories(records)
+    for user_id, message in new_alerts:
+        alert_store.add(user_id, "high_urgency", message, timestamp)
+    return lines
+
+@app.post("/process-text/batch")
+async def process_text_batch(request: Request):
+    """Analyze many {user_id, text} records (NDJSON or JSON array) and stream results as NDJSON"""
+    # Refuse before reading the upload if the analysis pool is already backed up
+    analysis_executor.admit("process-text/batch")
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        source = iter_batch_records(request)
+    else:
+        # A JSON array has to be complete before it can be parsed
+        try:
+            body = json.loads(await request.body())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON body: {str(e)}")
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array or NDJSON stream of {user_id, text} records")
+        source = None
+
+    async def run_chunk(chunk: List[Tuple[int, str, str]]) -> List[str]:
+        analyses = await analysis_executor.run("process-text/batch", analyze_batch,
+                                               [text for _, _, text in chunk], check=False)
+        # Stored here rather than in the response generator, so a client that
+        # stops reading the response does not lose analyzed records
+        return await cpu_executor.run("process-text/batch", store_batch_results, chunk, analyses, check=False)
+
+    async def all_records():
+        if source is not None:
+            async for item in source:
+                yield item
+        else:
+            for item in body:
+                yield item, None
+
+    # Read the upload here (the response cannot read the request body once it
+    # starts streaming); chunks go to the pool while the rest is still arriving,
+    # at most BATCH_MAX_IN_FLIGHT at a time.
+    pending: "deque[asyncio.Future]" = deque()
+    saved_lines: List[str] = []   # result lines of chunks already stored
+    error_lines = []
+    chunk: List[Tuple[int, str, str]] = []
+    index = 0
+
+    async def submit(chunk: List[Tuple[int, str, str]]):
+        pending.append(asyncio.ensure_future(run_chunk(chunk)))
+        if len(pending) >= BATCH_MAX_IN_FLIGHT:
+            saved_lines.extend(await pending.popleft())
+    async for record, error in all_records():
+        if error is None and not (isinstance(record, dict)
+                                  and isinstance(record.get("user_id"), str)
+                                  and isinstance(record.get("text"), str)):
+            error = "Record must be an object with string user_id and text"
+        if error:
+            error_lines.append(json.dumps({"index": index, "error": error}) + "\n")
+        else:
+            chunk.append((index, record["user_id"], record["text"]))
+            if len(chunk) >= BATCH_CHUNK_SIZE:
+                await submit(chunk)
+                chunk = []
+        index += 1
+    if chunk:
+        await submit(chunk)
+
+    async def generate():
+        # Only formats chunks that are stored; the in-flight ones keep running
+        # to completion even if the client disconnects
+        for line in error_lines:
+            yield line
+        processed = len(saved_lines)
+        for line in saved_lines:
+            yield line
+        while pending:
+            lines = await pending.popleft()
+            processed += len(lines)
+            for line in lines:
+                yield line
+        yield json.dumps({"summary": {"received": index, "processed": processed, "failed": len(error_lines)}}) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+def _query(user_id: str, query_text: str) -> Dict[str, Any]:
+    # Get context from recent memories
+    recent_memories = memory_store.recent(user_id, 5)
+
+    # Search the full history for relevant memories
+    matches = memory_search.search(user_id, query_text, k=5)
+    answer = generate_smart_answer(query_text, recent_memories, [m["record"] for m in matches])
+
+    context = {
+        "recent_interactions": len(recent_memories),
+        "total_memories": memory_store.count(user_id),
+        "last_interaction": recent_memories[-1]["timestamp"] if recent_memories else None,
+        "recent_sentiment": recent_memories[-1]["analysis"]["sentiment"] if recent_memories else "neutral"
+    }
+
+    return {
+        "answer": answer,
+        "context": context,
+        "memories": [
+            {
+                "timestamp": m["record"]["timestamp"],
+                "text": m["record"]["text"],
+                "summary": m["record"]["analysis"]["summary"],
+                "sentiment": m["record"]["analysis"]["sentiment"],
+                "importance": m["record"]["analysis"]["importance_score"],
+                "source": m["record"].get("source", "text"),
+                "score": m["score"]
+            }
+            for m in matches
+        ]
+    }
+
 @app.post("/query")
 async def query(request: QueryRequest):
     """Query the memory system with context"""
     try:
-        user_memories = memory_data.get(request.user_id, [])
-        answer = generate_smart_answer(request.query, user_memories)
-        
-        # Get context from recent memories
-        recent_memories = user_memories[-5:] if user_memories else []
-        
-        context = {
-            "recent_interactions": len(recent_memories),
-            "total_memories": len(user_memories),
-            "last_interaction": recent_memories[-1]["timestamp"] if recent_memories else None,
-            "recent_sentiment": recent_memories[-1]["analysis"]["sentiment"] if recent_memories else "neutral"
-        }
-        
-        return {
-            "answer": answer,
-            "context": context
-        }
+        return await cpu_executor.run("query", _query, request.user_id, request.query)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query error: {str(e)}")
 
+def _process_media_text(user_id: str, text: str, source: str) -> MemoryAnalysis:
+    analysis = analyze_text_improved(text)
+    save_memory(user_id, {
+        "text": text,
+        "analysis": analysis.model_dump(),
+        "timestamp": datetime.now().isoformat(),
+        "source": source
+    })
+    return analysis
+
 @app.post("/process-audio")
 async def process_audio(request: ProcessAudioRequest):
     """Process audio input"""
     try:
         # Mock audio processing - in real implementation, this would transcribe audio
         mock_text = "Patient reported feeling better today. Symptoms have improved significantly."
-        
-        analysis = analyze_text_improved(mock_text)
-        
-        if request.user_id not in memory_data:
-            memory_data[request.user_id] = []
-        
-        memory_data[request.user_id].append({
-            "text": mock_text,
-            "analysis": analysis.model_dump(),
-            "timestamp": datetime.now().isoformat(),
-            "source": "audio"
-        })
-        
-        return analysis
+        return await cpu_executor.run("process-audio", _process_media_text, request.user_id, mock_text, "audio")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Audio processing error: {str(e)}")
 
@@ -413,20 +520,9 @@ async def process_image(user_id: str = File(...), caption: str = File(""), image
     """Process image input"""
     try:
         mock_text = f"Image uploaded with caption: {caption}. Image appears to show medical documentation."
-        
-        analysis = analyze_text_improved(mock_text)
-        
-        if user_id not in memory_data:
-            memory_data[user_id] = []
-        
-        memory_data[user_id].append({
-            "text": mock_text,
-            "analysis": analysis.model_dump(),
-            "timestamp": datetime.now().isoformat(),
-            "source": "image"
-        })
-        
-        return analysis
+        return await cpu_executor.run("process-image", _process_media_text, user_id, mock_text, "image")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Image processing error: {str(e)}")
 
@@ -442,79 +538,56 @@ async def text_to_speech(request: TextToSpeechRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Text-to-speech error: {str(e)}")
 
+def _memory_report(patient_id: str, days: int) -> MemoryReport:
+    # Merge the patient's daily buckets for the window
+    cutoff_date = datetime.now() - timedelta(days=days)
+    summary = memory_aggregates.summarize(patient_id, since=cutoff_date)
+
+    # Recent activities
+    recent_memories = [
+        m for m in memory_store.recent(patient_id, 10)
+        if datetime.fromisoformat(m["timestamp"]) > cutoff_date
+    ]
+    activities = [
+        {
+            "timestamp": m["timestamp"],
+            "type": m.get("source", "text"),
+            "summary": m["analysis"]["summary"],
+            "sentiment": m["analysis"]["sentiment"],
+            "importance": m["analysis"]["importance_score"]
+        }
+        for m in recent_memories
+    ]
+
+    return MemoryReport(
+        patient_id=patient_id,
+        days=days,
+        total_interactions=summary["total_interactions"],
+        average_importance=summary["average_importance"],
+        memory_trends=summary["memory_trends"],
+        recent_activities=activities,
+        sentiment_distribution=summary["sentiment_distribution"]
+    )
+
 @app.get("/memory-report/{patient_id}")
 async def get_memory_report(patient_id: str, days: int = 3):
     """Get comprehensive memory report"""
     try:
-        user_memories = memory_data.get(patient_id, [])
-        
-        # Filter by days
-        cutoff_date = datetime.now() - timedelta(days=days)
-        recent_memories = [
-            m for m in user_memories 
-            if datetime.fromisoformat(m["timestamp"]) > cutoff_date
-        ]
-        
-        if not recent_memories:
-            return MemoryReport(
-                patient_id=patient_id,
-                days=days,
-                total_interactions=0,
-                average_importance=0.0,
-                memory_trends=[],
-                recent_activities=[],
-                sentiment_distribution={"positive": 0, "negative": 0, "neutral": 0}
-            )
-        
-        # Calculate statistics
-        avg_importance = sum(m["analysis"]["importance_score"] for m in recent_memories) / len(recent_memories)
-        
-        # Sentiment distribution
-        sentiment_counts = {"positive": 0, "negative": 0, "neutral": 0}
-        for memory in recent_memories:
-            sentiment = memory["analysis"]["sentiment"]
-            sentiment_counts[sentiment] += 1
-        
-        # Generate trends
-        trends = []
-        for i in range(min(7, len(recent_memories))):
-            memory = recent_memories[-(i+1)]
-            trends.append({
-                "date": memory["timestamp"][:10],
-                "interactions": 1,
-                "avg_importance": memory["analysis"]["importance_score"],
-                "sentiment": memory["analysis"]["sentiment"]
-            })
-        
-        # Recent activities
-        activities = [
-            {
-                "timestamp": m["timestamp"],
-                "type": m.get("source", "text"),
-                "summary": m["analysis"]["summary"],
-                "sentiment": m["analysis"]["sentiment"],
-                "importance": m["analysis"]["importance_score"]
-            }
-            for m in recent_memories[-10:]
-        ]
-        
-        return MemoryReport(
-            patient_id=patient_id,
-            days=days,
-            total_interactions=len(recent_memories),
-            average_importance=avg_importance,
-            memory_trends=trends,
-            recent_activities=activities,
-            sentiment_distribution=sentiment_counts
-        )
+        return await cpu_executor.run("memory-report", _memory_report, patient_id, days)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Memory report error: {str(e)}")
 
+def check_task_limit(limit: Optional[int]):
+    if limit is not None and limit < 0:
+        raise HTTPException(status_code=422, detail="limit must not be negative")
+
 @app.post("/tasks/create")
 async def create_task_endpoint(request: CreateTaskRequest):
     """Create a new task with priority"""
     try:
-        task_id = f"task_{len(tasks_data) + 1}_{random.randint(1000, 9999)}"
+        task_id = f"task_{task_scheduler.next_number()}_{random.randint(1000, 9999)}"
         
         # Determine priority based on content
         priority = "medium"
@@ -535,20 +608,23 @@ async def create_task_endpoint(request: CreateTaskRequest):
             priority=priority
         )
         
-        if request.patient_id not in tasks_data:
-            tasks_data[request.patient_id] = []
-        
-        tasks_data[request.patient_id].append(task.model_dump())
+        task_scheduler.add(task.model_dump())
         
         return task
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Task creation error: {str(e)}")
 
 @app.get("/tasks/{patient_id}")
-async def get_tasks_endpoint(patient_id: str):
-    """Get tasks for a patient"""
+async def get_tasks_endpoint(patient_id: str, upcoming: bool = False, limit: Optional[int] = None):
+    """Get tasks for a patient; with upcoming=true only pending tasks due today or later, soonest first"""
+    check_task_limit(limit)
     try:
-        return tasks_data.get(patient_id, [])
+        if upcoming:
+            return task_scheduler.upcoming(patient_id, limit)
+        tasks = task_scheduler.for_patient(patient_id)
+        return tasks[:limit] if limit is not None else tasks
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Task retrieval error: {str(e)}")
 
@@ -556,22 +632,52 @@ async def get_tasks_endpoint(patient_id: str):
 async def complete_task_endpoint(request: MarkTaskCompletedRequest):
     """Mark a task as completed"""
     try:
-        patient_tasks = tasks_data.get(request.patient_id, [])
-        
-        for task in patient_tasks:
-            if task["task_id"] == request.task_id:
-                task["completed"] = True
-                return {"message": "Task completed successfully"}
-        
-        raise HTTPException(status_code=404, detail="Task not found")
+        if task_scheduler.complete(request.patient_id, request.task_id) is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        return {"message": "Task completed successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Task completion error: {str(e)}")
 
+@app.get("/admin/overdue-tasks")
+async def get_overdue_tasks(limit: Optional[int] = None):
+    """Pending tasks of all patients whose end date has passed, most overdue first"""
+    check_task_limit(limit)
+    try:
+        return task_scheduler.overdue(limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Task retrieval error: {str(e)}")
+
+@app.get("/admin/executor-metrics")
+async def get_executor_metrics():
+    """Saturation of the worker pools and per-route limits, for tuning worker counts"""
+    return {
+        "analysis": analysis_executor.metrics(),
+        "cpu": cpu_executor.metrics()
+    }
+
+@app.get("/admin/recommendation-cache")
+async def get_recommendation_cache_metrics():
+    """Hit/miss/eviction/invalidation counters of the medicine recommendation cache"""
+    return medicine_engine.recommendation_cache.metrics()
+
 @app.get("/admin/alerts")
-async def get_admin_alerts():
-    """Get all admin alerts"""
+async def get_admin_alerts(request: Request, patient_id: Optional[str] = None, unacknowledged: bool = False,
+                           after: Optional[str] = None, cursor: Optional[str] = None, limit: int = 100,
+                           fields: Optional[str] = None):
+    """Get admin alerts oldest first; the X-Next-Cursor header holds the `after` value for the next page"""
     try:
-        return alerts_data
+        etag = make_etag(request, "admin-alerts", alert_store.version)
+        if not_modified(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        limit = max(1, min(limit, 1000))
+        alerts, next_cursor = alert_store.list_alerts(patient_id, unacknowledged, after or cursor, limit)
+        return page_response(request, etag, alerts, next_cursor, fields)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Alert retrieval error: {str(e)}")
 
@@ -579,12 +685,11 @@ async def get_admin_alerts():
 async def acknowledge_alert_endpoint(alert_id: str):
     """Acknowledge an alert"""
     try:
-        for alert in alerts_data:
-            if alert["alert_id"] == alert_id:
-                alert["acknowledged"] = True
-                return {"message": f"Alert {alert_id} acknowledged successfully"}
-        
-        raise HTTPException(status_code=404, detail="Alert not found")
+        if alert_store.acknowledge(alert_id) is None:
+            raise HTTPException(status_code=404, detail="Alert not found")
+        return {"message": f"Alert {alert_id} acknowledged successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Alert acknowledgment error: {str(e)}")
 
@@ -594,33 +699,69 @@ async def acknowledge_alert_endpoint(alert_id: str):
 async def recommend_medicines(request: MedicineRecommendationRequest):
     """Get medicine recommendations based on symptoms"""
     try:
-        result = medicine_engine.process_medicine_recommendation(request.symptoms, request.user_id)
-        return result
+        return await cpu_executor.run("medicine/recommend", medicine_engine.process_medicine_recommendation,
+                                      request.symptoms, request.user_id)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Medicine recommendation error: {str(e)}")
 
+@app.post("/medicine/recommend/batch")
+async def recommend_medicines_batch(requests: List[MedicineRecommendationRequest]):
+    """Recommendations for many {user_id, symptoms} items scored together; restocking checked once per medicine"""
+    if not requests:
+        raise HTTPException(status_code=400, detail="Expected a non-empty JSON array of {user_id, symptoms} items")
+    if len(requests) > MEDICINE_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MEDICINE_BATCH_MAX_ITEMS} items per batch")
+    try:
+        return await cpu_executor.run("medicine/recommend/batch", medicine_engine.process_medicine_recommendations,
+                                      [(item.user_id, item.symptoms) for item in requests])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Medicine recommendation error: {str(e)}")
+
+# Medicine fields shown in catalog listings (details come from /medicine/{id})
+MEDICINE_LIST_FIELDS = ("id", "name", "category", "description", "dosage", "price", "stock_quantity",
+                        "prescription_required", "symptoms_treated", "conditions_treated")
+
 @app.get("/medicine/all")
-async def get_all_medicines():
-    """Get all available medicines"""
+async def get_all_medicines(request: Request, limit: Optional[int] = None, cursor: Optional[str] = None,
+                            fields: Optional[str] = None):
+    """Get all available medicines (paged with limit/cursor, projected with fields=)"""
+    try:
+        return list_response(request, "medicines", medicine_engine.version, medicine_engine.get_all_medicines,
+                             Medicine, MEDICINE_LIST_FIELDS, (), limit, cursor, fields)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Medicine retrieval error: {str(e)}")
+
+@app.get("/medicine/restocking-requests")
+async def get_restocking_requests(include_history: bool = False):
+    """Get open restocking requests (one per medicine); include_history adds recently closed ones"""
     try:
-        medicines = medicine_engine.get_all_medicines()
+        requests = medicine_engine.get_restocking_requests(include_history)
         return [
             {
-                "id": med.id,
-                "name": med.name,
-                "category": med.category.value,
-                "description": med.description,
-                "dosage": med.dosage,
-                "price": med.price,
-                "stock_quantity": med.stock_quantity,
-                "prescription_required": med.prescription_required,
-                "symptoms_treated": med.symptoms_treated,
-                "conditions_treated": med.conditions_treated
+                "request_id": req.request_id,
+                "medicine_id": req.medicine_id,
+                "medicine_name": req.medicine_name,
+                "current_stock": req.current_stock,
+                "requested_quantity": req.requested_quantity,
+                "urgency_level": req.urgency_level,
+                "reason": req.reason,
+                "created_at": req.created_at.isoformat(),
+                "status": req.status,
+                "trigger_count": req.trigger_count,
+                "last_triggered_at": req.last_triggered_at.isoformat() if req.last_triggered_at else None,
+                "closed_at": req.closed_at.isoformat() if req.closed_at else None
             }
-            for med in medicines
+            for req in requests
         ]
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Medicine retrieval error: {str(e)}")
+        print(f"Error in restocking requests: {e}")
+        return []
 
 @app.get("/medicine/{medicine_id}")
 async def get_medicine_info(medicine_id: str):
@@ -644,32 +785,11 @@ async def get_medicine_info(medicine_id: str):
             "symptoms_treated": medicine.symptoms_treated,
             "conditions_treated": medicine.conditions_treated
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Medicine info error: {str(e)}")
 
-@app.get("/medicine/restocking-requests")
-async def get_restocking_requests():
-    """Get all restocking requests"""
-    try:
-        requests = medicine_engine.get_restocking_requests()
-        return [
-            {
-                "request_id": req.request_id,
-                "medicine_id": req.medicine_id,
-                "medicine_name": req.medicine_name,
-                "current_stock": req.current_stock,
-                "requested_quantity": req.requested_quantity,
-                "urgency_level": req.urgency_level,
-                "reason": req.reason,
-                "created_at": req.created_at.isoformat(),
-                "status": req.status
-            }
-            for req in requests
-        ]
-    except Exception as e:
-        print(f"Error in restocking requests: {e}")
-        return []
-
 @app.post("/medicine/update-stock")
 async def update_medicine_stock(request: UpdateStockRequest):
     """Update medicine stock quantity"""
@@ -681,25 +801,19 @@ async def update_medicine_stock(request: UpdateStockRequest):
 
 # Inventory Management Endpoints
 
+SUPPLY_COMPUTED = (
+    ("status", lambda supply: "low_stock" if supply.current_stock <= supply.threshold_quantity else "normal"),
+)
+
 @app.get("/inventory/supplies")
-async def get_medical_supplies():
-    """Get all medical supplies"""
+async def get_medical_supplies(request: Request, limit: Optional[int] = None, cursor: Optional[str] = None,
+                               fields: Optional[str] = None):
+    """Get all medical supplies (paged with limit/cursor, projected with fields=)"""
     try:
-        supplies = alerts_service.get_medical_supplies()
-        return [
-            {
-                "id": supply.id,
-                "name": supply.name,
-                "current_stock": supply.current_stock,
-                "threshold_quantity": supply.threshold_quantity,
-                "expiry_date": supply.expiry_date.isoformat() if supply.expiry_date else None,
-                "supplier_id": supply.supplier_id,
-                "supplier_name": supply.supplier_name,
-                "unit": supply.unit,
-                "status": "low_stock" if supply.current_stock <= supply.threshold_quantity else "normal"
-            }
-            for supply in supplies
-        ]
+        return list_response(request, "supplies", alerts_service.supplies_version, alerts_service.get_medical_supplies,
+                             MedicalSupply, None, SUPPLY_COMPUTED, limit, cursor, fields)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Medical supplies retrieval error: {str(e)}")
 
@@ -715,7 +829,7 @@ async def add_medical_supply(request: AddMedicalSupplyRequest):
             expiry_date = datetime.fromisoformat(request.expiry_date.replace('Z', '+00:00'))
         
         supply = MedicalSupply(
-            id=f"ms_{len(alerts_service.medical_supplies) + 1:03d}",
+            id=f"ms_{alerts_service.supply_count() + 1:03d}",
             name=request.name,
             current_stock=request.current_stock,
             threshold_quantity=request.threshold_quantity,
@@ -742,6 +856,165 @@ async def update_medical_supply_stock(request: UpdateMedicalSupplyStockRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Stock update error: {str(e)}")
 
+async def iter_csv_records(request: Request) -> AsyncIterator[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """Yield (record, error) pairs from a CSV body with a header row as it streams in"""
+    header: Optional[List[str]] = None
+    buffer = b""
+
+    def parse(line: bytes):
+        nonlocal header
+        try:
+            values = next(csv.reader([line.decode("utf-8-sig" if header is None else "utf-8").rstrip("\r")]))
+        except (UnicodeDecodeError, csv.Error) as e:
+            return None, f"Invalid CSV line: {str(e)}"
+        if header is None:
+            header = [value.strip() for value in values]
+            return None, None
+        if len(values) != len(header):
+            return None, f"Expected {len(header)} columns, got {len(values)}"
+        return dict(zip(header, (value.strip() for value in values))), None
+
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                record, error = parse(line)
+                if record is not None or error:
+                    yield record, error
+    if buffer.strip():
+        record, error = parse(buffer)
+        if record is not None or error:
+            yield record, error
+
+def parse_stock_count(record: Optional[Dict[str, Any]]) -> Tuple[Optional[Tuple[str, int]], Optional[str]]:
+    """(item_id, new_quantity) from one bulk stock row (CSV values arrive as strings)"""
+    if not isinstance(record, dict) or not isinstance(record.get("item_id"), str) or not record["item_id"]:
+        return None, "Row must have an item_id and a new_quantity"
+    quantity = record.get("new_quantity")
+    if isinstance(quantity, str) and quantity.lstrip("-").isdigit():
+        quantity = int(quantity)
+    if not isinstance(quantity, int) or isinstance(quantity, bool):
+        return None, "new_quantity must be an integer"
+    return (record["item_id"], quantity), None
+
+def apply_stock_counts(rows: List[Tuple[int, Optional[str], Optional[Tuple[str, int]], Optional[str]]]) -> List[str]:
+    """Apply one chunk of (index, item_id, count, parse error) rows; NDJSON error lines in row order"""
+    applied = alerts_service.bulk_update_stock([count for _, _, count, _ in rows if count is not None])
+    results = iter(applied)
+    lines = []
+    for index, item_id, count, error in rows:
+        if count is not None:
+            error = next(results)
+        if error:
+            lines.append(json.dumps({"index": index, "item_id": item_id, "error": error}) + "\n")
+    return lines
+
+@app.post("/inventory/supplies/bulk-update-stock")
+async def bulk_update_medical_supply_stock(request: Request):
+    """
+    Apply a stock count file: CSV (item_id,new_quantity header) or NDJSON
+    {item_id, new_quantity} rows, streamed in. Rows are applied in chunks of
+    STOCK_COUNT_CHUNK_SIZE as the upload arrives, one chunk at a time and in
+    file order, with low stock alerts evaluated once per chunk; memory stays
+    bounded by a chunk plus the rejected rows. The response streams an NDJSON
+    error line per rejected row, chunk by chunk, then a summary.
+    """
+    # Refuse before reading the upload if bulk updates are already backed up
+    cpu_executor.admit("supplies/bulk-update-stock")
+    content_type = request.headers.get("content-type", "")
+    if "csv" in content_type:
+        source = iter_csv_records(request)
+    elif "ndjson" in content_type or "jsonl" in content_type:
+        source = iter_batch_records(request)
+    else:
+        raise HTTPException(status_code=415, detail="Expected a text/csv or application/x-ndjson upload")
+
+    # The upload is read here (the response cannot read the request body once
+    # it starts streaming). While one chunk is applied on the pool the next one
+    # is parsed; chunks never overlap, so a later row for an item wins.
+    applying: Optional[asyncio.Future] = None
+    error_lines: List[str] = []   # error lines of chunks already applied
+    chunk = []
+    index = 0
+
+    async def submit(chunk):
+        nonlocal applying
+        if applying is not None:
+            error_lines.extend(await applying)
+        applying = asyncio.ensure_future(cpu_executor.run("supplies/bulk-update-stock", apply_stock_counts,
+                                                          chunk, check=False))
+    async for record, error in source:
+        count = None
+        if error is None:
+            count, error = parse_stock_count(record)
+        item_id = record.get("item_id") if isinstance(record, dict) else None
+        chunk.append((index, item_id, count, error))
+        index += 1
+        if len(chunk) >= STOCK_COUNT_CHUNK_SIZE:
+            await submit(chunk)
+            chunk = []
+    if chunk:
+        await submit(chunk)
+
+    async def generate():
+        # The last chunk keeps applying even if the client disconnects
+        for line in error_lines:
+            yield line
+        failed = len(error_lines)
+        if applying is not None:
+            for line in await applying:
+                failed += 1
+                yield line
+        yield json.dumps({"summary": {"received": index, "updated": index - failed, "failed": failed}}) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+# Stock ledger: atomic movements for any inventory item (medicines, supplies, OTC items)
+
+def stock_movement(operation) -> Dict[str, Any]:
+    """Run a ledger movement; refusals map to 404 (unknown item) or 409 (stock/version conflict)"""
+    try:
+        movement: StockMovement = operation()
+        return movement.to_dict()
+    except UnknownItemError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except StockError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/inventory/stock/{item_id}")
+async def get_stock_level(item_id: str):
+    """Current quantity and version of an item (send the version back as expected_version)"""
+    level = ledger.level(item_id)
+    if level is None:
+        raise HTTPException(status_code=404, detail="Inventory item not found")
+    return level
+
+@app.post("/inventory/stock/{item_id}/dispense")
+async def dispense_stock(item_id: str, request: StockMovementRequest):
+    """Take stock out; 409 if less is on hand or expected_version is stale"""
+    return stock_movement(lambda: ledger.dispense(item_id, request.quantity, request.expected_version,
+                                                  request.reason, request.reference))
+
+@app.post("/inventory/stock/{item_id}/receive")
+async def receive_stock(item_id: str, request: StockMovementRequest):
+    """Add delivered or returned stock"""
+    return stock_movement(lambda: ledger.receive(item_id, request.quantity, request.expected_version,
+                                                 request.reason, request.reference))
+
+@app.post("/inventory/stock/{item_id}/adjust")
+async def adjust_stock(item_id: str, request: StockAdjustmentRequest):
+    """Signed stock correction with a reason"""
+    return stock_movement(lambda: ledger.adjust(item_id, request.delta, request.reason, request.expected_version,
+                                                request.reference))
+
+@app.get("/inventory/stock/{item_id}/movements")
+async def get_stock_movements(item_id: str, limit: int = 100):
+    """Most recent retained movements of an item, oldest first"""
+    return [movement.to_dict() for movement in ledger.movements(item_id, limit)]
+
 @app.get("/inventory/alerts")
 async def get_inventory_alerts():
     """Get all inventory alerts"""
@@ -771,6 +1044,25 @@ async def get_alert_statistics():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Alert statistics error: {str(e)}")
 
+@app.get("/inventory/alerts/archive")
+async def get_archived_alerts(since: Optional[str] = None, until: Optional[str] = None, item_id: Optional[str] = None,
+                              type: Optional[AlertType] = None, status: Optional[AlertStatus] = None,
+                              limit: int = 100):
+    """Archived (older dismissed/resolved) alerts created between since and until, newest first"""
+    try:
+        since_date = datetime.fromisoformat(since.replace('Z', '+00:00')) if since else None
+        until_date = datetime.fromisoformat(until.replace('Z', '+00:00')) if until else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {str(e)}")
+    try:
+        alerts, segments_read = await cpu_executor.run("alerts/archive", alerts_service.query_archived_alerts,
+                                                       since_date, until_date, item_id, type, status, limit)
+        return {"alerts": alerts, "segments_read": segments_read, "archive": alerts_service.archive.stats()}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Alert archive query error: {str(e)}")
+
 @app.post("/inventory/alerts/dismiss")
 async def dismiss_alert(request: DismissAlertRequest):
     """Dismiss an alert"""
@@ -793,30 +1085,15 @@ async def run_alert_check():
         raise HTTPException(status_code=500, detail=f"Alert check error: {str(e)}")
 
 @app.get("/inventory/purchase-orders")
-async def get_purchase_orders():
-    """Get all purchase orders"""
+async def get_purchase_orders(request: Request, limit: Optional[int] = None, cursor: Optional[str] = None,
+                              fields: Optional[str] = None):
+    """Get all purchase orders (paged with limit/cursor, projected with fields=)"""
     try:
-        orders = purchase_order_service.get_all_purchase_orders()
-        return [
-            {
-                "order_id": order.order_id,
-                "item_id": order.item_id,
-                "item_name": order.item_name,
-                "quantity": order.quantity,
-                "supplier_id": order.supplier_id,
-                "supplier_name": order.supplier_name,
-                "supplier_email": order.supplier_email,
-                "status": order.status.value,
-                "created_at": order.created_at.isoformat(),
-                "sent_at": order.sent_at.isoformat() if order.sent_at else None,
-                "confirmed_at": order.confirmed_at.isoformat() if order.confirmed_at else None,
-                "received_at": order.received_at.isoformat() if order.received_at else None,
-                "notes": order.notes,
-                "unit_price": order.unit_price,
-                "total_amount": order.total_amount
-            }
-            for order in orders
-        ]
+        return list_response(request, "purchase-orders", purchase_order_service.orders_version,
+                             purchase_order_service.get_all_purchase_orders, PurchaseOrder,
+                             None, (), limit, cursor, fields)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Purchase orders retrieval error: {str(e)}")
 
@@ -876,46 +1153,42 @@ async def get_purchase_order_statistics():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Purchase order statistics error: {str(e)}")
 
+def _auto_generate_purchase_orders():
+    supplies = alerts_service.get_medical_supplies()
+    generated_orders = purchase_order_service.auto_generate_orders_for_low_stock(supplies)
+
+    return {
+        "message": f"Generated {len(generated_orders)} purchase orders",
+        "generated_orders": [
+            {
+                "order_id": order.order_id,
+                "item_name": order.item_name,
+                "quantity": order.quantity,
+                "supplier_name": order.supplier_name
+            }
+            for order in generated_orders
+        ]
+    }
+
 @app.post("/inventory/purchase-orders/auto-generate")
 async def auto_generate_purchase_orders():
     """Auto-generate purchase orders for low stock items"""
     try:
-        supplies = alerts_service.get_medical_supplies()
-        generated_orders = purchase_order_service.auto_generate_orders_for_low_stock(supplies)
-        
-        return {
-            "message": f"Generated {len(generated_orders)} purchase orders",
-            "generated_orders": [
-                {
-                    "order_id": order.order_id,
-                    "item_name": order.item_name,
-                    "quantity": order.quantity,
-                    "supplier_name": order.supplier_name
-                }
-                for order in generated_orders
-            ]
-        }
+        return await cpu_executor.run("purchase-orders/auto-generate", _auto_generate_purchase_orders)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Auto-generation error: {str(e)}")
 
 @app.get("/inventory/suppliers")
-async def get_suppliers():
-    """Get all suppliers"""
+async def get_suppliers(request: Request, limit: Optional[int] = None, cursor: Optional[str] = None,
+                        fields: Optional[str] = None):
+    """Get all suppliers (paged with limit/cursor, projected with fields=)"""
     try:
-        suppliers = purchase_order_service.get_suppliers()
-        return [
-            {
-                "id": supplier.id,
-                "name": supplier.name,
-                "email": supplier.email,
-                "phone": supplier.phone,
-                "address": supplier.address,
-                "default_order_quantity": supplier.default_order_quantity,
-                "minimum_order_quantity": supplier.minimum_order_quantity,
-                "lead_time_days": supplier.lead_time_days
-            }
-            for supplier in suppliers
-        ]
+        return list_response(request, "suppliers", purchase_order_service.suppliers_version,
+                             purchase_order_service.get_suppliers, Supplier, None, (), limit, cursor, fields)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Suppliers retrieval error: {str(e)}")
 
@@ -934,42 +1207,47 @@ class RFIDTag(BaseModel):
 
 # In-memory RFID storage (in production, use a database)
 rfid_tags: Dict[str, RFIDTag] = {}
+rfid_tags_version = 0  # bumped whenever tags are assigned (list ETags)
+# The RFID handlers run on the "rfid" pool and the tag list is read on the
+# event loop: every access to rfid_tags and rfid_tags_version holds this lock
+rfid_lock = threading.Lock()
+
+def rfid_tag_snapshot() -> List[RFIDTag]:
+    with rfid_lock:
+        return list(rfid_tags.values())
 
 @app.get("/rfid/tags")
-async def get_rfid_tags():
-    """Get all RFID tags"""
+async def get_rfid_tags(request: Request, limit: Optional[int] = None, cursor: Optional[str] = None,
+                        fields: Optional[str] = None):
+    """Get all RFID tags (paged with limit/cursor, projected with fields=)"""
     try:
-        return list(rfid_tags.values())
+        return list_response(request, "rfid-tags", rfid_tags_version, rfid_tag_snapshot,
+                             RFIDTag, None, (), limit, cursor, fields)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"RFID tags retrieval error: {str(e)}")
 
-@app.post("/rfid/assign")
-async def assign_rfid_tags():
-    """Assign RFID tags to medical supplies"""
-    try:
-        import uuid
-        import hashlib
-        from datetime import datetime
-        
-        # Get medical supplies
-        supplies = alerts_service.get_medical_supplies()
-        
+def _assign_rfid_tags():
+    global rfid_tags_version
+    import uuid
+    import hashlib
+    from datetime import datetime
+
+    # Get medical supplies
+    supplies = alerts_service.get_medical_supplies()
+
+    # Checking for existing tags and storing new ones is one step, so two
+    # concurrent assignments cannot both tag the same supply
+    with rfid_lock:
         assigned_count = 0
         failed_count = 0
         assigned_tags = []
-        
+
         # Check if all supplies already have RFID tags
-        supplies_without_rfid = []
-        for supply in supplies:
-            existing_tag = None
-            for tag in rfid_tags.values():
-                if tag.item_id == supply.id:
-                    existing_tag = tag
-                    break
-            
-            if not existing_tag:
-                supplies_without_rfid.append(supply)
-        
+        tagged_items = {tag.item_id for tag in rfid_tags.values()}
+        supplies_without_rfid = [supply for supply in supplies if supply.id not in tagged_items]
+
         # If all supplies have RFID tags, create additional tags for demonstration
         if not supplies_without_rfid:
             # Create additional RFID tags for demonstration
@@ -979,10 +1257,10 @@ async def assign_rfid_tags():
                     timestamp = datetime.now().strftime("%Y%m%dT%H%M%SZ")
                     uuid_short = str(uuid.uuid4())[:8]
                     tag_id = f"RFID-{supply.id}-{timestamp}-{uuid_short}"
-                    
+
                     # Generate checksum
                     checksum = hashlib.md5(tag_id.encode()).hexdigest()[:8]
-                    
+
                     # Create RFID tag
                     rfid_tag = RFIDTag(
                         tag_id=tag_id,
@@ -992,7 +1270,7 @@ async def assign_rfid_tags():
                         checksum=checksum,
                         status="active"
                     )
-                    
+
                     # Store the tag
                     rfid_tags[tag_id] = rfid_tag
                     assigned_count += 1
@@ -1000,7 +1278,7 @@ async def assign_rfid_tags():
                         "item_name": supply.name,
                         "tag_id": tag_id
                     })
-                    
+
                 except Exception as e:
                     failed_count += 1
                     print(f"Failed to assign RFID tag to {supply.name}: {e}")
@@ -1012,10 +1290,10 @@ async def assign_rfid_tags():
                     timestamp = datetime.now().strftime("%Y%m%dT%H%M%SZ")
                     uuid_short = str(uuid.uuid4())[:8]
                     tag_id = f"RFID-{supply.id}-{timestamp}-{uuid_short}"
-                    
+
                     # Generate checksum
                     checksum = hashlib.md5(tag_id.encode()).hexdigest()[:8]
-                    
+
                     # Create RFID tag
                     rfid_tag = RFIDTag(
                         tag_id=tag_id,
@@ -1025,7 +1303,7 @@ async def assign_rfid_tags():
                         checksum=checksum,
                         status="active"
                     )
-                    
+
                     # Store the tag
                     rfid_tags[tag_id] = rfid_tag
                     assigned_count += 1
@@ -1033,86 +1311,108 @@ async def assign_rfid_tags():
                         "item_name": supply.name,
                         "tag_id": tag_id
                     })
-                    
+
                 except Exception as e:
                     failed_count += 1
                     print(f"Failed to assign RFID tag to {supply.name}: {e}")
-        
-        return {
-            "status": "success",
-            "message": "RFID assignment completed",
-            "assigned": assigned_count,
-            "failed": failed_count,
-            "total_supplies": len(supplies),
-            "supplies_without_rfid": len(supplies_without_rfid),
-            "assigned_tags": assigned_tags
-        }
-        
+
+        if assigned_count:
+            rfid_tags_version += 1
+
+    return {
+        "status": "success",
+        "message": "RFID assignment completed",
+        "assigned": assigned_count,
+        "failed": failed_count,
+        "total_supplies": len(supplies),
+        "supplies_without_rfid": len(supplies_without_rfid),
+        "assigned_tags": assigned_tags
+    }
+
+@app.post("/rfid/assign")
+async def assign_rfid_tags():
+    """Assign RFID tags to medical supplies"""
+    try:
+        return await cpu_executor.run("rfid", _assign_rfid_tags)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"RFID assignment error: {str(e)}")
 
+def _rfid_statistics():
+    supplies = alerts_service.get_medical_supplies()
+    tags = rfid_tag_snapshot()
+    total_supplies = len(supplies)
+    supplies_with_rfid = len([s for s in supplies if any(tag.item_id == s.id for tag in tags)])
+    supplies_without_rfid = total_supplies - supplies_with_rfid
+    rfid_coverage = (supplies_with_rfid / total_supplies * 100) if total_supplies > 0 else 0
+
+    active_tags = len([tag for tag in tags if tag.status == "active"])
+    inactive_tags = len([tag for tag in tags if tag.status != "active"])
+
+    return {
+        "total_supplies": total_supplies,
+        "supplies_with_rfid": supplies_with_rfid,
+        "supplies_without_rfid": supplies_without_rfid,
+        "rfid_coverage_percentage": rfid_coverage,
+        "total_rfid_tags": len(tags),
+        "active_rfid_tags": active_tags,
+        "inactive_rfid_tags": inactive_tags
+    }
+
 @app.get("/rfid/statistics")
 async def get_rfid_statistics():
     """Get RFID statistics"""
     try:
-        supplies = alerts_service.get_medical_supplies()
-        total_supplies = len(supplies)
-        supplies_with_rfid = len([s for s in supplies if any(tag.item_id == s.id for tag in rfid_tags.values())])
-        supplies_without_rfid = total_supplies - supplies_with_rfid
-        rfid_coverage = (supplies_with_rfid / total_supplies * 100) if total_supplies > 0 else 0
-        
-        active_tags = len([tag for tag in rfid_tags.values() if tag.status == "active"])
-        inactive_tags = len([tag for tag in rfid_tags.values() if tag.status != "active"])
-        
-        return {
-            "total_supplies": total_supplies,
-            "supplies_with_rfid": supplies_with_rfid,
-            "supplies_without_rfid": supplies_without_rfid,
-            "rfid_coverage_percentage": rfid_coverage,
-            "total_rfid_tags": len(rfid_tags),
-            "active_rfid_tags": active_tags,
-            "inactive_rfid_tags": inactive_tags
-        }
+        return await cpu_executor.run("rfid", _rfid_statistics)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"RFID statistics error: {str(e)}")
 
-@app.post("/rfid/validate")
-async def validate_rfid_tags():
-    """Validate existing RFID tags for integrity"""
-    try:
-        total_tags = len(rfid_tags)
-        valid_tags = 0
-        invalid_tags = 0
-        errors = []
-        
-        for tag in rfid_tags.values():
-            try:
-                # Validate checksum
-                import hashlib
-                expected_checksum = hashlib.md5(tag.tag_id.encode()).hexdigest()[:8]
-                
-                if tag.checksum == expected_checksum:
-                    valid_tags += 1
-                else:
-                    invalid_tags += 1
-                    errors.append({
-                        "tag_id": tag.tag_id,
-                        "error": "Invalid checksum"
-                    })
-                    
-            except Exception as e:
+def _validate_rfid_tags():
+    tags = rfid_tag_snapshot()
+    total_tags = len(tags)
+    valid_tags = 0
+    invalid_tags = 0
+    errors = []
+
+    for tag in tags:
+        try:
+            # Validate checksum
+            import hashlib
+            expected_checksum = hashlib.md5(tag.tag_id.encode()).hexdigest()[:8]
+
+            if tag.checksum == expected_checksum:
+                valid_tags += 1
+            else:
                 invalid_tags += 1
                 errors.append({
                     "tag_id": tag.tag_id,
-                    "error": str(e)
+                    "error": "Invalid checksum"
                 })
-        
-        return {
-            "total_tags": total_tags,
-            "valid_tags": valid_tags,
-            "invalid_tags": invalid_tags,
-            "errors": errors
-        }
+
+        except Exception as e:
+            invalid_tags += 1
+            errors.append({
+                "tag_id": tag.tag_id,
+                "error": str(e)
+            })
+
+    return {
+        "total_tags": total_tags,
+        "valid_tags": valid_tags,
+        "invalid_tags": invalid_tags,
+        "errors": errors
+    }
+
+@app.post("/rfid/validate")
+async def validate_rfid_tags():
+    """Validate existing RFID tags for integrity"""
+    try:
+        return await cpu_executor.run("rfid", _validate_rfid_tags)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"RFID validation error: {str(e)}")
 
@@ -6,6 +6,7 @@ Medicine Recommendation System
 - Integration with Infinite Memory system
 """
 
+import os
 import json
 import random
 from datetime import datetime, timedelta
@@ -13,6 +14,41 @@ from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+from services.symptom_scanner import SymptomScanner
+from services.spelling_correction import DEFAULT_KNOWN_WORDS_PATH, load_words
+from services.recommendation_rules import RecommendationRule, RuleMatrix, load_rules, DEFAULT_RULES_PATH
+from services.medicine_catalog import CatalogView, load_catalog
+from services.recommendation_cache import RecommendationCache, symptom_fingerprint
+from services.restocking_requests import RestockingRequestTable
+from services.inventory_engine import InventoryChange, StockItem, inventory
+from services.stock_ledger import ledger
+from services.substitution_graph import SubstitutionGraph
+
+# Inventory kind of catalog medicines in the shared inventory engine
+MEDICINE_KIND = "medicine"
+
+# Formulary: .csv/.parquet file (a fresh "<file>.snapshot" beside it is memory-mapped) or a snapshot directory
+CATALOG_PATH = os.environ.get("MEDICINE_CATALOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                    "catalog", "medicines.csv"))
+
+# Misspelled symptoms ("hedache") are matched within this many edits (0: exact matching only);
+# words in the known-words list are never corrected
+SYMPTOM_TYPO_DISTANCE = int(os.environ.get("SYMPTOM_TYPO_DISTANCE", "2"))
+KNOWN_WORDS_PATH = os.environ.get("SYMPTOM_KNOWN_WORDS_PATH", DEFAULT_KNOWN_WORDS_PATH)
+
+# Recommendation rule table (see catalog/recommendation_rules.json)
+RULES_PATH = os.environ.get("MEDICINE_RULES_PATH", DEFAULT_RULES_PATH)
+MAX_RECOMMENDATIONS = 5
+# In-stock alternatives shown per recommendation (substitution graph)
+MAX_ALTERNATIVES = 3
+
+# Formatted recommendations per detected-symptom combination
+RECOMMENDATION_CACHE_SIZE = int(os.environ.get("RECOMMENDATION_CACHE_SIZE", "1024"))
+RECOMMENDATION_CACHE_TTL = float(os.environ.get("RECOMMENDATION_CACHE_TTL", "300"))
+
+# Closed restocking requests kept for /medicine/restocking-requests?include_history=true
+RESTOCKING_HISTORY_LIMIT = int(os.environ.get("RESTOCKING_HISTORY_LIMIT", "1000"))
+
 class MedicineCategory(Enum):
     PAIN_RELIEF = "pain_relief"
     ANTI_DEPRESSANT = "anti_depressant"
@@ -60,147 +96,74 @@ class RestockingRequest:
     reason: str
     created_at: datetime
     status: str = "pending"
+    trigger_count: int = 1                      # low-stock triggers merged into this request
+    last_triggered_at: Optional[datetime] = None
+    closed_at: Optional[datetime] = None
+
+# Merged triggers keep the most urgent level seen
+URGENCY_RANK = {"medium": 1, "high": 2}
 
 class MedicineRecommendationEngine:
     def __init__(self):
-        self.medicines = self._initialize_medicines()
-        self.restocking_requests = []
+        self.catalog = load_catalog(CATALOG_PATH)
+        unknown = set(self.catalog.categories) - {category.value for category in MedicineCategory}
+        if unknown:
+            raise ValueError(f"Unknown medicine categories in {CATALOG_PATH}: {', '.join(sorted(unknown))}")
+        self.restocking_requests = RestockingRequestTable(RESTOCKING_HISTORY_LIMIT)
         self.symptom_keywords = self._initialize_symptom_keywords()
+        self.symptom_scanner = SymptomScanner(self.symptom_keywords, SYMPTOM_TYPO_DISTANCE,
+                                              load_words(KNOWN_WORDS_PATH) if SYMPTOM_TYPO_DISTANCE else ())
+        rules = load_rules(RULES_PATH)
+        self.rule_matrix = RuleMatrix(rules, list(self.symptom_keywords), self.catalog)
+        self.substitutes = self._build_substitution_graph(rules)
+        self.recommendation_cache = RecommendationCache(RECOMMENDATION_CACHE_SIZE, RECOMMENDATION_CACHE_TTL)
+        self.version = 0  # bumped whenever the catalog changes (list ETags)
         
-    def _initialize_medicines(self) -> Dict[str, Medicine]:
-        """Initialize the medicine database"""
-        medicines_data = {
-            # Pain Relief
-            "paracetamol": Medicine(
-                id="paracetamol",
-                name="Paracetamol",
-                category=MedicineCategory.PAIN_RELIEF,
-                description="Pain reliever and fever reducer",
-                dosage="500-1000mg every 4-6 hours",
-                side_effects=["Nausea", "Liver problems in high doses"],
-                contraindications=["Liver disease", "Alcohol abuse"],
-                price=5.99,
-                stock_quantity=150,
-                min_stock_level=50,
-                prescription_required=False,
-                symptoms_treated=["headache", "fever", "pain", "body aches"],
-                conditions_treated=["migraine", "arthritis", "fever"]
-            ),
-            "ibuprofen": Medicine(
-                id="ibuprofen",
-                name="Ibuprofen",
-                category=MedicineCategory.PAIN_RELIEF,
-                description="Anti-inflammatory pain reliever",
-                dosage="200-400mg every 4-6 hours",
-                side_effects=["Stomach upset", "Increased bleeding risk"],
-                contraindications=["Stomach ulcers", "Kidney problems"],
-                price=7.99,
-                stock_quantity=120,
-                min_stock_level=40,
-                prescription_required=False,
-                symptoms_treated=["pain", "inflammation", "swelling", "fever"],
-                conditions_treated=["arthritis", "sprains", "dental pain"]
-            ),
-            
-            # Mental Health
-            "sertraline": Medicine(
-                id="sertraline",
-                name="Sertraline",
-                category=MedicineCategory.ANTI_DEPRESSANT,
-                description="Selective serotonin reuptake inhibitor for depression",
-                dosage="50-200mg daily",
-                side_effects=["Nausea", "Insomnia", "Sexual dysfunction"],
-                contraindications=["Bipolar disorder", "Pregnancy"],
-                price=45.99,
-                stock_quantity=30,
-                min_stock_level=20,
-                prescription_required=True,
-                symptoms_treated=["depression", "anxiety", "panic attacks", "obsessive thoughts"],
-                conditions_treated=["major depressive disorder", "panic disorder", "ocd"]
-            ),
-            "alprazolam": Medicine(
-                id="alprazolam",
-                name="Alprazolam",
-                category=MedicineCategory.ANTI_ANXIETY,
-                description="Benzodiazepine for anxiety and panic disorders",
-                dosage="0.25-2mg three times daily",
-                side_effects=["Drowsiness", "Dependency", "Memory problems"],
-                contraindications=["Respiratory depression", "Pregnancy"],
-                price=38.99,
-                stock_quantity=25,
-                min_stock_level=15,
-                prescription_required=True,
-                symptoms_treated=["anxiety", "panic", "insomnia", "muscle tension"],
-                conditions_treated=["generalized anxiety disorder", "panic disorder"]
-            ),
-            
-            # Sleep Aids
-            "melatonin": Medicine(
-                id="melatonin",
-                name="Melatonin",
-                category=MedicineCategory.SLEEP_AID,
-                description="Natural sleep hormone supplement",
-                dosage="1-5mg 30 minutes before bedtime",
-                side_effects=["Drowsiness", "Vivid dreams"],
-                contraindications=["Autoimmune disorders"],
-                price=12.99,
-                stock_quantity=80,
-                min_stock_level=30,
-                prescription_required=False,
-                symptoms_treated=["insomnia", "jet lag", "sleep problems"],
-                conditions_treated=["sleep disorders", "circadian rhythm disorders"]
-            ),
-            
-            # Vitamins and Supplements
-            "vitamin_d": Medicine(
-                id="vitamin_d",
-                name="Vitamin D3",
-                category=MedicineCategory.VITAMIN,
-                description="Essential vitamin for bone health and immunity",
-                dosage="1000-4000 IU daily",
-                side_effects=["Nausea in high doses"],
-                contraindications=["Hypercalcemia"],
-                price=15.99,
-                stock_quantity=200,
-                min_stock_level=50,
-                prescription_required=False,
-                symptoms_treated=["fatigue", "bone pain", "weakness"],
-                conditions_treated=["vitamin d deficiency", "osteoporosis"]
-            ),
-            "omega_3": Medicine(
-                id="omega_3",
-                name="Omega-3 Fatty Acids",
-                category=MedicineCategory.SUPPLEMENT,
-                description="Essential fatty acids for heart and brain health",
-                dosage="1000-2000mg daily",
-                side_effects=["Fishy burps", "Stomach upset"],
-                contraindications=["Bleeding disorders"],
-                price=22.99,
-                stock_quantity=90,
-                min_stock_level=30,
-                prescription_required=False,
-                symptoms_treated=["inflammation", "joint pain", "brain fog"],
-                conditions_treated=["heart disease", "arthritis", "depression"]
-            ),
-            
-            # Anti-inflammatory
-            "naproxen": Medicine(
-                id="naproxen",
-                name="Naproxen",
-                category=MedicineCategory.ANTI_INFLAMMATORY,
-                description="Non-steroidal anti-inflammatory drug",
-                dosage="250-500mg twice daily",
-                side_effects=["Stomach upset", "Increased bleeding risk"],
-                contraindications=["Stomach ulcers", "Kidney problems"],
-                price=9.99,
-                stock_quantity=60,
-                min_stock_level=25,
-                prescription_required=False,
-                symptoms_treated=["pain", "inflammation", "swelling", "fever"],
-                conditions_treated=["arthritis", "menstrual cramps", "gout"]
-            )
+        # Live stock levels live in the shared inventory engine, seeded from the catalog
+        self.inventory = inventory
+        self.inventory.add_many((
+            StockItem(medicine_id, name, stock_quantity, min_stock_level)
+            for medicine_id, name, stock_quantity, min_stock_level in zip(
+                self.catalog.ids(), self.catalog.values("name"),
+                self.catalog.values("stock_quantity"), self.catalog.values("min_stock_level"))
+        ), MEDICINE_KIND)
+        for item in self.inventory.items(MEDICINE_KIND):
+            self.substitutes.set_in_stock(item.id, item.current_stock > 0)
+        self.inventory.subscribe(self._on_inventory_change)
+    
+    def _build_substitution_graph(self, rules: List[RecommendationRule]) -> SubstitutionGraph:
+        """Substitutes by category and indication overlap; the rules' curated alternatives come first"""
+        ids = self.catalog.ids()
+        indications = {
+            medicine_id: symptoms + conditions
+            for medicine_id, symptoms, conditions in zip(
+                ids, self.catalog.values("symptoms_treated"), self.catalog.values("conditions_treated"))
         }
-        return medicines_data
+        curated: Dict[str, List[str]] = {}
+        for rule in rules:
+            curated.setdefault(rule.medicine_id, []).extend(rule.alternatives)
+        return SubstitutionGraph(indications, dict(zip(ids, self.catalog.values("category"))), curated)
+        
+    def _medicine(self, row: int) -> Medicine:
+        """Materialize one catalog row (a detached copy; write stock through update_stock)"""
+        record = self.catalog.record(row)
+        record["category"] = MedicineCategory(record["category"])
+        item = self.inventory.get(record["id"])
+        record["stock_quantity"] = item.current_stock
+        record["min_stock_level"] = item.threshold_quantity
+        return Medicine(**record)
+    
+    def _on_inventory_change(self, change: InventoryChange):
+        """Change feed subscriber: react to medicine stock changes, whoever made them"""
+        if change.kind != MEDICINE_KIND or change.op == "added":
+            return
+        self.version += 1
+        item = self.inventory.get(change.item_id)
+        self.substitutes.set_in_stock(change.item_id, item.current_stock > 0)
+        # Cached responses show this medicine's stock, or offer it as an alternative
+        self.recommendation_cache.invalidate_medicine(change.item_id)
+        if item.current_stock > item.threshold_quantity:
+            self.restocking_requests.close(change.item_id, "fulfilled")
     
     def _initialize_symptom_keywords(self) -> Dict[str, List[str]]:
         """Initialize symptom keywords for medicine matching"""
@@ -234,319 +197,227 @@ class MedicineRecommendationEngine:
     
     def analyze_symptoms(self, text: str) -> Dict[str, float]:
         """Analyze text for symptoms and return confidence scores"""
-        text_lower = text.lower()
-        symptom_scores = {}
-        
-        for symptom, keywords in self.symptom_keywords.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in text_lower:
-                    score += 1
-            if score > 0:
-                symptom_scores[symptom] = min(1.0, score / len(keywords))
+        return self.analyze_symptoms_many([text])[0]
+    
+    def analyze_symptoms_many(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Symptom scores for many texts, extracted in one pass of the compiled automaton"""
+        sizes = self.symptom_scanner.group_sizes
         
-        return symptom_scores
+        # Hits respect word boundaries, typos are corrected first
+        return [
+            {symptom: min(1.0, score / sizes[symptom]) for symptom, score in counts.items()}
+            for counts in self.symptom_scanner.count_groups_many(texts)
+        ]
     
-    def recommend_medicines(self, symptoms: Dict[str, float], patient_history: List[Dict] = None) -> List[MedicineRecommendation]:
+    def recommend_medicines(self, symptoms: Dict[str, float], patient_history: List[Dict] = None,
+                            top_k: int = MAX_RECOMMENDATIONS) -> List[MedicineRecommendation]:
         """Recommend medicines based on symptoms and patient history"""
-        recommendations = []
-        
-        # Check for mental health concerns (high priority)
-        if symptoms.get("depression", 0) > 0.05 or symptoms.get("anxiety", 0) > 0.05:
-            if symptoms.get("depression", 0) > symptoms.get("anxiety", 0):
-                medicine = self.medicines["sertraline"]
-                recommendations.append(MedicineRecommendation(
-                    medicine=medicine,
-                    confidence_score=min(0.9, symptoms["depression"] * 3),  # Boost confidence
-                    reasoning="Depression symptoms detected. Sertraline is an effective SSRI for treating depression.",
-                    dosage_instructions="Start with 50mg daily, may increase to 100-200mg based on response",
-                    warnings=["Requires prescription", "May take 2-4 weeks to see full effect", "Monitor for suicidal thoughts"],
-                    alternative_medicines=[self.medicines["alprazolam"]]
-                ))
-            else:
-                medicine = self.medicines["alprazolam"]
-                recommendations.append(MedicineRecommendation(
-                    medicine=medicine,
-                    confidence_score=min(0.9, symptoms["anxiety"] * 3),  # Boost confidence
-                    reasoning="Anxiety symptoms detected. Alprazolam provides rapid relief for anxiety and panic.",
-                    dosage_instructions="0.25-0.5mg three times daily as needed",
-                    warnings=["Requires prescription", "Risk of dependency", "May cause drowsiness"],
-                    alternative_medicines=[self.medicines["sertraline"]]
-                ))
-        
-        # Check for sleep problems
-        if symptoms.get("insomnia", 0) > 0.1:
-            medicine = self.medicines["melatonin"]
-            recommendations.append(MedicineRecommendation(
-                medicine=medicine,
-                confidence_score=min(0.8, symptoms["insomnia"] * 3),  # Boost confidence
-                reasoning="Sleep problems detected. Melatonin is a natural sleep aid.",
-                dosage_instructions="1-3mg 30 minutes before bedtime",
-                warnings=["May cause drowsiness", "Avoid driving after taking"],
-                alternative_medicines=[]
-            ))
-        
-        # Check for pain
-        if symptoms.get("pain", 0) > 0.1 or symptoms.get("headache", 0) > 0.1:
-            if symptoms.get("inflammation", 0) > 0.1:
-                medicine = self.medicines["ibuprofen"]
-                recommendations.append(MedicineRecommendation(
-                    medicine=medicine,
-                    confidence_score=min(0.85, max(symptoms.get("pain", 0), symptoms.get("headache", 0)) * 3),
-                    reasoning="Pain with inflammation detected. Ibuprofen provides both pain relief and anti-inflammatory effects.",
-                    dosage_instructions="200-400mg every 4-6 hours with food",
-                    warnings=["May cause stomach upset", "Avoid if you have ulcers"],
-                    alternative_medicines=[self.medicines["paracetamol"], self.medicines["naproxen"]]
-                ))
-            else:
-                medicine = self.medicines["paracetamol"]
-                recommendations.append(MedicineRecommendation(
-                    medicine=medicine,
-                    confidence_score=min(0.8, max(symptoms.get("pain", 0), symptoms.get("headache", 0)) * 3),
-                    reasoning="Pain symptoms detected. Paracetamol is effective for pain and fever.",
-                    dosage_instructions="500-1000mg every 4-6 hours",
-                    warnings=["Avoid alcohol", "Don't exceed 4000mg daily"],
-                    alternative_medicines=[self.medicines["ibuprofen"]]
-                ))
-        
-        # Check for fatigue and general health
-        if symptoms.get("fatigue", 0) > 0.1:
-            medicine = self.medicines["vitamin_d"]
-            recommendations.append(MedicineRecommendation(
-                medicine=medicine,
-                confidence_score=min(0.7, symptoms["fatigue"] * 3),  # Boost confidence
-                reasoning="Fatigue detected. Vitamin D deficiency is common and can cause fatigue.",
-                dosage_instructions="1000-2000 IU daily with food",
-                warnings=["Take with food for better absorption"],
-                alternative_medicines=[self.medicines["omega_3"]]
-            ))
-        
-        # Check for inflammation
-        if symptoms.get("inflammation", 0) > 0.1:
-            medicine = self.medicines["naproxen"]
-            recommendations.append(MedicineRecommendation(
-                medicine=medicine,
-                confidence_score=min(0.8, symptoms["inflammation"] * 3),  # Boost confidence
-                reasoning="Inflammation detected. Naproxen is effective for inflammatory conditions.",
-                dosage_instructions="250-500mg twice daily with food",
-                warnings=["May cause stomach upset", "Avoid if you have ulcers"],
-                alternative_medicines=[self.medicines["ibuprofen"]]
-            ))
-        
-        # Check for dizziness and nausea
-        if symptoms.get("dizziness", 0) > 0.1 or symptoms.get("nausea", 0) > 0.1:
-            if symptoms.get("dizziness", 0) > symptoms.get("nausea", 0):
-                medicine = self.medicines["paracetamol"]  # Can help with dizziness from pain
-                recommendations.append(MedicineRecommendation(
-                    medicine=medicine,
-                    confidence_score=min(0.7, symptoms["dizziness"] * 3),
-                    reasoning="Dizziness detected. This could be due to various causes. Paracetamol may help if related to pain or fever.",
-                    dosage_instructions="500-1000mg every 4-6 hours",
-                    warnings=["Avoid alcohol", "Don't exceed 4000mg daily", "Seek medical attention if dizziness persists"],
-                    alternative_medicines=[self.medicines["ibuprofen"]]
-                ))
-            else:
-                # For nausea, recommend rest and hydration, but could suggest anti-nausea if available
-                medicine = self.medicines["paracetamol"]  # Can help with nausea from fever
-                recommendations.append(MedicineRecommendation(
-                    medicine=medicine,
-                    confidence_score=min(0.6, symptoms["nausea"] * 3),
-                    reasoning="Nausea detected. This could be due to various causes. Rest and hydration are important.",
-                    dosage_instructions="500-1000mg every 4-6 hours if fever present",
-                    warnings=["Avoid alcohol", "Don't exceed 4000mg daily", "Seek medical attention if nausea persists"],
-                    alternative_medicines=[self.medicines["ibuprofen"]]
-                ))
-        
-        # Check for cold and flu symptoms
-        if symptoms.get("cold", 0) > 0.1 or symptoms.get("flu", 0) > 0.1:
-            medicine = self.medicines["paracetamol"]
-            recommendations.append(MedicineRecommendation(
-                medicine=medicine,
-                confidence_score=min(0.8, max(symptoms.get("cold", 0), symptoms.get("flu", 0)) * 3),
-                reasoning="Cold or flu symptoms detected. Paracetamol helps with fever and body aches.",
-                dosage_instructions="500-1000mg every 4-6 hours",
-                warnings=["Avoid alcohol", "Don't exceed 4000mg daily", "Rest and stay hydrated"],
-                alternative_medicines=[self.medicines["ibuprofen"]]
-            ))
-        
-        # Check for cough
-        if symptoms.get("cough", 0) > 0.1:
-            medicine = self.medicines["paracetamol"]
-            recommendations.append(MedicineRecommendation(
-                medicine=medicine,
-                confidence_score=min(0.7, symptoms["cough"] * 3),
-                reasoning="Cough detected. Paracetamol can help with fever and pain associated with cough.",
-                dosage_instructions="500-1000mg every 4-6 hours",
-                warnings=["Avoid alcohol", "Don't exceed 4000mg daily", "Consider honey for cough relief"],
-                alternative_medicines=[self.medicines["ibuprofen"]]
-            ))
-        
-        # Check for digestive issues
-        if symptoms.get("digestive", 0) > 0.1:
-            medicine = self.medicines["vitamin_d"]
-            recommendations.append(MedicineRecommendation(
-                medicine=medicine,
-                confidence_score=min(0.6, symptoms["digestive"] * 3),
-                reasoning="Digestive issues detected. Vitamin D can help with overall health and immune function.",
-                dosage_instructions="1000-2000 IU daily with food",
-                warnings=["Take with food for better absorption"],
-                alternative_medicines=[self.medicines["omega_3"]]
-            ))
-        
-        # Check for skin problems
-        if symptoms.get("skin_problems", 0) > 0.1:
-            medicine = self.medicines["omega_3"]
-            recommendations.append(MedicineRecommendation(
-                medicine=medicine,
-                confidence_score=min(0.6, symptoms["skin_problems"] * 3),
-                reasoning="Skin problems detected. Omega-3 fatty acids can help with skin health and inflammation.",
-                dosage_instructions="1000-2000mg daily",
-                warnings=["May cause fishy burps", "Take with food"],
-                alternative_medicines=[self.medicines["vitamin_d"]]
-            ))
-        
-        # Check for muscle pain
-        if symptoms.get("muscle_pain", 0) > 0.1:
-            medicine = self.medicines["ibuprofen"]
-            recommendations.append(MedicineRecommendation(
-                medicine=medicine,
-                confidence_score=min(0.8, symptoms["muscle_pain"] * 3),
-                reasoning="Muscle pain detected. Ibuprofen is effective for muscle pain and inflammation.",
-                dosage_instructions="200-400mg every 4-6 hours with food",
-                warnings=["May cause stomach upset", "Avoid if you have ulcers"],
-                alternative_medicines=[self.medicines["paracetamol"], self.medicines["naproxen"]]
-            ))
-        
-        # Check for back pain
-        if symptoms.get("back_pain", 0) > 0.1:
-            medicine = self.medicines["naproxen"]
-            recommendations.append(MedicineRecommendation(
-                medicine=medicine,
-                confidence_score=min(0.8, symptoms["back_pain"] * 3),
-                reasoning="Back pain detected. Naproxen is effective for back pain and inflammation.",
-                dosage_instructions="250-500mg twice daily with food",
-                warnings=["May cause stomach upset", "Avoid if you have ulcers"],
-                alternative_medicines=[self.medicines["ibuprofen"]]
-            ))
-        
-        # If no specific symptoms detected, recommend general pain relief for any pain-related symptoms
-        if not recommendations and (symptoms.get("pain", 0) > 0.05 or symptoms.get("headache", 0) > 0.05):
-            medicine = self.medicines["paracetamol"]
-            recommendations.append(MedicineRecommendation(
-                medicine=medicine,
-                confidence_score=0.6,
-                reasoning="General pain symptoms detected. Paracetamol is a safe and effective pain reliever.",
-                dosage_instructions="500-1000mg every 4-6 hours",
-                warnings=["Avoid alcohol", "Don't exceed 4000mg daily"],
-                alternative_medicines=[self.medicines["ibuprofen"]]
-            ))
-        
-        # If still no recommendations, suggest vitamin D for general health
-        if not recommendations:
-            medicine = self.medicines["vitamin_d"]
-            recommendations.append(MedicineRecommendation(
-                medicine=medicine,
-                confidence_score=0.5,
-                reasoning="General health support. Vitamin D is important for overall health and immune function.",
-                dosage_instructions="1000-2000 IU daily with food",
-                warnings=["Take with food for better absorption"],
-                alternative_medicines=[self.medicines["omega_3"]]
-            ))
-        
-        return recommendations
+        return [self._to_recommendation(rule, confidence) for rule, confidence in self.rule_matrix.score(symptoms, top_k)]
+    
+    def recommend_medicines_many(self, symptom_sets: List[Dict[str, float]],
+                                 top_k: int = MAX_RECOMMENDATIONS) -> List[List[MedicineRecommendation]]:
+        """Recommendations for many patients, scored together in one matrix product"""
+        return [
+            [self._to_recommendation(rule, confidence) for rule, confidence in ranked]
+            for ranked in self.rule_matrix.score_many(symptom_sets, top_k)
+        ]
+    
+    def _to_recommendation(self, rule: RecommendationRule, confidence: float) -> MedicineRecommendation:
+        return MedicineRecommendation(
+            medicine=self.get_medicine_info(rule.medicine_id),
+            confidence_score=confidence,
+            reasoning=rule.reasoning,
+            dosage_instructions=rule.dosage_instructions,
+            warnings=list(rule.warnings),
+            alternative_medicines=[self.get_medicine_info(m)
+                                   for m in self.substitutes.alternatives(rule.medicine_id, MAX_ALTERNATIVES)]
+        )
     
     def check_stock_and_create_restocking_request(self, medicine_id: str) -> Optional[RestockingRequest]:
-        """Check if medicine is low in stock and create restocking request"""
-        medicine = self.medicines.get(medicine_id)
-        if not medicine:
+        """Check if medicine is low in stock and open (or merge into) its restocking request"""
+        if self.inventory.kind_of(medicine_id) != MEDICINE_KIND:
             return None
         
-        if medicine.stock_quantity <= medicine.min_stock_level:
+        item = self.inventory.get(medicine_id)
+        stock_quantity, min_stock_level = item.current_stock, item.threshold_quantity
+        if stock_quantity > min_stock_level:
+            return None
+        
+        now = datetime.now()
+        urgency_level = "high" if stock_quantity == 0 else "medium"
+        reason = f"Stock level ({stock_quantity}) below minimum ({min_stock_level})"
+        with self.restocking_requests.lock:
+            request = self.restocking_requests.open_request(medicine_id)
+            if request is not None:
+                # Repeat trigger: one open request per medicine, refreshed in place
+                request.trigger_count += 1
+                request.last_triggered_at = now
+                request.current_stock = stock_quantity
+                request.requested_quantity = max(request.requested_quantity, min_stock_level * 3)
+                if URGENCY_RANK[urgency_level] > URGENCY_RANK.get(request.urgency_level, 0):
+                    request.urgency_level = urgency_level
+                request.reason = reason
+                self.restocking_requests.record_merge()
+                return request
+            
             request = RestockingRequest(
-                request_id=f"restock_{medicine_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                request_id=f"restock_{medicine_id}_{now.strftime('%Y%m%d_%H%M%S')}_{self.restocking_requests.next_number()}",
                 medicine_id=medicine_id,
-                medicine_name=medicine.name,
-                current_stock=medicine.stock_quantity,
-                requested_quantity=medicine.min_stock_level * 3,  # Request 3x minimum stock
-                urgency_level="high" if medicine.stock_quantity == 0 else "medium",
-                reason=f"Stock level ({medicine.stock_quantity}) below minimum ({medicine.min_stock_level})",
-                created_at=datetime.now()
+                medicine_name=item.name,
+                current_stock=stock_quantity,
+                requested_quantity=min_stock_level * 3,  # Request 3x minimum stock
+                urgency_level=urgency_level,
+                reason=reason,
+                created_at=now,
+                last_triggered_at=now
             )
-            self.restocking_requests.append(request)
-            return request
-        return None
+            return self.restocking_requests.add(request)
     
     def get_medicine_info(self, medicine_id: str) -> Optional[Medicine]:
         """Get medicine information by ID"""
-        return self.medicines.get(medicine_id)
+        row = self.catalog.row_of(medicine_id)
+        return self._medicine(row) if row is not None else None
+    
+    def get_all_medicines(self) -> CatalogView:
+        """Get all medicines (catalog order; rows are materialized when read, so slicing a page is cheap)"""
+        return self.catalog.view(self._medicine)
     
-    def get_all_medicines(self) -> List[Medicine]:
-        """Get all medicines"""
-        return list(self.medicines.values())
+    def find_medicines_treating(self, term: str) -> List[Medicine]:
+        """Medicines listing a symptom or condition (inverted index lookup)"""
+        return [self._medicine(row) for row in self.catalog.rows_treating(term).tolist()]
     
-    def get_restocking_requests(self) -> List[RestockingRequest]:
-        """Get all restocking requests"""
-        return self.restocking_requests
+    def get_restocking_requests(self, include_history: bool = False) -> List[RestockingRequest]:
+        """Get open restocking requests (and the retained closed ones)"""
+        requests = self.restocking_requests.list_open()
+        if include_history:
+            requests = self.restocking_requests.list_history() + requests
+        return requests
     
     def update_stock(self, medicine_id: str, quantity: int):
-        """Update medicine stock quantity"""
-        if medicine_id in self.medicines:
-            self.medicines[medicine_id].stock_quantity = max(0, quantity)
+        """Record a medicine stock count (dispensing and deliveries go through the stock ledger)"""
+        if self.inventory.kind_of(medicine_id) == MEDICINE_KIND:
+            # Version, cache and restocking follow through the change feed
+            ledger.count(medicine_id, max(0, quantity))
+    
+    def _format_recommendation(self, rec: MedicineRecommendation) -> Dict:
+        """Format a recommendation for the API response"""
+        return {
+            "medicine_id": rec.medicine.id,
+            "medicine_name": rec.medicine.name,
+            "category": rec.medicine.category.value,
+            "description": rec.medicine.description,
+            "dosage": rec.medicine.dosage,
+            "confidence_score": rec.confidence_score,
+            "reasoning": rec.reasoning,
+            "dosage_instructions": rec.dosage_instructions,
+            "warnings": rec.warnings,
+            "stock_quantity": rec.medicine.stock_quantity,
+            "price": rec.medicine.price,
+            "prescription_required": rec.medicine.prescription_required,
+            "alternative_medicines": [med.name for med in rec.alternative_medicines]
+        }
+    
+    def _format_restocking_request(self, req: RestockingRequest) -> Dict:
+        return {
+            "request_id": req.request_id,
+            "medicine_name": req.medicine_name,
+            "current_stock": req.current_stock,
+            "requested_quantity": req.requested_quantity,
+            "urgency_level": req.urgency_level,
+            "reason": req.reason,
+            "created_at": req.created_at.isoformat(),
+            "status": req.status,
+            "trigger_count": req.trigger_count
+        }
+    
+    def _formatted_recommendations(self, symptom_sets: List[Dict[str, float]]) -> List[Tuple[Dict, ...]]:
+        """
+        Formatted recommendations per symptom set. Identical symptom
+        combinations are scored once; cache misses are scored together.
+        """
+        keys = [symptom_fingerprint(symptoms) for symptoms in symptom_sets]
+        results = {}
+        misses = {}
+        for key, symptoms in zip(keys, symptom_sets):
+            if key in results or key in misses:
+                continue
+            cached = self.recommendation_cache.get(key)
+            if cached is None:
+                misses[key] = symptoms
+            else:
+                results[key] = cached
+        
+        if misses:
+            generation = self.recommendation_cache.generation
+            for key, recommendations in zip(misses, self.recommend_medicines_many(list(misses.values()))):
+                formatted = tuple(self._format_recommendation(rec) for rec in recommendations)
+                self.recommendation_cache.put(key, formatted, self._shown_medicines(formatted), generation)
+                results[key] = formatted
+        return [results[key] for key in keys]
+    
+    def _shown_medicines(self, formatted: Tuple[Dict, ...]) -> List[str]:
+        """Medicines whose stock a formatted response depends on: the recommended ones and their substitutes"""
+        shown = []
+        for rec in formatted:
+            shown.append(rec["medicine_id"])
+            shown.extend(medicine_id for medicine_id, _ in self.substitutes.neighbours(rec["medicine_id"]))
+        return shown
+    
+    def _restock(self, medicine_ids) -> List[RestockingRequest]:
+        """Run the low-stock check once per distinct medicine"""
+        restocking_requests = []
+        for medicine_id in dict.fromkeys(medicine_ids):
+            restock_request = self.check_stock_and_create_restocking_request(medicine_id)
+            if restock_request:
+                restocking_requests.append(restock_request)
+        return restocking_requests
     
     def process_medicine_recommendation(self, text: str, patient_id: str = None) -> Dict:
         """Process text and return medicine recommendations with restocking requests"""
         # Analyze symptoms
         symptoms = self.analyze_symptoms(text)
         
-        # Get recommendations
-        recommendations = self.recommend_medicines(symptoms)
+        # Get recommendations (formatted), reusing the result for the same symptom combination
+        formatted_recommendations = [dict(rec) for rec in self._formatted_recommendations([symptoms])[0]]
         
         # Check stock levels and create restocking requests
-        restocking_requests = []
-        for rec in recommendations:
-            restock_request = self.check_stock_and_create_restocking_request(rec.medicine.id)
-            if restock_request:
-                restocking_requests.append(restock_request)
-        
-        # Format recommendations for API response
-        formatted_recommendations = []
-        for rec in recommendations:
-            formatted_rec = {
-                "medicine_id": rec.medicine.id,
-                "medicine_name": rec.medicine.name,
-                "category": rec.medicine.category.value,
-                "description": rec.medicine.description,
-                "dosage": rec.medicine.dosage,
-                "confidence_score": rec.confidence_score,
-                "reasoning": rec.reasoning,
-                "dosage_instructions": rec.dosage_instructions,
-                "warnings": rec.warnings,
-                "stock_quantity": rec.medicine.stock_quantity,
-                "price": rec.medicine.price,
-                "prescription_required": rec.medicine.prescription_required,
-                "alternative_medicines": [med.name for med in rec.alternative_medicines]
-            }
-            formatted_recommendations.append(formatted_rec)
+        restocking_requests = self._restock(rec["medicine_id"] for rec in formatted_recommendations)
         
         return {
             "symptoms_detected": symptoms,
             "recommendations": formatted_recommendations,
-            "restocking_requests": [
-                {
-                    "request_id": req.request_id,
-                    "medicine_name": req.medicine_name,
-                    "current_stock": req.current_stock,
-                    "requested_quantity": req.requested_quantity,
-                    "urgency_level": req.urgency_level,
-                    "reason": req.reason,
-                    "created_at": req.created_at.isoformat(),
-                    "status": req.status
-                }
-                for req in restocking_requests
-            ],
+            "restocking_requests": [self._format_restocking_request(req) for req in restocking_requests],
             "total_recommendations": len(formatted_recommendations),
             "total_restocking_requests": len(restocking_requests)
         }
+    
+    def process_medicine_recommendations(self, items: List[Tuple[str, str]]) -> Dict:
+        """
+        Triage many (patient_id, text) items: distinct texts are analyzed once
+        in a single scan, all patients are scored together, and restocking
+        checks run once per recommended medicine rather than once per patient.
+        """
+        texts = list(dict.fromkeys(text for _, text in items))
+        symptoms_by_text = dict(zip(texts, self.analyze_symptoms_many(texts)))
+        symptom_sets = [symptoms_by_text[text] for _, text in items]
+        formatted = self._formatted_recommendations(symptom_sets)
+        
+        results = []
+        for (patient_id, _), symptoms, recommendations in zip(items, symptom_sets, formatted):
+            results.append({
+                "user_id": patient_id,
+                "symptoms_detected": symptoms,
+                "recommendations": [dict(rec) for rec in recommendations],
+                "total_recommendations": len(recommendations)
+            })
+        
+        restocking_requests = self._restock(rec["medicine_id"] for recommendations in formatted for rec in recommendations)
+        return {
+            "results": results,
+            "restocking_requests": [self._format_restocking_request(req) for req in restocking_requests],
+            "total_patients": len(results),
+            "total_restocking_requests": len(restocking_requests)
+        }
 
 # Global instance
 medicine_engine = MedicineRecommendationEngine() 
\ No newline at end of file
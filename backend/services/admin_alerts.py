@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Admin Alert Store for the Infinite Memory backend
+- Alerts indexed by ID, with a secondary per-patient index
+- Unacknowledged alerts kept in insertion order
+- Cursor-paginated listings so polling clients only fetch what is new
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+ALERT_ID_PREFIX = "alert_"
+
+
+class AdminAlertStore:
+    """
+    In-memory store of patient alerts raised by the text pipeline.
+
+    Alert IDs are `alert_<n>` with a strictly increasing sequence number, so
+    every index is a sorted list of sequence numbers and an `after` cursor is
+    a binary search. The unacknowledged views shrink as alerts are handled,
+    which keeps the common "what still needs attention" poll small.
+    """
+
+    def __init__(self):
+        self._alerts: Dict[int, Dict[str, Any]] = {}
+        self._sequence: List[int] = []
+        self._by_patient: Dict[str, List[int]] = {}
+        self._unacknowledged: List[int] = []
+        self._unacknowledged_by_patient: Dict[str, List[int]] = {}
+        self._next_seq = 1
+        self.version = 0  # bumped on every add/acknowledge (list ETags)
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def parse_id(alert_id: str) -> Optional[int]:
+        """Sequence number of an alert ID, or None if it is not one of ours"""
+        if not alert_id.startswith(ALERT_ID_PREFIX):
+            return None
+        try:
+            return int(alert_id[len(ALERT_ID_PREFIX):])
+        except ValueError:
+            return None
+
+    def add(self, patient_id: str, alert_type: str, message: str,
+            timestamp: Optional[str] = None) -> Dict[str, Any]:
+        """Record a new unacknowledged alert and return it"""
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            alert = {
+                "alert_id": f"{ALERT_ID_PREFIX}{seq}",
+                "patient_id": patient_id,
+                "type": alert_type,
+                "message": message,
+                "timestamp": timestamp or datetime.now().isoformat(),
+                "acknowledged": False
+            }
+            self._alerts[seq] = alert
+            self._sequence.append(seq)
+            self._by_patient.setdefault(patient_id, []).append(seq)
+            self._unacknowledged.append(seq)
+            self._unacknowledged_by_patient.setdefault(patient_id, []).append(seq)
+            self.version += 1
+            return alert
+
+    def get(self, alert_id: str) -> Optional[Dict[str, Any]]:
+        seq = self.parse_id(alert_id)
+        with self._lock:
+            return self._alerts.get(seq) if seq is not None else None
+
+    def acknowledge(self, alert_id: str) -> Optional[Dict[str, Any]]:
+        """Mark an alert as acknowledged; returns None if the ID is unknown"""
+        seq = self.parse_id(alert_id)
+        with self._lock:
+            alert = self._alerts.get(seq) if seq is not None else None
+            if alert is None:
+                return None
+            if not alert["acknowledged"]:
+                alert["acknowledged"] = True
+                self._discard(self._unacknowledged, seq)
+                patient_pending = self._unacknowledged_by_patient[alert["patient_id"]]
+                self._discard(patient_pending, seq)
+                if not patient_pending:
+                    del self._unacknowledged_by_patient[alert["patient_id"]]
+                self.version += 1
+            return alert
+
+    @staticmethod
+    def _discard(seqs: List[int], seq: int):
+        pos = bisect_left(seqs, seq)
+        if pos < len(seqs) and seqs[pos] == seq:
+            del seqs[pos]
+
+    def list_alerts(self, patient_id: Optional[str] = None, unacknowledged: bool = False,
+                    after: Optional[str] = None, limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Alerts oldest first, optionally for one patient and/or only unacknowledged.
+
+        Returns (page, next_cursor); pass next_cursor back as `after` to get the
+        following page. next_cursor is None when there is nothing more to read.
+        """
+        after_seq = 0
+        if after:
+            after_seq = self.parse_id(after)
+            if after_seq is None:
+                raise ValueError(f"Invalid cursor: {after}")
+
+        with self._lock:
+            if unacknowledged:
+                source = self._unacknowledged if patient_id is None else self._unacknowledged_by_patient.get(patient_id, [])
+            else:
+                source = self._sequence if patient_id is None else self._by_patient.get(patient_id, [])
+
+            start = bisect_right(source, after_seq)
+            seqs = source[start:start + limit] if limit > 0 else []
+            page = [dict(self._alerts[seq]) for seq in seqs]
+            has_more = start + len(seqs) < len(source)
+
+        next_cursor = page[-1]["alert_id"] if page and has_more else None
+        return page, next_cursor
+
+    def count(self, unacknowledged: bool = False) -> int:
+        with self._lock:
+            return len(self._unacknowledged if unacknowledged else self._sequence)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Alert Archive for closed inventory alerts
+- Append-only directory of immutable, compressed JSON-lines segments
+  (zstd frames when zstandard is installed, gzip otherwise)
+- Manifest with each segment's time range and status counts, so a query
+  only opens the segments that overlap its window
+- Small cache of decoded segments; nothing else is kept in memory
+"""
+
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Default location of the archive (relative to the backend directory)
+DEFAULT_ALERT_ARCHIVE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'alert_archive'))
+MANIFEST_FILE = "segments.jsonl"
+
+
+def _to_epoch(value: Any) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _compress(data: bytes) -> Tuple[bytes, str]:
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=9).compress(data), "zst"
+    return gzip.compress(data, compresslevel=6), "gz"
+
+
+def _decompress(data: bytes, ext: str) -> bytes:
+    if ext == "gz":
+        return gzip.decompress(data)
+    if zstandard is None:
+        raise RuntimeError("zstandard is required to read .zst alert archive segments")
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+class AlertArchive:
+    """
+    Closed alerts, oldest first, in segments `NNNNNNNN.jsonl.<zst|gz>`.
+
+    A segment is written once (to a temporary file, then renamed) and its
+    manifest line is appended afterwards, so a crash never leaves a
+    half-written segment in the index. Each manifest line records the
+    segment's `created_at` range, its status counts and the highest alert
+    number in it.
+    """
+
+    def __init__(self, base_dir: str = DEFAULT_ALERT_ARCHIVE_DIR, max_cached_segments: int = 8,
+                 fsync: bool = False):
+        self.base_dir = base_dir
+        self.max_cached_segments = max_cached_segments
+        self.fsync = fsync
+        self._segments: List[Dict[str, Any]] = []
+        self._count = 0
+        self._status_counts: Dict[str, int] = {}
+        self._max_number = 0
+        self._cache: "OrderedDict[int, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(self.base_dir, exist_ok=True)
+        self._load_manifest()
+
+    def _load_manifest(self):
+        path = os.path.join(self.base_dir, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return
+        intact = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break   # torn final line from an interrupted append
+                if line.strip():
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    if os.path.exists(os.path.join(self.base_dir, entry["file"])):
+                        self._add_segment(entry)
+                intact += len(line)
+        if intact < os.path.getsize(path):
+            # Cut the torn tail, or the next entry would be appended onto it
+            with open(path, "r+b") as f:
+                f.truncate(intact)
+
+    def _add_segment(self, entry: Dict[str, Any]):
+        self._segments.append(entry)
+        self._count += entry["count"]
+        for status, count in entry["statuses"].items():
+            self._status_counts[status] = self._status_counts.get(status, 0) + count
+        self._max_number = max(self._max_number, entry["max_number"])
+
+    # Writes
+
+    def append(self, records: List[Dict[str, Any]]) -> int:
+        """Write records (alert dicts with ISO `created_at`) as one new segment"""
+        if not records:
+            return 0
+        created = [_to_epoch(record["created_at"]) for record in records]
+        statuses: Dict[str, int] = {}
+        for record in records:
+            statuses[record["status"]] = statuses.get(record["status"], 0) + 1
+        numbers = [int(record["alert_id"].rsplit("_", 1)[-1]) for record in records
+                   if record["alert_id"].rsplit("_", 1)[-1].isdigit()]
+        data, ext = _compress("".join(json.dumps(record, ensure_ascii=False) + "\n"
+                                      for record in records).encode("utf-8"))
+        with self._lock:
+            segment = self._segments[-1]["segment"] + 1 if self._segments else 0
+            name = f"{segment:08d}.jsonl.{ext}"
+            path = os.path.join(self.base_dir, name)
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+            entry = {"segment": segment, "file": name, "count": len(records), "bytes": len(data),
+                     "first": min(created), "last": max(created), "statuses": statuses,
+                     "max_number": max(numbers, default=0)}
+            with open(os.path.join(self.base_dir, MANIFEST_FILE), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self._add_segment(entry)
+        return len(records)
+
+    # Reads
+
+    def _read_segment(self, entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+        records = self._cache.get(entry["segment"])
+        if records is not None:
+            self._cache.move_to_end(entry["segment"])
+            return records
+        with open(os.path.join(self.base_dir, entry["file"]), "rb") as f:
+            data = _decompress(f.read(), entry["file"].rsplit(".", 1)[-1])
+        records = [json.loads(line) for line in data.decode("utf-8").splitlines() if line.strip()]
+        self._cache[entry["segment"]] = records
+        while len(self._cache) > self.max_cached_segments:
+            self._cache.popitem(last=False)
+        return records
+
+    def query(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+              item_id: Optional[str] = None, alert_type: Optional[str] = None, status: Optional[str] = None,
+              limit: int = 100) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Archived alerts with since <= created_at <= until matching the
+        filters, newest first; returns (alerts, number of segments read)
+        """
+        lo = since.timestamp() if since else float("-inf")
+        hi = until.timestamp() if until else float("inf")
+        found: List[Tuple[float, Dict[str, Any]]] = []
+        read = 0
+        with self._lock:
+            for entry in self._segments:
+                if entry["last"] < lo or entry["first"] > hi:
+                    continue
+                if status is not None and not entry["statuses"].get(status):
+                    continue
+                read += 1
+                for record in self._read_segment(entry):
+                    if item_id is not None and record["item_id"] != item_id:
+                        continue
+                    if alert_type is not None and record["type"] != alert_type:
+                        continue
+                    if status is not None and record["status"] != status:
+                        continue
+                    created = _to_epoch(record["created_at"])
+                    if lo <= created <= hi:
+                        found.append((created, record))
+        found.sort(key=lambda pair: pair[0], reverse=True)
+        return [record for _, record in found[:limit]], read
+
+    def count(self) -> int:
+        return self._count
+
+    def status_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._status_counts)
+
+    def max_number(self) -> int:
+        """Highest alert number archived (new alert IDs continue after it)"""
+        return self._max_number
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "segments": len(self._segments),
+                "alerts": self._count,
+                "bytes": sum(entry.get("bytes", 0) for entry in self._segments),
+                "cached_segments": len(self._cache),
+                "compression": "zstd" if zstandard is not None else "gzip"
+            }
@@ -6,9 +6,11 @@ Handles low stock and expiry alerts with scheduled jobs
 
 import sys
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from datetime import datetime, timedelta
 import json
+import threading
+from collections import deque
 from enum import Enum
 
 # Add the project root to the Python path
@@ -18,6 +20,11 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from pydantic import BaseModel
 
+from services.inventory_engine import InventoryChange, InventoryEngine, inventory
+from services.stock_ledger import StockLedger, ledger
+from services.expiry_schedule import ExpirySchedule
+from services.alert_archive import AlertArchive, DEFAULT_ALERT_ARCHIVE_DIR
+
 class AlertType(str, Enum):
     LOW_STOCK = "low_stock"
     EXPIRY = "expiry"
@@ -25,6 +32,7 @@ class AlertType(str, Enum):
 class AlertStatus(str, Enum):
     ACTIVE = "active"
     DISMISSED = "dismissed"
+    RESOLVED = "resolved"   # the condition cleared (restocked, expiry date changed)
 
 class Alert(BaseModel):
     alert_id: str
@@ -35,6 +43,7 @@ class Alert(BaseModel):
     created_at: datetime
     status: AlertStatus = AlertStatus.ACTIVE
     severity: str = "medium"  # low, medium, high, critical
+    closed_at: Optional[datetime] = None   # when it was dismissed or resolved
 
 class MedicalSupply(BaseModel):
     id: str
@@ -46,31 +55,65 @@ class MedicalSupply(BaseModel):
     supplier_name: str
     unit: str = "units"
 
+# Inventory kind of medical supplies in the shared inventory engine
+SUPPLY_KIND = "supply"
+
+# Retention: closed alerts stay in memory until there are more than
+# ALERT_HOT_CLOSED_LIMIT of them or they are older than ALERT_HOT_RETENTION_HOURS,
+# then move to the compressed on-disk archive
+ALERT_ARCHIVE_DIR = os.environ.get("ALERT_ARCHIVE_DIR", DEFAULT_ALERT_ARCHIVE_DIR)
+ALERT_HOT_CLOSED_LIMIT = int(os.environ.get("ALERT_HOT_CLOSED_LIMIT", "10000"))
+ALERT_HOT_RETENTION_HOURS = float(os.environ.get("ALERT_HOT_RETENTION_HOURS", "24"))
+ALERT_ARCHIVE_SEGMENT_SIZE = int(os.environ.get("ALERT_ARCHIVE_SEGMENT_SIZE", "5000"))
+
 class AlertsService:
-    def __init__(self):
-        self.alerts: List[Alert] = []
-        self.medical_supplies: List[MedicalSupply] = []
+    def __init__(self, inventory_engine: InventoryEngine = inventory, stock_ledger: StockLedger = ledger,
+                 archive: Optional[AlertArchive] = None):
+        # Hot set: active alerts plus recently closed ones (oldest closed first);
+        # older closed alerts are moved to the archive by _archive_closed_alerts
+        self.archive = archive if archive is not None else AlertArchive(ALERT_ARCHIVE_DIR)
+        self._closed: "deque[Alert]" = deque()
+        self._alert_number = self.archive.max_number()
+        # Indexes over the hot set, kept up to date by _open/_close
+        self._by_id: Dict[str, Alert] = {}
+        self._active: Dict[Tuple[str, AlertType], Alert] = {}   # (item_id, type) -> active alert, oldest first
+        self._active_by_type: Dict[AlertType, Dict[str, Alert]] = {alert_type: {} for alert_type in AlertType}
+        self._status_counts: Dict[AlertStatus, int] = {status: 0 for status in AlertStatus}
+        # Alert state lock; never held while calling into the inventory engine
+        # (feed subscribers run while the engine holds its dispatch lock)
+        self._lock = threading.RLock()
+        self.inventory = inventory_engine
+        self.ledger = stock_ledger
+        self.supplies_version = 0  # bumped whenever supplies change (list ETags)
+        # While a bulk update runs, stock changes only record the supply here and
+        # its alerts are evaluated once when the batch ends
+        self._deferring = 0
+        self._deferred: Dict[str, None] = {}
+        # Supplies keyed by when they next cross an expiry threshold (30/14/7 days before expiry);
+        # added or edited supplies are (re)tracked by the feed subscriber
+        self.expiry_schedule = ExpirySchedule()
+        self.inventory.subscribe(self._on_inventory_change)
         self.scheduler = BackgroundScheduler()
         self._setup_scheduled_jobs()
         self._load_sample_data()
     
     def _setup_scheduled_jobs(self):
-        """Setup scheduled jobs for daily alert checks"""
-        # Run daily at 9:00 AM
+        """Setup scheduled jobs for time-based alert conditions (stock is evaluated on every change)"""
+        # Run hourly at :30; each run only pops the supplies that crossed a threshold
         self.scheduler.add_job(
-            func=self._check_low_stock_alerts,
-            trigger=CronTrigger(hour=9, minute=0),
-            id='low_stock_check',
-            name='Daily Low Stock Check',
+            func=self._check_expiry_alerts,
+            trigger=CronTrigger(minute=30),
+            id='expiry_check',
+            name='Hourly Expiry Check',
             replace_existing=True
         )
         
-        # Run daily at 9:30 AM
+        # Every 5 minutes, move closed alerts past the hot limits to the archive
         self.scheduler.add_job(
-            func=self._check_expiry_alerts,
-            trigger=CronTrigger(hour=9, minute=30),
-            id='expiry_check',
-            name='Daily Expiry Check',
+            func=self._archive_closed_alerts,
+            trigger=CronTrigger(minute='*/5'),
+            id='alert_archive',
+            name='Alert Archive Compaction',
             replace_existing=True
         )
         
@@ -79,7 +122,7 @@ class AlertsService:
     
     def _load_sample_data(self):
         """Load sample medical supplies data"""
-        self.medical_supplies = [
+        self.inventory.add_many([
             MedicalSupply(
                 id="ms_001",
                 name="Paracetamol 500mg",
@@ -125,125 +168,263 @@ class AlertsService:
                 supplier_id="sup_003",
                 supplier_name="First Aid Pro"
             )
-        ]
+        ], SUPPLY_KIND)
+    
+    def _on_inventory_change(self, change: InventoryChange):
+        """
+        Change feed subscriber: alert rules are evaluated for the changed
+        supply only, as the change happens (stock updates, new supplies,
+        threshold or expiry edits)
+        """
+        if change.kind != SUPPLY_KIND:
+            return
+        self.supplies_version += 1
+        if change.op == "stock" and self._defer(change.item_id):
+            return
+        supply = self.inventory.get(change.item_id)
+        self._evaluate_low_stock(supply)
+        if change.op != "stock":
+            # Added, or possibly a new expiry date: re-key it in the expiry schedule
+            now = datetime.now()
+            self._evaluate_expiry(supply, self.expiry_schedule.track(supply.id, supply.expiry_date, now), now)
+    
+    def _defer(self, item_id: str) -> bool:
+        with self._lock:
+            if not self._deferring:
+                return False
+            self._deferred[item_id] = None
+            return True
+    
+    def _low_stock_message(self, supply) -> str:
+        return f"Low stock alert: {supply.name} has {supply.current_stock} {supply.unit} remaining (threshold: {supply.threshold_quantity})"
+    
+    def _evaluate_low_stock(self, supply):
+        """Open, refresh or resolve the supply's low stock alert"""
+        with self._lock:
+            existing_alert = self._get_existing_alert(supply.id, AlertType.LOW_STOCK)
+            if supply.current_stock > supply.threshold_quantity:
+                if existing_alert:
+                    self._close(existing_alert, AlertStatus.RESOLVED)
+                return
+            severity = "high" if supply.current_stock == 0 else "medium"
+            if existing_alert:
+                existing_alert.message = self._low_stock_message(supply)
+                existing_alert.severity = severity
+                return
+            self._open(Alert(
+                alert_id=self._new_alert_id(),
+                item_id=supply.id,
+                item_name=supply.name,
+                type=AlertType.LOW_STOCK,
+                message=self._low_stock_message(supply),
+                created_at=datetime.now(),
+                severity=severity
+            ))
+            print(f"Created low stock alert for {supply.name}")
+    
+    def _evaluate_expiry(self, supply, stage: int, now: datetime):
+        """Open, escalate or resolve the supply's expiry alert for the expiry stage it has reached"""
+        with self._lock:
+            existing_alert = self._get_existing_alert(supply.id, AlertType.EXPIRY)
+            if stage < 0:
+                if existing_alert:
+                    self._close(existing_alert, AlertStatus.RESOLVED)
+                return
+            
+            days_until_expiry = int((supply.expiry_date.timestamp() - now.timestamp()) // 86400)
+            message = f"Expiry alert: {supply.name} expires in {days_until_expiry} days on {supply.expiry_date.strftime('%Y-%m-%d')}"
+            severity = self.expiry_schedule.severity(stage)
+            if existing_alert:
+                existing_alert.message = message
+                existing_alert.severity = severity
+                return
+            self._open(Alert(
+                alert_id=self._new_alert_id(),
+                item_id=supply.id,
+                item_name=supply.name,
+                type=AlertType.EXPIRY,
+                message=message,
+                created_at=datetime.now(),
+                severity=severity
+            ))
+            print(f"Created expiry alert for {supply.name}")
+    
+    def _new_alert_id(self) -> str:
+        self._alert_number += 1
+        return f"alert_{self._alert_number}"
+    
+    def _open(self, alert: Alert):
+        self._by_id[alert.alert_id] = alert
+        self._active[(alert.item_id, alert.type)] = alert
+        self._active_by_type[alert.type][alert.alert_id] = alert
+        self._status_counts[alert.status] += 1
+    
+    def _close(self, alert: Alert, status: AlertStatus):
+        if alert.status == AlertStatus.ACTIVE:
+            alert.closed_at = datetime.now()
+            self._closed.append(alert)
+        self._status_counts[alert.status] -= 1
+        self._status_counts[status] += 1
+        alert.status = status
+        if self._active.get((alert.item_id, alert.type)) is alert:
+            del self._active[(alert.item_id, alert.type)]
+        self._active_by_type[alert.type].pop(alert.alert_id, None)
+    
+    def _archive_closed_alerts(self, now: Optional[datetime] = None) -> int:
+        """Scheduled job: move the oldest closed alerts past the hot limits to the archive"""
+        cutoff = (now or datetime.now()) - timedelta(hours=ALERT_HOT_RETENTION_HOURS)
+        with self._lock:
+            overflow = len(self._closed) - ALERT_HOT_CLOSED_LIMIT
+            count = 0
+            for alert in self._closed:
+                if count >= overflow and alert.closed_at > cutoff:
+                    break
+                count += 1
+            batch = [self._closed.popleft() for _ in range(count)]
+            for alert in batch:
+                del self._by_id[alert.alert_id]
+                self._status_counts[alert.status] -= 1
+            records = [alert.model_dump(mode="json") for alert in batch]
+        # Disk writes happen outside the alert lock (feed subscribers wait on it)
+        written = 0
+        try:
+            for start in range(0, len(records), ALERT_ARCHIVE_SEGMENT_SIZE):
+                written += self.archive.append(records[start:start + ALERT_ARCHIVE_SEGMENT_SIZE])
+        except OSError as e:
+            print(f"Alert archive write failed, keeping {len(batch) - written} alerts in memory: {e}")
+            with self._lock:
+                for alert in reversed(batch[written:]):
+                    self._closed.appendleft(alert)
+                    self._by_id[alert.alert_id] = alert
+                    self._status_counts[alert.status] += 1
+        return written
     
     def _check_low_stock_alerts(self):
-        """Check for low stock items and create alerts"""
+        """Reconcile low stock alerts (manual check; changes are evaluated as they happen)"""
         print(f"[{datetime.now()}] Checking for low stock alerts...")
         
-        for supply in self.medical_supplies:
-            if supply.current_stock <= supply.threshold_quantity:
-                # Check if alert already exists
-                existing_alert = self._get_existing_alert(supply.id, AlertType.LOW_STOCK)
-                
-                if not existing_alert:
-                    alert = Alert(
-                        alert_id=f"alert_{len(self.alerts) + 1}",
-                        item_id=supply.id,
-                        item_name=supply.name,
-                        type=AlertType.LOW_STOCK,
-                        message=f"Low stock alert: {supply.name} has {supply.current_stock} {supply.unit} remaining (threshold: {supply.threshold_quantity})",
-                        created_at=datetime.now(),
-                        severity="high" if supply.current_stock == 0 else "medium"
-                    )
-                    self.alerts.append(alert)
-                    print(f"Created low stock alert for {supply.name}")
+        # Ratio index: only supplies at or below their threshold are visited
+        for supply in self.inventory.at_or_below_ratio(1.0, SUPPLY_KIND):
+            self._evaluate_low_stock(supply)
     
     def _check_expiry_alerts(self):
-        """Check for items expiring soon and create alerts"""
+        """Scheduled job: open or escalate alerts for supplies that crossed an expiry threshold"""
         print(f"[{datetime.now()}] Checking for expiry alerts...")
         
-        expiry_threshold = datetime.now() + timedelta(days=30)
-        
-        for supply in self.medical_supplies:
-            if supply.expiry_date and supply.expiry_date <= expiry_threshold:
-                # Check if alert already exists
-                existing_alert = self._get_existing_alert(supply.id, AlertType.EXPIRY)
-                
-                if not existing_alert:
-                    days_until_expiry = (supply.expiry_date - datetime.now()).days
-                    
-                    alert = Alert(
-                        alert_id=f"alert_{len(self.alerts) + 1}",
-                        item_id=supply.id,
-                        item_name=supply.name,
-                        type=AlertType.EXPIRY,
-                        message=f"Expiry alert: {supply.name} expires in {days_until_expiry} days on {supply.expiry_date.strftime('%Y-%m-%d')}",
-                        created_at=datetime.now(),
-                        severity="critical" if days_until_expiry <= 7 else "high" if days_until_expiry <= 14 else "medium"
-                    )
-                    self.alerts.append(alert)
-                    print(f"Created expiry alert for {supply.name}")
+        now = datetime.now()
+        # Expiry schedule: only the supplies that became due are popped
+        for item_id, stage in self.expiry_schedule.pop_due(now):
+            supply = self.inventory.get(item_id)
+            if supply is not None:
+                self._evaluate_expiry(supply, stage, now)
     
     def _get_existing_alert(self, item_id: str, alert_type: AlertType) -> Optional[Alert]:
-        """Check if an alert already exists for the given item and type"""
-        for alert in self.alerts:
-            if (alert.item_id == item_id and 
-                alert.type == alert_type and 
-                alert.status == AlertStatus.ACTIVE):
-                return alert
-        return None
+        """Active alert for the given item and type, if any"""
+        return self._active.get((item_id, alert_type))
     
     def get_all_alerts(self) -> List[Alert]:
         """Get all active alerts"""
-        return [alert for alert in self.alerts if alert.status == AlertStatus.ACTIVE]
+        with self._lock:
+            return list(self._active.values())
     
     def get_alerts_by_type(self, alert_type: AlertType) -> List[Alert]:
         """Get alerts filtered by type"""
-        return [alert for alert in self.alerts 
-                if alert.type == alert_type and alert.status == AlertStatus.ACTIVE]
+        with self._lock:
+            return list(self._active_by_type[alert_type].values())
+    
+    def get_alert(self, alert_id: str) -> Optional[Alert]:
+        """Get an alert (active or not yet archived) by ID"""
+        return self._by_id.get(alert_id)
     
     def dismiss_alert(self, alert_id: str) -> bool:
         """Dismiss an alert by setting its status to dismissed"""
-        for alert in self.alerts:
-            if alert.alert_id == alert_id:
-                alert.status = AlertStatus.DISMISSED
-                return True
-        return False
+        with self._lock:
+            alert = self._by_id.get(alert_id)
+            if alert is None:
+                return False
+            self._close(alert, AlertStatus.DISMISSED)
+            return True
+    
+    def query_archived_alerts(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                              item_id: Optional[str] = None, alert_type: Optional[AlertType] = None,
+                              status: Optional[AlertStatus] = None, limit: int = 100) -> Tuple[List[Dict[str, Any]], int]:
+        """Archived alerts created in [since, until], newest first, and the number of archive segments read"""
+        return self.archive.query(since, until, item_id, alert_type.value if alert_type else None,
+                                  status.value if status else None, limit)
     
     def get_medical_supplies(self) -> List[MedicalSupply]:
         """Get all medical supplies"""
-        return self.medical_supplies
+        return self.inventory.items(SUPPLY_KIND)
+    
+    def supply_count(self) -> int:
+        return self.inventory.count(SUPPLY_KIND)
     
     def update_stock(self, item_id: str, new_quantity: int) -> bool:
-        """Update stock quantity for a medical supply"""
-        for supply in self.medical_supplies:
-            if supply.id == item_id:
-                supply.current_stock = new_quantity
-                return True
-        return False
+        """Record a stock count for a medical supply"""
+        if self.inventory.kind_of(item_id) != SUPPLY_KIND:
+            return False
+        self.ledger.count(item_id, new_quantity)
+        return True
+    
+    def bulk_update_stock(self, counts: Iterable[Tuple[str, int]]) -> List[Optional[str]]:
+        """
+        Record many (item_id, new_quantity) stock counts in one pass; low stock
+        alerts are evaluated once per changed supply after the last row.
+        Returns one error message per row, None where the count was applied.
+        """
+        errors: List[Optional[str]] = []
+        with self._lock:
+            self._deferring += 1
+        try:
+            for item_id, new_quantity in counts:
+                if self.inventory.kind_of(item_id) != SUPPLY_KIND:
+                    errors.append("Medical supply not found")
+                    continue
+                try:
+                    self.ledger.count(item_id, new_quantity, reason="bulk stock count")
+                except ValueError as e:   # StockError, or a negative quantity
+                    errors.append(str(e))
+                    continue
+                errors.append(None)
+        finally:
+            with self._lock:
+                self._deferring -= 1
+                changed: Dict[str, None] = {}
+                if not self._deferring:
+                    changed, self._deferred = self._deferred, {}
+            for item_id in changed:
+                self._evaluate_low_stock(self.inventory.get(item_id))
+        return errors
     
     def add_medical_supply(self, supply: MedicalSupply) -> bool:
         """Add a new medical supply"""
-        self.medical_supplies.append(supply)
+        self.inventory.add(supply, SUPPLY_KIND)
         return True
     
     def get_supply_by_id(self, item_id: str) -> Optional[MedicalSupply]:
         """Get medical supply by ID"""
-        for supply in self.medical_supplies:
-            if supply.id == item_id:
-                return supply
-        return None
+        if self.inventory.kind_of(item_id) != SUPPLY_KIND:
+            return None
+        return self.inventory.get(item_id)
     
     def run_manual_check(self):
-        """Manually trigger alert checks (for testing)"""
+        """Manually reconcile all alerts (for testing; alerts are otherwise raised as stock changes)"""
         self._check_low_stock_alerts()
         self._check_expiry_alerts()
     
     def get_alert_statistics(self) -> Dict[str, Any]:
         """Get alert statistics"""
-        total_alerts = len(self.alerts)
-        active_alerts = len([a for a in self.alerts if a.status == AlertStatus.ACTIVE])
-        low_stock_alerts = len([a for a in self.alerts if a.type == AlertType.LOW_STOCK and a.status == AlertStatus.ACTIVE])
-        expiry_alerts = len([a for a in self.alerts if a.type == AlertType.EXPIRY and a.status == AlertStatus.ACTIVE])
-        
-        return {
-            "total_alerts": total_alerts,
-            "active_alerts": active_alerts,
-            "low_stock_alerts": low_stock_alerts,
-            "expiry_alerts": expiry_alerts,
-            "dismissed_alerts": total_alerts - active_alerts
-        }
+        archived = self.archive.status_counts()
+        with self._lock:
+            return {
+                "total_alerts": len(self._by_id) + sum(archived.values()),
+                "active_alerts": self._status_counts[AlertStatus.ACTIVE],
+                "low_stock_alerts": len(self._active_by_type[AlertType.LOW_STOCK]),
+                "expiry_alerts": len(self._active_by_type[AlertType.EXPIRY]),
+                "dismissed_alerts": self._status_counts[AlertStatus.DISMISSED] + archived.get(AlertStatus.DISMISSED.value, 0),
+                "resolved_alerts": self._status_counts[AlertStatus.RESOLVED] + archived.get(AlertStatus.RESOLVED.value, 0),
+                "archived_alerts": sum(archived.values())
+            }
 
 # Global instance
 alerts_service = AlertsService() 
\ No newline at end of file
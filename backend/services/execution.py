@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Execution Layer for the Infinite Memory backend
+- CPU-heavy service calls run on a sized thread or process pool, off the event loop
+- Per-route concurrency limits with a bounded number of waiters
+- Queue-depth backpressure: saturated routes answer 503 with Retry-After
+- Saturation metrics (in flight, queued, rejected, wait/run times) for tuning
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+
+class ExecutorSaturated(HTTPException):
+    """503 raised instead of queueing more work on a saturated route or pool"""
+
+    def __init__(self, route: str, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail=f"Server busy, too many pending '{route}' requests; retry later",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+class _RouteState:
+    __slots__ = ("concurrency", "max_waiting", "semaphore", "running", "waiting",
+                 "completed", "rejected", "wait_seconds", "run_seconds")
+
+    def __init__(self, concurrency: int, max_waiting: int):
+        self.concurrency = concurrency
+        self.max_waiting = max_waiting
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+
+class BoundedExecutor:
+    """
+    A lazily created worker pool shared by several routes.
+
+    Each route may run at most `concurrency` calls at once and let at most
+    `max_waiting` more wait for a slot; beyond that, or when more than
+    `max_queue` calls are already queued inside the pool, `run` raises
+    ExecutorSaturated. All bookkeeping happens on the event loop, so it also
+    works for process pools, whose callables must stay picklable.
+    """
+
+    def __init__(self, name: str, workers: int, max_queue: int, processes: bool = False,
+                 default_concurrency: Optional[int] = None, default_waiting: Optional[int] = None,
+                 retry_after: int = 1):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.processes = processes
+        self.default_concurrency = default_concurrency or workers
+        self.default_waiting = default_waiting if default_waiting is not None else max_queue
+        self.retry_after = retry_after
+        self._pool: Optional[Executor] = None
+        self._routes: Dict[str, _RouteState] = {}
+        self.in_pool = 0      # submitted to the pool and not finished yet
+        self.peak_in_pool = 0
+        self.submitted = 0
+        self.rejected = 0
+
+    @property
+    def pool(self) -> Executor:
+        if self._pool is None:
+            if self.processes:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+        return self._pool
+
+    def configure_route(self, route: str, concurrency: int, max_waiting: int):
+        self._routes[route] = _RouteState(concurrency, max_waiting)
+
+    def _route(self, route: str) -> _RouteState:
+        state = self._routes.get(route)
+        if state is None:
+            state = self._routes[route] = _RouteState(self.default_concurrency, self.default_waiting)
+        return state
+
+    @property
+    def queued(self) -> int:
+        return max(0, self.in_pool - self.workers)
+
+    def admit(self, route: str) -> _RouteState:
+        """Reject now if the route or the pool is saturated"""
+        state = self._route(route)
+        if (state.running >= state.concurrency and state.waiting >= state.max_waiting) \
+                or self.queued >= self.max_queue:
+            state.rejected += 1
+            self.rejected += 1
+            raise ExecutorSaturated(route, self.retry_after)
+        return state
+
+    async def run(self, route: str, func: Callable[..., Any], *args: Any, check: bool = True) -> Any:
+        """
+        Run func(*args) on the pool under the route's limits.
+
+        check=False skips admission (for follow-up work of a request that was
+        already admitted, e.g. later chunks of one batch); it still waits for
+        a concurrency slot.
+        """
+        state = self.admit(route) if check else self._route(route)
+        if state.semaphore is None:
+            state.semaphore = asyncio.Semaphore(state.concurrency)
+
+        queued_at = time.perf_counter()
+        state.waiting += 1
+        try:
+            await state.semaphore.acquire()
+        finally:
+            state.waiting -= 1
+
+        started_at = time.perf_counter()
+        state.wait_seconds += started_at - queued_at
+        state.running += 1
+        self.in_pool += 1
+        self.peak_in_pool = max(self.peak_in_pool, self.in_pool)
+        self.submitted += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.pool, func, *args)
+        finally:
+            self.in_pool -= 1
+            state.running -= 1
+            state.completed += 1
+            state.run_seconds += time.perf_counter() - started_at
+            state.semaphore.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        routes = {}
+        for route, state in self._routes.items():
+            routes[route] = {
+                "concurrency_limit": state.concurrency,
+                "max_waiting": state.max_waiting,
+                "running": state.running,
+                "waiting": state.waiting,
+                "completed": state.completed,
+                "rejected": state.rejected,
+                "avg_wait_ms": state.wait_seconds / state.completed * 1000 if state.completed else 0.0,
+                "avg_run_ms": state.run_seconds / state.completed * 1000 if state.completed else 0.0
+            }
+        return {
+            "kind": "process" if self.processes else "thread",
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_pool,
+            "active": min(self.in_pool, self.workers),
+            "queued": self.queued,
+            "peak_in_flight": self.peak_in_pool,
+            "utilization": min(self.in_pool, self.workers) / self.workers if self.workers else 0.0,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "routes": routes
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def configure_routes(executor: BoundedExecutor, limits: Dict[str, Tuple[int, int]]):
+    """Apply {route: (concurrency, max_waiting)} to an executor"""
+    for route, (concurrency, max_waiting) in limits.items():
+        executor.configure_route(route, concurrency, max_waiting)
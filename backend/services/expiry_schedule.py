@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Expiry Schedule for near-expiry alerts
+- Min-heap keyed by the moment each item crosses its next expiry threshold
+  (30, 14 and 7 days before expiry by default)
+- A check pops only the items that are due: O(k log n) for k due items,
+  however many lots are tracked
+- Expiry date changes re-key an item; superseded heap entries are skipped
+  when they surface and compacted away when they pile up
+"""
+
+import heapq
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DAY_SECONDS = 86400.0
+# (days before expiry, alert severity), widest window first
+EXPIRY_STAGES: Tuple[Tuple[int, str], ...] = ((30, "medium"), (14, "high"), (7, "critical"))
+
+
+class ExpirySchedule:
+    """
+    Tracks which expiry stage every item has reached.
+
+    Stage -1 means outside the widest window; stage i means the item is
+    within `stages[i][0]` days of expiry. Each tracked item has one live
+    heap entry: the moment it reaches its next stage.
+    """
+
+    def __init__(self, stages: Sequence[Tuple[int, str]] = EXPIRY_STAGES):
+        self.stages = tuple(stages)
+        self._offsets = [days * DAY_SECONDS for days, _ in self.stages]
+        self._heap: List[Tuple[float, str, float, int]] = []   # (due, item_id, expiry, stage)
+        self._expiry: Dict[str, float] = {}
+        self._stage: Dict[str, int] = {}
+        self._stale = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def severity(self, stage: int) -> Optional[str]:
+        return self.stages[stage][1] if stage >= 0 else None
+
+    def _stage_at(self, expiry: float, now: float) -> int:
+        stage = -1
+        for i, offset in enumerate(self._offsets):
+            if now >= expiry - offset:
+                stage = i
+        return stage
+
+    def _schedule_next(self, item_id: str, expiry: float, stage: int):
+        if stage + 1 < len(self._offsets):
+            heapq.heappush(self._heap, (expiry - self._offsets[stage + 1], item_id, expiry, stage + 1))
+
+    def _supersede(self, item_id: str):
+        if self._expiry.pop(item_id, None) is not None:
+            stage = self._stage.pop(item_id)
+            if stage + 1 < len(self._offsets):
+                self._stale += 1
+
+    def track(self, item_id: str, expiry_date: Optional[datetime], now: datetime) -> int:
+        """(Re)register an item's expiry date; returns the stage it is at now"""
+        with self._lock:
+            self._supersede(item_id)
+            if expiry_date is None:
+                return -1
+            expiry = expiry_date.timestamp()
+            stage = self._stage_at(expiry, now.timestamp())
+            self._expiry[item_id] = expiry
+            self._stage[item_id] = stage
+            self._schedule_next(item_id, expiry, stage)
+            if self._stale > max(64, len(self._expiry)):
+                self._compact()
+            return stage
+
+    def untrack(self, item_id: str):
+        with self._lock:
+            self._supersede(item_id)
+
+    def stage_of(self, item_id: str) -> int:
+        return self._stage.get(item_id, -1)
+
+    def next_due(self) -> Optional[float]:
+        """Timestamp of the earliest pending stage change (may be a superseded entry)"""
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> List[Tuple[str, int]]:
+        """(item_id, new stage) for every item that reached a further stage by `now`"""
+        now_ts = now.timestamp()
+        due: Dict[str, int] = {}
+        with self._lock:
+            heap = self._heap
+            while heap and heap[0][0] <= now_ts:
+                _, item_id, expiry, stage = heapq.heappop(heap)
+                if self._expiry.get(item_id) != expiry or self._stage[item_id] >= stage:
+                    self._stale -= 1
+                    continue
+                self._stage[item_id] = stage
+                self._schedule_next(item_id, expiry, stage)
+                due[item_id] = stage
+        return list(due.items())
+
+    def _compact(self):
+        """Drop superseded entries: rebuild the heap from the live ones"""
+        live: Dict[str, Tuple[float, str, float, int]] = {}
+        for entry in self._heap:
+            item_id = entry[1]
+            if self._expiry.get(item_id) == entry[2] and self._stage[item_id] < entry[3]:
+                live[item_id] = entry
+        self._heap = list(live.values())
+        heapq.heapify(self._heap)
+        self._stale = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            per_stage = [0] * len(self.stages)
+            for stage in self._stage.values():
+                if stage >= 0:
+                    per_stage[stage] += 1
+            return {
+                "tracked": len(self._expiry),
+                "heap_entries": len(self._heap),
+                "superseded_entries": self._stale,
+                "by_severity": {severity: count for (_, severity), count in zip(self.stages, per_stage)}
+            }
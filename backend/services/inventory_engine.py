@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Inventory Engine shared by the medicine, supply and voice services
+- One in-process table of stock items (medicines, medical supplies, OTC items)
+- Primary-key hash index plus secondary indexes by supplier, name, expiry date
+  and stock-to-threshold ratio, all maintained on every write
+- Change feed: every add/stock/update is sequenced, kept in a bounded log for
+  polling and pushed to subscribers right after the write releases the lock
+"""
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from itertools import islice
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+INF = float("inf")
+# Sorts after every item ID, for inclusive upper bounds on (value, item_id) tuples
+MAX_ID = "\uffff"
+
+
+class StockItem:
+    """
+    Stock record for items that have no richer model of their own (catalog
+    medicines, OTC items). Attribute names match MedicalSupply, so both kinds
+    go through the same indexes.
+    """
+    __slots__ = ("id", "name", "current_stock", "threshold_quantity", "expiry_date", "supplier_id")
+
+    def __init__(self, id: str, name: str, current_stock: int, threshold_quantity: int,
+                 expiry_date: Optional[datetime] = None, supplier_id: Optional[str] = None):
+        self.id = id
+        self.name = name
+        self.current_stock = current_stock
+        self.threshold_quantity = threshold_quantity
+        self.expiry_date = expiry_date
+        self.supplier_id = supplier_id
+
+
+class InventoryChange:
+    """One change feed entry; `old`/`new` are the changed values ({field: value})"""
+    __slots__ = ("seq", "op", "item_id", "kind", "old", "new", "at")
+
+    def __init__(self, seq: int, op: str, item_id: str, kind: str,
+                 old: Dict[str, Any], new: Dict[str, Any], at: datetime):
+        self.seq = seq
+        self.op = op            # "added" | "stock" | "updated"
+        self.item_id = item_id
+        self.kind = kind
+        self.old = old
+        self.new = new
+        self.at = at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"seq": self.seq, "op": self.op, "item_id": self.item_id, "kind": self.kind,
+                "old": self.old, "new": self.new, "at": self.at.isoformat()}
+
+
+def stock_ratio(current_stock: int, threshold_quantity: int) -> float:
+    """Stock over threshold; an item is low on stock when this is <= 1"""
+    if threshold_quantity > 0:
+        return current_stock / threshold_quantity
+    return 0.0 if current_stock <= 0 else INF
+
+
+def _expiry_key(expiry_date: Optional[datetime]) -> Optional[float]:
+    return expiry_date.timestamp() if expiry_date is not None else None
+
+
+INDEXED_FIELDS = ("name", "threshold_quantity", "expiry_date", "supplier_id")
+
+
+class InventoryEngine:
+    """
+    Indexed stock table.
+
+    Items are objects with `id`, `name`, `current_stock`,
+    `threshold_quantity` and optionally `expiry_date` and `supplier_id`
+    attributes, filed under a kind ("medicine", "supply", "otc"). They are
+    mutated only through the engine so the indexes stay exact.
+
+    Subscribers are called in sequence order, one change at a time, after
+    the write that made the change has released the engine lock: they may
+    read the engine, and other writes proceed while they run. A write
+    returns once its own change has been delivered to every subscriber (a
+    write made by a subscriber itself is delivered after the change being
+    handled). A subscriber that raises is reported and skipped for that
+    change only. Callers that make several writes under a lock of their
+    own pass `dispatch=False` and call `dispatch()` after releasing it.
+    """
+
+    def __init__(self, feed_size: int = 10_000):
+        self._items: Dict[str, Any] = {}
+        self._kind: Dict[str, str] = {}
+        self._by_kind: Dict[str, Dict[str, None]] = {}                 # insertion-ordered sets
+        self._by_supplier: Dict[str, Dict[str, None]] = {}
+        self._by_name: Dict[str, Dict[str, None]] = {}
+        self._by_expiry: List[Tuple[float, str]] = []                  # (timestamp, item_id)
+        self._by_ratio: List[Tuple[float, str]] = []                   # (stock / threshold, item_id)
+        self._feed: Deque[InventoryChange] = deque(maxlen=feed_size)
+        self._subscribers: List[Callable[[InventoryChange], None]] = []
+        self._pending: Deque[InventoryChange] = deque()                # published, not yet delivered
+        # Delivery watermark: changes up to _delivered have reached every
+        # subscriber; one thread at a time (_deliverer) delivers
+        self._queued = 0
+        self._delivered = 0
+        self._deliverer: Optional[int] = None
+        self._delivery = threading.Condition(threading.Lock())
+        self._versions: Dict[str, int] = {}                            # stock writes per item
+        self._seq = 0
+        self._lock = threading.RLock()
+
+    # Index maintenance
+
+    @staticmethod
+    def _name_key(name: str) -> str:
+        return " ".join(name.lower().split())
+
+    def _index(self, item: Any):
+        item_id = item.id
+        if getattr(item, "supplier_id", None):
+            self._by_supplier.setdefault(item.supplier_id, {})[item_id] = None
+        self._by_name.setdefault(self._name_key(item.name), {})[item_id] = None
+        expiry = _expiry_key(getattr(item, "expiry_date", None))
+        if expiry is not None:
+            insort(self._by_expiry, (expiry, item_id))
+        insort(self._by_ratio, (stock_ratio(item.current_stock, item.threshold_quantity), item_id))
+
+    def _unindex(self, item: Any):
+        item_id = item.id
+        self._discard_key(self._by_supplier, getattr(item, "supplier_id", None), item_id)
+        self._discard_key(self._by_name, self._name_key(item.name), item_id)
+        expiry = _expiry_key(getattr(item, "expiry_date", None))
+        if expiry is not None:
+            self._discard(self._by_expiry, (expiry, item_id))
+        self._discard(self._by_ratio, (stock_ratio(item.current_stock, item.threshold_quantity), item_id))
+
+    @staticmethod
+    def _discard_key(index: Dict[str, Dict[str, None]], key: Optional[str], item_id: str):
+        if not key:
+            return
+        members = index.get(key)
+        if members is not None:
+            members.pop(item_id, None)
+            if not members:
+                del index[key]
+
+    @staticmethod
+    def _discard(entries: List[Tuple[float, str]], entry: Tuple[float, str]):
+        i = bisect_left(entries, entry)
+        if i < len(entries) and entries[i] == entry:
+            del entries[i]
+
+    def _publish(self, op: str, item_id: str, old: Dict[str, Any], new: Dict[str, Any]) -> InventoryChange:
+        self._seq += 1
+        change = InventoryChange(self._seq, op, item_id, self._kind[item_id], old, new, datetime.now())
+        self._feed.append(change)
+        if self._subscribers:
+            self._pending.append(change)
+            self._queued = change.seq
+        return change
+
+    def dispatch(self):
+        """
+        Deliver published changes to the subscribers, oldest first, and
+        return once every change queued before the call has been delivered;
+        never call it holding the engine lock
+        """
+        target = self._queued
+        me = threading.get_ident()
+        with self._delivery:
+            if self._deliverer == me:
+                return   # a subscriber's own write: the running loop delivers it next
+            while self._delivered < target:
+                if self._deliverer is None:
+                    self._deliverer = me
+                    break
+                self._delivery.wait()
+            else:
+                return
+        try:
+            while True:
+                with self._delivery:
+                    if not self._pending:
+                        break
+                    change = self._pending.popleft()
+                    subscribers = self._subscribers
+                for subscriber in subscribers:
+                    try:
+                        subscriber(change)
+                    except Exception as e:
+                        print(f"Inventory subscriber {getattr(subscriber, '__qualname__', subscriber)} "
+                              f"failed on change {change.seq}: {e!r}")
+                with self._delivery:
+                    self._delivered = change.seq
+                    self._delivery.notify_all()
+        finally:
+            with self._delivery:
+                self._deliverer = None
+                self._delivery.notify_all()
+
+    # Writes
+
+    def add(self, item: Any, kind: str, dispatch: bool = True) -> Any:
+        with self._lock:
+            if item.id in self._items:
+                raise ValueError(f"Inventory item {item.id} already exists")
+            self._items[item.id] = item
+            self._kind[item.id] = kind
+            self._by_kind.setdefault(kind, {})[item.id] = None
+            self._index(item)
+            self._publish("added", item.id, {}, {"current_stock": item.current_stock,
+                                                 "threshold_quantity": item.threshold_quantity})
+        if dispatch:
+            self.dispatch()
+        return item
+
+    def add_many(self, items: Iterable[Any], kind: str, dispatch: bool = True) -> int:
+        """Bulk registration: the sorted indexes are rebuilt once instead of per item"""
+        items = list(items)
+        with self._lock:
+            seen = set()
+            for item in items:
+                if item.id in self._items or item.id in seen:
+                    raise ValueError(f"Inventory item {item.id} already exists")
+                seen.add(item.id)
+            for item in items:
+                self._items[item.id] = item
+                self._kind[item.id] = kind
+                self._by_kind.setdefault(kind, {})[item.id] = None
+                if getattr(item, "supplier_id", None):
+                    self._by_supplier.setdefault(item.supplier_id, {})[item.id] = None
+                self._by_name.setdefault(self._name_key(item.name), {})[item.id] = None
+                expiry = _expiry_key(getattr(item, "expiry_date", None))
+                if expiry is not None:
+                    self._by_expiry.append((expiry, item.id))
+                self._by_ratio.append((stock_ratio(item.current_stock, item.threshold_quantity), item.id))
+            self._by_expiry.sort()
+            self._by_ratio.sort()
+            for item in items:
+                self._publish("added", item.id, {}, {"current_stock": item.current_stock,
+                                                     "threshold_quantity": item.threshold_quantity})
+        if dispatch:
+            self.dispatch()
+        return len(items)
+
+    def set_stock(self, item_id: str, quantity: int, dispatch: bool = True) -> Optional[Any]:
+        """Set an item's stock level; returns the item, or None if it does not exist"""
+        with self._lock:
+            item = self._items.get(item_id)
+            if item is None:
+                return None
+            old = item.current_stock
+            if old == quantity:
+                return item
+            self._discard(self._by_ratio, (stock_ratio(old, item.threshold_quantity), item_id))
+            item.current_stock = quantity
+            self._versions[item_id] = self._versions.get(item_id, 0) + 1
+            insort(self._by_ratio, (stock_ratio(quantity, item.threshold_quantity), item_id))
+            self._publish("stock", item_id, {"current_stock": old}, {"current_stock": quantity})
+        if dispatch:
+            self.dispatch()
+        return item
+
+    def update(self, item_id: str, dispatch: bool = True, **fields: Any) -> Optional[Any]:
+        """Change indexed attributes (name, threshold_quantity, expiry_date, supplier_id)"""
+        unknown = set(fields) - set(INDEXED_FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot update {', '.join(sorted(unknown))} through update(); "
+                             f"use set_stock for current_stock")
+        with self._lock:
+            item = self._items.get(item_id)
+            if item is None:
+                return None
+            old = {name: getattr(item, name, None) for name in fields}
+            changed = {name: value for name, value in fields.items() if old[name] != value}
+            if not changed:
+                return item
+            self._unindex(item)
+            for name, value in changed.items():
+                setattr(item, name, value)
+            self._index(item)
+            self._publish("updated", item_id, {name: old[name] for name in changed}, changed)
+        if dispatch:
+            self.dispatch()
+        return item
+
+    # Reads
+
+    def get(self, item_id: str) -> Optional[Any]:
+        return self._items.get(item_id)
+
+    def kind_of(self, item_id: str) -> Optional[str]:
+        return self._kind.get(item_id)
+
+    def stock_version(self, item_id: str) -> int:
+        """Number of stock changes the item has had (0 when never changed)"""
+        return self._versions.get(item_id, 0)
+
+    def items(self, kind: str) -> List[Any]:
+        """Items of one kind, in registration order"""
+        with self._lock:
+            return [self._items[item_id] for item_id in self._by_kind.get(kind, ())]
+
+    def count(self, kind: Optional[str] = None) -> int:
+        if kind is None:
+            return len(self._items)
+        return len(self._by_kind.get(kind, ()))
+
+    def _select(self, item_ids: Iterable[str], kind: Optional[str]) -> List[Any]:
+        if kind is None:
+            return [self._items[item_id] for item_id in item_ids]
+        return [self._items[item_id] for item_id in item_ids if self._kind[item_id] == kind]
+
+    def by_supplier(self, supplier_id: str, kind: Optional[str] = None) -> List[Any]:
+        with self._lock:
+            return self._select(list(self._by_supplier.get(supplier_id, ())), kind)
+
+    def find_by_name(self, name: str, kind: Optional[str] = None) -> List[Any]:
+        """Items whose name matches exactly, ignoring case and extra whitespace"""
+        with self._lock:
+            return self._select(list(self._by_name.get(self._name_key(name), ())), kind)
+
+    def expiring_before(self, when: datetime, kind: Optional[str] = None) -> List[Any]:
+        """Items with an expiry date on or before `when`, soonest first"""
+        with self._lock:
+            end = bisect_right(self._by_expiry, (when.timestamp(), MAX_ID))
+            return self._select([item_id for _, item_id in self._by_expiry[:end]], kind)
+
+    def expiring_between(self, after: datetime, until: datetime, kind: Optional[str] = None) -> List[Any]:
+        """Items with an expiry date after `after` and on or before `until`, soonest first"""
+        with self._lock:
+            start = bisect_right(self._by_expiry, (after.timestamp(), MAX_ID))
+            end = bisect_right(self._by_expiry, (until.timestamp(), MAX_ID))
+            return self._select([item_id for _, item_id in self._by_expiry[start:end]], kind)
+
+    def at_or_below_ratio(self, ratio: float = 1.0, kind: Optional[str] = None) -> List[Any]:
+        """Items whose stock/threshold ratio is <= `ratio` (1.0: low stock), lowest first"""
+        with self._lock:
+            end = bisect_right(self._by_ratio, (ratio, MAX_ID))
+            return self._select([item_id for _, item_id in self._by_ratio[:end]], kind)
+
+    # Change feed
+
+    def subscribe(self, handler: Callable[[InventoryChange], None]):
+        # Copied on write: a delivery in progress keeps the list it started with
+        with self._delivery:
+            self._subscribers = self._subscribers + [handler]
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def changes_since(self, seq: int = 0, limit: int = 1000) -> List[InventoryChange]:
+        """Retained changes with a sequence number above `seq`, oldest first"""
+        with self._lock:
+            if not self._feed or seq >= self._seq:
+                return []
+            start = max(0, len(self._feed) - (self._seq - seq))
+            return list(islice(self._feed, start, start + limit))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "by_kind": {kind: len(ids) for kind, ids in self._by_kind.items()},
+                "suppliers": len(self._by_supplier),
+                "with_expiry": len(self._by_expiry),
+                "low_stock": bisect_right(self._by_ratio, (1.0, MAX_ID)),
+                "last_seq": self._seq,
+                "feed_retained": len(self._feed)
+            }
+
+
+# Global instance
+inventory = InventoryEngine()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+JSON Encoding for the Infinite Memory backend
+- Domain objects (dataclasses, pydantic models) serialized straight to bytes
+- Datetimes, enums and dataclasses handled natively by orjson when installed
+- One compiled attribute getter per (model type, field selection), cached
+"""
+
+import json
+from dataclasses import fields as dataclass_fields, is_dataclass
+from datetime import date, datetime
+from enum import Enum
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# (name, function of the object) pairs for values that are not plain attributes
+Computed = Tuple[Tuple[str, Callable[[Any], Any]], ...]
+
+
+def model_field_names(cls: type) -> Tuple[str, ...]:
+    """Declared field names of a dataclass or pydantic model, in order"""
+    if isinstance(cls, type) and issubclass(cls, BaseModel):
+        return tuple(cls.model_fields.keys())
+    if is_dataclass(cls):
+        return tuple(f.name for f in dataclass_fields(cls))
+    raise TypeError(f"Cannot derive fields of {cls.__name__}")
+
+
+@lru_cache(maxsize=None)
+def serializer_for(cls: type, names: Optional[Tuple[str, ...]] = None,
+                   computed: Computed = ()) -> Callable[[Any], Dict[str, Any]]:
+    """
+    Build (once per type and selection) a function turning an instance into a
+    dict of the selected attributes plus computed values. Values are left as
+    they are (datetime, Enum, ...); `dumps` encodes them.
+    """
+    names = model_field_names(cls) if names is None else names
+    if not names:
+        getter = lambda obj: ()
+    elif len(names) == 1:
+        single = attrgetter(names[0])
+        getter = lambda obj: (single(obj),)
+    else:
+        getter = attrgetter(*names)
+
+    if not computed:
+        return lambda obj: dict(zip(names, getter(obj)))
+
+    def serialize(obj):
+        data = dict(zip(names, getter(obj)))
+        for name, func in computed:
+            data[name] = func(obj)
+        return data
+    return serialize
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for types the encoder does not know natively"""
+    if isinstance(obj, BaseModel) or is_dataclass(obj):
+        return serializer_for(type(obj))(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(content: Any) -> bytes:
+        return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSONResponse that encodes domain objects directly, without jsonable_encoder"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+List Responses for the Infinite Memory backend
+- Shared limit/cursor paging and fields= projection for list endpoints
+- Weak ETags derived from the version counter each collection owner bumps on writes
+- If-None-Match answered with 304 before any item is serialized
+- Pages encoded with the cached per-model serializers of json_encoding
+"""
+
+import uuid
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+
+from services.json_encoding import Computed, FastJSONResponse, model_field_names, serializer_for
+
+# Distinguishes versions of two processes (counters restart at zero)
+BOOT_ID = uuid.uuid4().hex[:8]
+
+MAX_PAGE_SIZE = 1000
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    return [f.strip() for f in fields.split(",") if f.strip()] or None
+
+
+def select_fields(available: Sequence[str], fields: Optional[str]) -> Optional[List[str]]:
+    """Requested fields (validated against `available`), or None for all of them"""
+    selected = parse_fields(fields)
+    if selected:
+        unknown = [f for f in selected if f not in available]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}. "
+                                                        f"Available: {', '.join(available)}")
+    return selected
+
+
+def make_etag(request: Request, name: str, version: int) -> str:
+    # The query string (limit, cursor, fields, filters) selects a different
+    # representation of the same collection version
+    query = zlib.crc32(str(request.query_params).encode())
+    return f'W/"{name}-{BOOT_ID}-{version}-{query:08x}"'
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))
+
+
+def project(items: List[Dict[str, Any]], fields: Optional[str]) -> List[Dict[str, Any]]:
+    """Keep only the requested keys of each item"""
+    if not items:
+        return items
+    selected = select_fields(list(items[0].keys()), fields)
+    if selected is None:
+        return items
+    return [{f: item[f] for f in selected} for item in items]
+
+
+def list_response(request: Request, name: str, version: int,
+                  load: Callable[[], Sequence[Any]], item_type: type,
+                  list_fields: Optional[Tuple[str, ...]] = None, computed: Computed = (),
+                  limit: Optional[int] = None, cursor: Optional[str] = None,
+                  fields: Optional[str] = None) -> Response:
+    """
+    Page, project and tag a collection of `item_type` objects.
+
+    Items expose `list_fields` (default: every model field) plus `computed`
+    values. `load()` returns the items in a stable order and is only called
+    when the client's ETag is stale; only the items on the page are
+    serialized, straight from their attributes to JSON bytes.
+    The body stays a JSON array; `X-Next-Cursor` is set when more items
+    remain and is passed back as `cursor` for the next page.
+    """
+    etag = make_etag(request, name, version)
+    if not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    list_fields = model_field_names(item_type) if list_fields is None else list_fields
+    selected = select_fields(list_fields + tuple(n for n, _ in computed), fields)
+    if selected is not None:
+        list_fields = tuple(f for f in selected if f in list_fields)
+        computed = tuple((n, func) for n, func in computed if n in selected)
+    serialize = serializer_for(item_type, list_fields, computed)
+
+    start = 0
+    if cursor:
+        try:
+            start = int(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
+        if start < 0:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
+
+    items = load()
+    end = len(items) if limit is None else start + max(1, min(limit, MAX_PAGE_SIZE))
+
+    headers = {"ETag": etag}
+    if end < len(items):
+        headers["X-Next-Cursor"] = str(end)
+    return FastJSONResponse([serialize(item) for item in items[start:end]], headers=headers)
+
+
+def page_response(request: Request, etag: str, page: List[Dict[str, Any]],
+                  next_cursor: Optional[str] = None, fields: Optional[str] = None) -> Response:
+    """Project and tag a page a store has already cut (e.g. with its own cursor)"""
+    headers = {"ETag": etag}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return FastJSONResponse(project(page, fields), headers=headers)
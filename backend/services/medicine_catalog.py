@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Medicine Catalog for the Medicine Recommendation System
+- Formulary loaded from CSV or Parquet into typed column arrays, not one object per medicine
+- Categories and list values (side effects, symptoms, conditions) interned as integer codes
+- Inverted index from treated symptom/condition to the medicines treating it
+- Binary snapshot (one .npy file per array) memory-mapped at startup
+
+Build a snapshot next to a source file (picked up by load_catalog while the
+source is unchanged):
+
+    python services/medicine_catalog.py catalog/medicines.csv
+"""
+
+import csv
+import json
+import os
+import sys
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+TEXT_COLUMNS = ("id", "name", "description", "dosage")
+LIST_COLUMNS = ("side_effects", "contraindications", "symptoms_treated", "conditions_treated")
+NUMERIC_COLUMNS = {
+    "price": np.float64,
+    "stock_quantity": np.int64,
+    "min_stock_level": np.int64,
+    "prescription_required": np.bool_,
+}
+# Columns feeding the symptom/condition -> medicines index
+INDEXED_COLUMNS = ("symptoms_treated", "conditions_treated")
+
+LIST_SEPARATOR = ";"
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_SUFFIX = ".snapshot"
+
+
+class _TextColumn:
+    """Strings as one UTF-8 byte array plus offsets; a value is decoded only when read"""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_values(cls, values: Sequence[str]) -> "_TextColumn":
+        encoded = [value.encode("utf-8") for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __getitem__(self, row: int) -> str:
+        return self.blob[self.offsets[row]:self.offsets[row + 1]].tobytes().decode("utf-8")
+
+    def values(self) -> List[str]:
+        data = self.blob.tobytes()
+        bounds = self.offsets.tolist()
+        return [data[a:b].decode("utf-8") for a, b in zip(bounds, bounds[1:])]
+
+
+class _ListColumn:
+    """Per-row lists of strings stored as codes into one interned vocabulary"""
+
+    def __init__(self, vocabulary: List[str], codes: np.ndarray, offsets: np.ndarray):
+        self.vocabulary = [sys.intern(value) for value in vocabulary]
+        self.codes = codes
+        self.offsets = offsets
+
+    def __getitem__(self, row: int) -> List[str]:
+        vocabulary = self.vocabulary
+        return [vocabulary[code] for code in self.codes[self.offsets[row]:self.offsets[row + 1]].tolist()]
+
+    def entry_rows(self) -> np.ndarray:
+        """Row number of every stored code"""
+        return np.repeat(np.arange(len(self.offsets) - 1, dtype=np.int64), np.diff(self.offsets))
+
+
+class _InvertedIndex:
+    """Lower-cased term -> sorted row numbers, as one postings array plus per-term offsets"""
+
+    def __init__(self, terms: List[str], rows: np.ndarray, offsets: np.ndarray):
+        self.terms = terms
+        self.term_ids = {term: i for i, term in enumerate(terms)}
+        self.rows = rows
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, columns: Sequence[_ListColumn]) -> "_InvertedIndex":
+        term_ids: Dict[str, int] = {}
+        entry_terms = []
+        entry_rows = []
+        for column in columns:
+            remap = np.array([term_ids.setdefault(value.lower(), len(term_ids)) for value in column.vocabulary],
+                             dtype=np.int64)
+            entry_terms.append(remap[column.codes] if remap.size else np.zeros(0, dtype=np.int64))
+            entry_rows.append(column.entry_rows())
+        terms = np.concatenate(entry_terms)
+        rows = np.concatenate(entry_rows)
+
+        order = np.lexsort((rows, terms))
+        terms, rows = terms[order], rows[order]
+        # A medicine listing a term under both columns is posted once
+        keep = np.ones(terms.size, dtype=bool)
+        keep[1:] = (terms[1:] != terms[:-1]) | (rows[1:] != rows[:-1])
+        terms, rows = terms[keep], rows[keep]
+        offsets = np.searchsorted(terms, np.arange(len(term_ids) + 1)).astype(np.int64)
+        return cls(list(term_ids), rows, offsets)
+
+    def lookup(self, term: str) -> np.ndarray:
+        term_id = self.term_ids.get(term.strip().lower())
+        if term_id is None:
+            return np.zeros(0, dtype=np.int64)
+        return self.rows[self.offsets[term_id]:self.offsets[term_id + 1]]
+
+
+class CatalogView(Sequence):
+    """Read-only sequence over the catalog; items are built by `factory(row)` on access"""
+
+    def __init__(self, catalog: "MedicineCatalog", factory: Callable[[int], Any]):
+        self.catalog = catalog
+        self.factory = factory
+
+    def __len__(self) -> int:
+        return len(self.catalog)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.factory(row) for row in range(*index.indices(len(self.catalog)))]
+        if index < 0:
+            index += len(self.catalog)
+        if not 0 <= index < len(self.catalog):
+            raise IndexError("catalog index out of range")
+        return self.factory(index)
+
+
+def _parse_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    items = value.split(LIST_SEPARATOR) if isinstance(value, str) else [str(item) for item in value]
+    return [item for item in map(str.strip, items) if item]
+
+
+def _parse_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes", "y")
+    return bool(value)
+
+
+class MedicineCatalog:
+    """
+    Columnar medicine store.
+
+    Rows are addressed by position; `row_of` maps a medicine ID to its row.
+    Columns are read-only and may be memory-mapped views of a snapshot;
+    stock_quantity and min_stock_level hold the levels as loaded (live stock
+    is kept by the inventory engine).
+    """
+
+    def __init__(self, text: Dict[str, _TextColumn], lists: Dict[str, _ListColumn],
+                 categories: List[str], category_codes: np.ndarray, numeric: Dict[str, np.ndarray],
+                 index: Optional[_InvertedIndex] = None):
+        self.text = text
+        self.lists = lists
+        self.categories = [sys.intern(category) for category in categories]
+        self.category_codes = category_codes
+        self.numeric = numeric
+        self.index = index or _InvertedIndex.build([lists[column] for column in INDEXED_COLUMNS])
+        self._ids = text["id"].values()
+        self._rows = {medicine_id: row for row, medicine_id in enumerate(self._ids)}
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping[str, Any]]) -> "MedicineCatalog":
+        text: Dict[str, List[str]] = {column: [] for column in TEXT_COLUMNS}
+        # List values are coded as they are read: {value: code}, codes, per-row lengths
+        vocabularies: Dict[str, Dict[str, int]] = {column: {} for column in LIST_COLUMNS}
+        codes: Dict[str, List[int]] = {column: [] for column in LIST_COLUMNS}
+        lengths: Dict[str, List[int]] = {column: [] for column in LIST_COLUMNS}
+        numeric: Dict[str, List[Any]] = {column: [] for column in NUMERIC_COLUMNS}
+        category_index: Dict[str, int] = {}
+        category_codes = []
+        seen = set()
+
+        for line, record in enumerate(records, start=1):
+            medicine_id = str(record.get("id") or "").strip()
+            if not medicine_id:
+                raise ValueError(f"Catalog row {line}: missing id")
+            if medicine_id in seen:
+                raise ValueError(f"Catalog row {line}: duplicate id {medicine_id}")
+            seen.add(medicine_id)
+            try:
+                for column in TEXT_COLUMNS:
+                    text[column].append(str(record.get(column) or "").strip())
+                for column in LIST_COLUMNS:
+                    values = _parse_list(record.get(column))
+                    vocabulary = vocabularies[column]
+                    codes[column].extend([vocabulary.setdefault(value, len(vocabulary)) for value in values])
+                    lengths[column].append(len(values))
+                numeric["price"].append(float(record.get("price") or 0))
+                numeric["stock_quantity"].append(int(record.get("stock_quantity") or 0))
+                numeric["min_stock_level"].append(int(record.get("min_stock_level") or 0))
+                numeric["prescription_required"].append(_parse_bool(record.get("prescription_required")))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Catalog row {line} ({medicine_id}): {e}")
+            category = str(record.get("category") or "").strip()
+            category_codes.append(category_index.setdefault(category, len(category_index)))
+
+        lists = {}
+        for column in LIST_COLUMNS:
+            offsets = np.zeros(len(lengths[column]) + 1, dtype=np.int64)
+            np.cumsum(lengths[column], out=offsets[1:])
+            lists[column] = _ListColumn(list(vocabularies[column]), np.array(codes[column], dtype=np.int32), offsets)
+
+        return cls(
+            {column: _TextColumn.from_values(values) for column, values in text.items()},
+            lists,
+            list(category_index),
+            np.array(category_codes, dtype=np.int16),
+            {column: np.array(values, dtype=NUMERIC_COLUMNS[column]) for column, values in numeric.items()}
+        )
+
+    @classmethod
+    def from_csv(cls, path: str) -> "MedicineCatalog":
+        """CSV with a header row; list columns are ';'-separated"""
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return cls.from_records(csv.DictReader(f))
+
+    @classmethod
+    def from_parquet(cls, path: str) -> "MedicineCatalog":
+        """Parquet file; list columns may be list<string> or ';'-separated strings"""
+        if pq is None:
+            raise ImportError("Reading Parquet catalogs requires pyarrow (pip install pyarrow)")
+        table = pq.read_table(path).to_pydict()
+        columns = list(table)
+        return cls.from_records(dict(zip(columns, values)) for values in zip(*table.values()))
+
+    # Snapshots
+
+    def save_snapshot(self, path: str, source: Optional[str] = None):
+        os.makedirs(path, exist_ok=True)
+        arrays = {"category.codes": self.category_codes,
+                  "index.rows": self.index.rows, "index.offsets": self.index.offsets}
+        for column, values in self.text.items():
+            arrays[f"{column}.blob"] = values.blob
+            arrays[f"{column}.offsets"] = values.offsets
+        for column, values in self.lists.items():
+            arrays[f"{column}.codes"] = values.codes
+            arrays[f"{column}.offsets"] = values.offsets
+        for column, values in self.numeric.items():
+            arrays[column] = values
+        for name, values in arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(values))
+
+        meta = {
+            "format": SNAPSHOT_FORMAT,
+            "count": len(self),
+            "categories": self.categories,
+            "vocabularies": {column: values.vocabulary for column, values in self.lists.items()},
+            "index_terms": self.index.terms,
+            "source": os.path.basename(source) if source else None,
+            "source_mtime": os.path.getmtime(source) if source else None,
+        }
+        # Written last: a snapshot without meta.json is incomplete and ignored
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def open_snapshot(cls, path: str) -> "MedicineCatalog":
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported catalog snapshot format {meta.get('format')} in {path}")
+
+        def array(name: str) -> np.ndarray:
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        return cls(
+            {column: _TextColumn(array(f"{column}.blob"), array(f"{column}.offsets")) for column in TEXT_COLUMNS},
+            {column: _ListColumn(meta["vocabularies"][column], array(f"{column}.codes"), array(f"{column}.offsets"))
+             for column in LIST_COLUMNS},
+            meta["categories"],
+            array("category.codes"),
+            {column: array(column) for column in NUMERIC_COLUMNS},
+            _InvertedIndex(meta["index_terms"], array("index.rows"), array("index.offsets"))
+        )
+
+    # Reads
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, medicine_id: str) -> bool:
+        return medicine_id in self._rows
+
+    def row_of(self, medicine_id: str) -> Optional[int]:
+        return self._rows.get(medicine_id)
+
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """All fields of one row as plain Python values (category as its string value)"""
+        record: Dict[str, Any] = {"id": self._ids[row]}
+        for column in TEXT_COLUMNS[1:]:
+            record[column] = self.text[column][row]
+        record["category"] = self.categories[self.category_codes[row]]
+        for column in LIST_COLUMNS:
+            record[column] = self.lists[column][row]
+        for column, values in self.numeric.items():
+            record[column] = values[row].item()
+        return record
+
+    def values(self, column: str) -> List[Any]:
+        """A whole text, list, category or numeric column as Python values"""
+        if column in self.text:
+            return self.text[column].values()
+        if column in self.lists:
+            values = self.lists[column]
+            return [values[row] for row in range(len(self))]
+        if column == "category":
+            return [self.categories[code] for code in self.category_codes.tolist()]
+        return self.numeric[column].tolist()
+
+    def view(self, factory: Callable[[int], Any]) -> CatalogView:
+        return CatalogView(self, factory)
+
+    def rows_treating(self, term: str) -> np.ndarray:
+        """Rows listing `term` (case-insensitive) among symptoms or conditions treated"""
+        return self.index.lookup(term)
+
+
+def snapshot_path(source: str) -> str:
+    return source + SNAPSHOT_SUFFIX
+
+
+def load_catalog(path: str) -> MedicineCatalog:
+    """
+    Open a catalog from a snapshot directory or a .csv/.parquet source.
+
+    A source with an up-to-date snapshot beside it (see snapshot_path) is
+    memory-mapped from the snapshot instead of parsed.
+    """
+    if os.path.isdir(path):
+        return MedicineCatalog.open_snapshot(path)
+
+    snapshot = snapshot_path(path)
+    meta_path = os.path.join(snapshot, "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") == SNAPSHOT_FORMAT and meta.get("source_mtime") == os.path.getmtime(path):
+            return MedicineCatalog.open_snapshot(snapshot)
+
+    if path.endswith(".parquet"):
+        return MedicineCatalog.from_parquet(path)
+    return MedicineCatalog.from_csv(path)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python services/medicine_catalog.py <catalog.csv|catalog.parquet> [snapshot_dir]")
+        sys.exit(1)
+    source = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) > 2 else snapshot_path(source)
+    catalog = MedicineCatalog.from_parquet(source) if source.endswith(".parquet") else MedicineCatalog.from_csv(source)
+    catalog.save_snapshot(target, source)
+    print(f"Wrote {len(catalog):,} medicines to {target}")
+
+
+if __name__ == "__main__":
+    main()
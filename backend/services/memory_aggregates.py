@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Rolling Memory Aggregates for the Infinite Memory backend
+- Per-patient daily buckets (count, importance sum, sentiment counters)
+- Updated incrementally on every stored interaction, keyed by the store's
+  sequence numbers so a record is never counted twice
+- A report over N days is an O(N) merge of buckets instead of a history scan
+"""
+
+import threading
+from bisect import bisect_right, insort
+from datetime import datetime, time
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from services.memory_store import MemoryStore
+
+SENTIMENTS = ("positive", "negative", "neutral")
+
+
+class DailyBucket:
+    """Aggregated interactions for one patient on one calendar day"""
+
+    __slots__ = ("count", "importance_sum", "positive", "negative", "neutral")
+
+    def __init__(self):
+        self.count = 0
+        self.importance_sum = 0.0
+        self.positive = 0
+        self.negative = 0
+        self.neutral = 0
+
+    def add(self, importance: float, sentiment: str):
+        self.count += 1
+        self.importance_sum += importance
+        if sentiment in SENTIMENTS:
+            setattr(self, sentiment, getattr(self, sentiment) + 1)
+
+    def merge(self, other: "DailyBucket"):
+        self.count += other.count
+        self.importance_sum += other.importance_sum
+        self.positive += other.positive
+        self.negative += other.negative
+        self.neutral += other.neutral
+
+    def dominant_sentiment(self) -> str:
+        # Ties resolve towards "negative" so concerning days are not hidden
+        return max(("negative", "positive", "neutral"), key=lambda s: getattr(self, s))
+
+
+class MemoryAggregates:
+    """
+    Daily buckets for every patient.
+
+    A patient's buckets are built from `store.scan` the first time they are
+    needed (e.g. after a restart); later writes are added with their sequence
+    number. Records the initial scan already counted are skipped, so a write
+    that races with the scan is counted exactly once. The partial day at the
+    edge of a report window is read from `store.range`.
+    """
+
+    def __init__(self, store: MemoryStore):
+        self._store = store
+        self._buckets: Dict[str, Dict[str, DailyBucket]] = {}
+        self._days: Dict[str, List[str]] = {}
+        self._loaded_upto: Dict[str, int] = {}   # highest sequence number read by the initial scan
+        self._lock = threading.RLock()
+
+    def _add(self, user_id: str, record: Dict[str, Any]):
+        day = record["timestamp"][:10]
+        buckets = self._buckets[user_id]
+        bucket = buckets.get(day)
+        if bucket is None:
+            bucket = buckets[day] = DailyBucket()
+            days = self._days[user_id]
+            if not days or day > days[-1]:
+                days.append(day)
+            else:
+                insort(days, day)
+        analysis = record["analysis"]
+        bucket.add(analysis["importance_score"], analysis["sentiment"])
+
+    def _ensure_loaded(self, user_id: str):
+        """Build a patient's buckets from the store if they are not cached"""
+        if user_id in self._buckets:
+            return
+        self._buckets[user_id] = {}
+        self._days[user_id] = []
+        loaded_upto = -1
+        for seq, record in self._store.scan(user_id):
+            self._add(user_id, record)
+            loaded_upto = max(loaded_upto, seq)
+        self._loaded_upto[user_id] = loaded_upto
+
+    def add(self, user_id: str, seq: int, record: Dict[str, Any]):
+        """Account for a record that has already been written to the store as `seq`"""
+        self.add_many(user_id, [(seq, record)])
+
+    def add_many(self, user_id: str, items: Iterable[Tuple[int, Dict[str, Any]]]):
+        with self._lock:
+            self._ensure_loaded(user_id)
+            loaded_upto = self._loaded_upto[user_id]
+            for seq, record in items:
+                if seq > loaded_upto:
+                    self._add(user_id, record)
+
+    def summarize(self, user_id: str, since: datetime, trend_days: int = 7) -> Dict[str, Any]:
+        """Totals and daily trends for records newer than `since`"""
+        with self._lock:
+            self._ensure_loaded(user_id)
+            buckets = self._buckets[user_id]
+            days = self._days[user_id]
+
+            # Whole days after the cutoff day come straight from the buckets
+            cutoff_day = since.date().isoformat()
+            window = [(day, buckets[day]) for day in days[bisect_right(days, cutoff_day):]]
+
+        # The cutoff day itself is only partly inside the window
+        edge = DailyBucket()
+        for record in self._store.range(user_id, since, datetime.combine(since.date(), time.max)):
+            edge.add(record["analysis"]["importance_score"], record["analysis"]["sentiment"])
+        if edge.count:
+            window.insert(0, (cutoff_day, edge))
+
+        total = DailyBucket()
+        for _, bucket in window:
+            total.merge(bucket)
+
+        trends = [
+            {
+                "date": day,
+                "interactions": bucket.count,
+                "avg_importance": bucket.importance_sum / bucket.count,
+                "sentiment": bucket.dominant_sentiment()
+            }
+            for day, bucket in reversed(window[-trend_days:])
+        ]
+
+        return {
+            "total_interactions": total.count,
+            "average_importance": total.importance_sum / total.count if total.count else 0.0,
+            "sentiment_distribution": {s: getattr(total, s) for s in SENTIMENTS},
+            "memory_trends": trends
+        }
+
+    def forget(self, user_id: Optional[str] = None):
+        """Drop cached buckets (all patients if no ID is given); they rebuild on demand"""
+        with self._lock:
+            if user_id is None:
+                self._buckets.clear()
+                self._days.clear()
+                self._loaded_upto.clear()
+            else:
+                self._buckets.pop(user_id, None)
+                self._days.pop(user_id, None)
+                self._loaded_upto.pop(user_id, None)
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Memory Search for the Infinite Memory backend
+- Per-user inverted index over memory text, entities and topics
+- Updated incrementally as memories are stored
+- Holds postings and per-document features only; the top-k records are
+  read back from the memory store by sequence number
+- BM25 relevance weighted by recency and importance, top-k retrieval
+- Uses NumPy for score accumulation when available, pure Python otherwise
+"""
+
+import math
+import re
+import heapq
+import threading
+from array import array
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from services.memory_store import MemoryStore
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9'\-]*")
+
+STOP_WORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from', 'had', 'has',
+    'have', 'i', 'in', 'is', 'it', 'its', 'me', 'my', 'of', 'on', 'or', 'so', 'that', 'the',
+    'this', 'to', 'was', 'we', 'were', 'what', 'when', 'with', 'you', 'your', 'did', 'do'
+])
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens without stop words"""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOP_WORDS]
+
+
+class _UserIndex:
+    """Postings and per-document features for one user"""
+
+    __slots__ = ("postings", "freqs", "doc_len", "doc_ts", "doc_importance", "doc_seq", "total_len",
+                 "block_ts", "block_importance", "loaded_upto")
+
+    def __init__(self):
+        self.postings: Dict[str, array] = {}   # term -> doc ids (ascending)
+        self.freqs: Dict[str, array] = {}      # term -> term frequency per doc id
+        self.doc_len = array('I')
+        self.doc_ts = array('d')
+        self.doc_importance = array('d')
+        self.doc_seq = array('Q')              # doc id -> memory store sequence number
+        self.total_len = 0
+        self.block_ts = array('d')             # newest timestamp per block of doc ids
+        self.block_importance = array('d')     # highest importance per block of doc ids
+        self.loaded_upto = -1                  # highest sequence number read by the initial scan
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+
+class MemorySearchIndex:
+    """
+    Inverted index of every patient's stored memories.
+
+    A patient's index is built lazily from `store.scan` the first time they
+    are searched or written; later writes are added with their sequence
+    number. Records themselves stay in the store: a search reads back only
+    the k it returns.
+
+    Final score = BM25 * (1 + importance_weight * importance)
+                       * (recency_floor + (1 - recency_floor) * 0.5 ** (age_days / half_life_days))
+    """
+
+    def __init__(self, store: MemoryStore,
+                 k1: float = 1.2, b: float = 0.75, half_life_days: float = 30.0,
+                 recency_floor: float = 0.3, importance_weight: float = 1.0,
+                 block_size: int = 8192):
+        self._store = store
+        self.k1 = k1
+        self.b = b
+        self.half_life_days = half_life_days
+        self.recency_floor = recency_floor
+        self.importance_weight = importance_weight
+        self.block_size = block_size
+        self._users: Dict[str, _UserIndex] = {}
+        self._lock = threading.RLock()
+
+    # Indexing
+
+    @staticmethod
+    def document_terms(record: Dict[str, Any]) -> List[str]:
+        analysis = record.get("analysis", {})
+        parts = [record.get("text", "")]
+        parts.extend(analysis.get("entities") or [])
+        parts.extend(analysis.get("topics") or [])
+        return tokenize(" ".join(parts))
+
+    def _add(self, index: _UserIndex, seq: int, record: Dict[str, Any]):
+        doc_id = len(index)
+        terms = self.document_terms(record)
+        counts: Dict[str, int] = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+
+        for term, tf in counts.items():
+            postings = index.postings.get(term)
+            if postings is None:
+                postings = index.postings[term] = array('I')
+                index.freqs[term] = array('H')
+            postings.append(doc_id)
+            index.freqs[term].append(min(tf, 0xFFFF))
+
+        ts = datetime.fromisoformat(record["timestamp"]).timestamp()
+        importance = float(record.get("analysis", {}).get("importance_score", 0.0))
+        index.doc_len.append(len(terms))
+        index.doc_ts.append(ts)
+        index.doc_importance.append(importance)
+        if doc_id % self.block_size == 0:
+            index.block_ts.append(ts)
+            index.block_importance.append(importance)
+        else:
+            index.block_ts[-1] = max(index.block_ts[-1], ts)
+            index.block_importance[-1] = max(index.block_importance[-1], importance)
+        index.doc_seq.append(seq)
+        index.total_len += len(terms)
+
+    def _ensure_loaded(self, user_id: str) -> _UserIndex:
+        index = self._users.get(user_id)
+        if index is not None:
+            return index
+        index = _UserIndex()
+        for seq, record in self._store.scan(user_id):
+            self._add(index, seq, record)
+            index.loaded_upto = max(index.loaded_upto, seq)
+        self._users[user_id] = index
+        return index
+
+    def add(self, user_id: str, seq: int, record: Dict[str, Any]):
+        """Index a record that has already been written to the store as `seq`"""
+        self.add_many(user_id, [(seq, record)])
+
+    def add_many(self, user_id: str, items: Iterable[Tuple[int, Dict[str, Any]]]):
+        with self._lock:
+            index = self._ensure_loaded(user_id)
+            for seq, record in items:
+                # The initial scan already saw records stored before it started
+                if seq > index.loaded_upto:
+                    self._add(index, seq, record)
+
+    def forget(self, user_id: Optional[str] = None):
+        """Drop cached indexes (all users if no ID is given); they rebuild on demand"""
+        with self._lock:
+            if user_id is None:
+                self._users.clear()
+            else:
+                self._users.pop(user_id, None)
+
+    # Retrieval
+
+    def _search_numpy(self, index: _UserIndex, terms: List[str], avgdl: float,
+                      k: int, now_ts: float) -> List[Tuple[float, float, int]]:
+        """
+        Score one block of doc ids at a time, most promising block first.
+
+        Scoring stops once the best score the next block could possibly reach
+        (its query terms saturated, its highest importance, its most recent
+        timestamp) cannot beat the current k-th result. Once only rare terms
+        can still lift a document past the k-th result, their postings in all
+        remaining blocks are scored in a single pass.
+        """
+        n_docs = len(index)
+        k1, b = self.k1, self.b
+        weight, floor = self.importance_weight, self.recency_floor
+        half_life = self.half_life_days * 86400.0
+        doc_len = np.frombuffer(index.doc_len, dtype=np.uint32)
+        doc_ts = np.frombuffer(index.doc_ts, dtype=np.float64)
+        doc_importance = np.frombuffer(index.doc_importance, dtype=np.float64)
+
+        term_data = []
+        for term in terms:
+            postings = index.postings.get(term)
+            if postings is None:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            term_data.append((idf, np.frombuffer(postings, dtype=np.uint32), np.frombuffer(index.freqs[term], dtype=np.uint16)))
+        if not term_data:
+            return []
+
+        def recency(ts):
+            return floor + (1 - floor) * np.power(0.5, np.maximum(now_ts - ts, 0.0) / half_life)
+
+        # Rarest terms last: the common, low-impact terms are the first to be
+        # demoted to "non-essential" once the k-th score is known (MaxScore)
+        term_data.sort(key=lambda item: item[0])
+        upper = [idf * (k1 + 1) for idf, _, _ in term_data]
+
+        # Bound the best score each block of doc ids can reach: saturated BM25
+        # for the query terms present in it, times its best prior
+        block = self.block_size
+        priors = (1 + weight * np.frombuffer(index.block_importance, dtype=np.float64)) \
+            * recency(np.frombuffer(index.block_ts, dtype=np.float64))
+        if sum(ids.size for _, ids, _ in term_data) <= block:
+            # Few postings: one pass over all of them beats visiting blocks
+            block = n_docs
+            priors = priors.max(keepdims=True)
+        edges = np.arange(0, n_docs + block, block)
+        edges[-1] = n_docs
+        bounds = np.zeros(priors.size)
+        spans = []
+        for (idf, ids, freqs), term_upper in zip(term_data, upper):
+            cuts = np.searchsorted(ids, edges)
+            spans.append(cuts)
+            bounds += np.where(np.diff(cuts) > 0, term_upper, 0.0)
+        bounds *= priors
+
+        def weigh(idf, local, freqs, lo):
+            tf = freqs.astype(np.float64)
+            return (idf * (k1 + 1)) * tf / (tf + (k1 * (1 - b) + (k1 * b / avgdl) * doc_len[lo + local]))
+
+        def score(segments, lo, size, essential_from, eligible=None):
+            """(doc ids, BM25) of the documents in one span matching an essential term"""
+            candidates = mask = None
+            if essential_from:
+                essential = [local for local, _ in segments[essential_from:] if local.size]
+                if not essential:
+                    return None
+                if eligible is not None or sum(local.size for local in essential) * 8 < size:
+                    candidates = np.unique(np.concatenate(essential))
+                    if eligible is not None:
+                        candidates = candidates[eligible(candidates)]
+                        if not candidates.size:
+                            return None
+                else:
+                    mask = np.zeros(size, dtype=bool)
+                    for local in essential:
+                        mask[local] = True
+
+            # Once some terms are non-essential only the candidates' postings
+            # are weighed: looked up when they are few, masked otherwise
+            locals_, weights = [], []
+            for (idf, _, _), (local, freqs) in zip(term_data, segments):
+                if mask is not None:
+                    keep = mask[local]
+                    local, freqs = local[keep], freqs[keep]
+                elif candidates is not None and local.size:
+                    pos = np.minimum(np.searchsorted(local, candidates), local.size - 1)
+                    pos = pos[local[pos] == candidates]
+                    local, freqs = local[pos], freqs[pos]
+                if local.size:
+                    locals_.append(local)
+                    weights.append(weigh(idf, local, freqs, lo))
+            local = np.concatenate(locals_)
+            weights = np.concatenate(weights)
+            if local.size * 8 < size:
+                docs, inverse = np.unique(local, return_inverse=True)
+                bm25 = np.bincount(inverse, weights)
+            else:
+                bm25 = np.bincount(local, weights)
+                docs = np.flatnonzero(bm25)
+                bm25 = bm25[docs]
+            return docs.astype(np.int64) + lo, bm25
+
+        best_final = np.empty(0)
+        best_bm25 = np.empty(0)
+        best_docs = np.empty(0, dtype=np.int64)
+        threshold = -1.0
+
+        def essential_terms(prior):
+            """Index of the first term a document must contain to beat the threshold"""
+            essential_from = 0
+            reachable = 0.0
+            while essential_from < len(term_data) and (reachable + upper[essential_from]) * prior <= threshold:
+                reachable += upper[essential_from]
+                essential_from += 1
+            return essential_from
+
+        # Most promising blocks first, so the k-th score rises quickly
+        visit = np.argsort(-bounds, kind="stable")
+        for position, block_no in enumerate(visit):
+            if bounds[block_no] <= threshold or bounds[block_no] == 0.0:
+                break
+
+            remaining = visit[position:]
+            remaining = remaining[bounds[remaining] > threshold]
+            essential_from = essential_terms(priors[remaining].max())
+            if essential_from and sum(ids.size for _, ids, _ in term_data[essential_from:]) * 8 < block:
+                # Only rare terms can still lift a document past the threshold:
+                # score their postings in every remaining block in one pass
+                live = np.zeros(bounds.size, dtype=bool)
+                live[remaining] = True
+                found = score([(ids, freqs) for _, ids, freqs in term_data], 0, n_docs, essential_from,
+                              eligible=lambda docs: live[docs // block])
+                blocks_left = False
+            else:
+                lo = int(edges[block_no])
+                segments = [(ids[cuts[block_no]:cuts[block_no + 1]] - lo, freqs[cuts[block_no]:cuts[block_no + 1]])
+                            for (_, ids, freqs), cuts in zip(term_data, spans)]
+                found = score(segments, lo, int(edges[block_no + 1]) - lo, essential_terms(priors[block_no]))
+                blocks_left = True
+            if found is not None:
+                docs, bm25 = found
+                final = bm25 * (1 + weight * doc_importance[docs]) * recency(doc_ts[docs])
+                best_final = np.concatenate((best_final, final))
+                best_bm25 = np.concatenate((best_bm25, bm25))
+                best_docs = np.concatenate((best_docs, docs))
+                if best_final.size > k:
+                    keep = np.argpartition(-best_final, k - 1)[:k]
+                    best_final, best_bm25, best_docs = best_final[keep], best_bm25[keep], best_docs[keep]
+                if best_final.size >= k:
+                    threshold = best_final.min()
+            if not blocks_left:
+                break
+
+        order = np.argsort(-best_final, kind="stable")
+        return [(float(best_final[i]), float(best_bm25[i]), int(best_docs[i])) for i in order]
+
+    def _bm25_python(self, index: _UserIndex, terms: List[str], avgdl: float):
+        n_docs = len(index)
+        k1, b = self.k1, self.b
+        doc_len = index.doc_len
+        scores: Dict[int, float] = {}
+        for term in terms:
+            postings = index.postings.get(term)
+            if postings is None:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in zip(postings, index.freqs[term]):
+                weight = idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_len[doc_id] / avgdl))
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+        return scores
+
+    def search(self, user_id: str, query: str, k: int = 5,
+               now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Top-k memories for a query as [{"score", "bm25", "record"}], best first"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or k <= 0:
+            return []
+        now_ts = (now or datetime.now()).timestamp()
+        half_life = self.half_life_days * 86400.0
+        floor = self.recency_floor
+        weight = self.importance_weight
+
+        with self._lock:
+            index = self._ensure_loaded(user_id)
+            if not len(index):
+                return []
+            avgdl = (index.total_len / len(index)) or 1.0
+
+            if np is not None:
+                best = self._search_numpy(index, terms, avgdl, k, now_ts)
+            else:
+                scores = self._bm25_python(index, terms, avgdl)
+                doc_ts, doc_importance = index.doc_ts, index.doc_importance
+
+                def final_score(item):
+                    doc_id, bm25 = item
+                    age = max(now_ts - doc_ts[doc_id], 0.0)
+                    return bm25 * (1 + weight * doc_importance[doc_id]) * (floor + (1 - floor) * 0.5 ** (age / half_life))
+
+                best = [(score, bm25, doc_id) for score, (doc_id, bm25)
+                        in heapq.nlargest(k, ((final_score(item), item) for item in scores.items()),
+                                          key=lambda pair: pair[0])]
+            seqs = [index.doc_seq[doc_id] for _, _, doc_id in best]
+
+        records = self._store.get(user_id, seqs)
+        return [
+            {"score": score, "bm25": bm25, "record": record}
+            for (score, bm25, _), record in zip(best, records)
+        ]
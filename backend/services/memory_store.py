@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Memory Store for the Infinite Memory backend
+- Pluggable storage for patient interactions (text, audio, image)
+- Append-only segmented log per user, durable across restarts
+- In-memory time index so "last N days" is a binary search, not a full scan
+- Bounded cache of hot segments to keep RAM use flat as history grows
+- Per-user sequence numbers (append order) so indexes can refer to records
+  without holding copies of them
+"""
+
+import os
+import json
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
+from urllib.parse import quote, unquote
+
+# Default location of the on-disk log (relative to the backend directory)
+DEFAULT_MEMORY_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'memory'))
+
+
+def _to_epoch(value: Any) -> float:
+    """Convert an ISO timestamp or datetime into epoch seconds"""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _line_ends(path: str) -> List[int]:
+    """Byte offset after each complete (newline-terminated) line of a file"""
+    ends: List[int] = []
+    if not os.path.exists(path):
+        return ends
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            ends.append(offset)
+    return ends
+
+
+class MemoryStore(ABC):
+    """
+    Interface shared by all memory store backends.
+
+    Every record gets a sequence number: its position in the user's append
+    order, starting at 0 and stable across restarts.
+    """
+
+    @abstractmethod
+    def append(self, user_id: str, record: Dict[str, Any]) -> int:
+        """Append a record for a user (it must carry an ISO `timestamp`); returns its sequence number"""
+
+    def append_many(self, items: Iterable[Tuple[str, Dict[str, Any]]]) -> List[int]:
+        """Append many (user_id, record) pairs; returns their sequence numbers in order"""
+        return [self.append(user_id, record) for user_id, record in items]
+
+    @abstractmethod
+    def range(self, user_id: str, since: Optional[datetime] = None,
+              until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Records with since < timestamp <= until, oldest first"""
+
+    @abstractmethod
+    def recent(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        """The `limit` most recent records, oldest first"""
+
+    @abstractmethod
+    def count(self, user_id: str) -> int:
+        """Total number of records stored for a user"""
+
+    def count_since(self, user_id: str, since: datetime) -> int:
+        """Number of records newer than `since`"""
+        return len(self.range(user_id, since=since))
+
+    @abstractmethod
+    def users(self) -> List[str]:
+        """All user IDs with at least one record"""
+
+    @abstractmethod
+    def scan(self, user_id: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """(sequence number, record) for every record stored when the scan starts, in append order"""
+
+    @abstractmethod
+    def get(self, user_id: str, seqs: Iterable[int]) -> List[Dict[str, Any]]:
+        """Records by sequence number, in the order given"""
+
+
+class InMemoryMemoryStore(MemoryStore):
+    """Volatile store kept entirely in process memory (development and tests)"""
+
+    def __init__(self):
+        self._records: Dict[str, List[Dict[str, Any]]] = {}   # append order (index = sequence number)
+        self._timestamps: Dict[str, array] = {}               # sorted
+        self._order: Dict[str, array] = {}                    # sequence number of each timestamp
+        self._lock = threading.RLock()
+
+    def append(self, user_id: str, record: Dict[str, Any]) -> int:
+        ts = _to_epoch(record["timestamp"])
+        with self._lock:
+            records = self._records.setdefault(user_id, [])
+            timestamps = self._timestamps.setdefault(user_id, array('d'))
+            order = self._order.setdefault(user_id, array('Q'))
+            seq = len(records)
+            records.append(record)
+            if not timestamps or ts >= timestamps[-1]:
+                timestamps.append(ts)
+                order.append(seq)
+            else:
+                pos = bisect_right(timestamps, ts)
+                timestamps.insert(pos, ts)
+                order.insert(pos, seq)
+        return seq
+
+    def range(self, user_id: str, since: Optional[datetime] = None,
+              until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            timestamps = self._timestamps.get(user_id)
+            if not timestamps:
+                return []
+            lo = bisect_right(timestamps, since.timestamp()) if since else 0
+            hi = bisect_right(timestamps, until.timestamp()) if until else len(timestamps)
+            records = self._records[user_id]
+            return [records[seq] for seq in self._order[user_id][lo:hi]]
+
+    def recent(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            order = self._order.get(user_id)
+            if not order or limit <= 0:
+                return []
+            records = self._records[user_id]
+            return [records[seq] for seq in order[-limit:]]
+
+    def count(self, user_id: str) -> int:
+        with self._lock:
+            return len(self._records.get(user_id, []))
+
+    def count_since(self, user_id: str, since: datetime) -> int:
+        with self._lock:
+            timestamps = self._timestamps.get(user_id)
+            return len(timestamps) - bisect_right(timestamps, since.timestamp()) if timestamps else 0
+
+    def users(self) -> List[str]:
+        with self._lock:
+            return list(self._records.keys())
+
+    def scan(self, user_id: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        with self._lock:
+            records = list(self._records.get(user_id, []))
+        return iter(enumerate(records))
+
+    def get(self, user_id: str, seqs: Iterable[int]) -> List[Dict[str, Any]]:
+        with self._lock:
+            records = self._records.get(user_id, [])
+            return [records[seq] for seq in seqs]
+
+
+class _UserLog:
+    """Time index for one user's segmented log"""
+
+    __slots__ = ("path", "timestamps", "segments", "positions", "active_segment", "active_count",
+                 "segment_numbers", "segment_starts")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.timestamps = array('d')   # epoch seconds, sorted
+        self.segments = array('I')     # segment number of each record
+        self.positions = array('I')    # line number of each record inside its segment
+        self.active_segment = 0
+        self.active_count = 0
+        # Segment numbers in order, and the sequence number of each one's first record
+        self.segment_numbers = array('I')
+        self.segment_starts = array('Q')
+
+    def total(self) -> int:
+        """Number of records, i.e. the next sequence number"""
+        return self.segment_starts[-1] + self.active_count if self.segment_starts else 0
+
+    def start_segment(self, segment: int):
+        self.segment_starts.append(self.total())
+        self.segment_numbers.append(segment)
+        self.active_segment = segment
+        self.active_count = 0
+
+    def locate(self, seq: int) -> Tuple[int, int]:
+        """(segment, line) of a sequence number"""
+        i = bisect_right(self.segment_starts, seq) - 1
+        if i < 0 or seq >= self.total():
+            raise IndexError(f"No record with sequence number {seq}")
+        return self.segment_numbers[i], seq - self.segment_starts[i]
+
+
+class SegmentedLogMemoryStore(MemoryStore):
+    """
+    Durable store: one directory per user holding append-only JSON-lines segments.
+
+    Each segment `NNNNNNNN.jsonl` has a sidecar `NNNNNNNN.idx` with one epoch
+    timestamp per line, so the time index can be rebuilt on startup without
+    parsing the records themselves. Only the most recently used segments are
+    kept parsed in memory.
+    """
+
+    def __init__(self, base_dir: str = DEFAULT_MEMORY_DIR, segment_size: int = 1000,
+                 max_hot_segments: int = 64, fsync: bool = False):
+        self.base_dir = base_dir
+        self.segment_size = segment_size
+        self.max_hot_segments = max_hot_segments
+        self.fsync = fsync
+        self._logs: Dict[str, _UserLog] = {}
+        self._hot: "OrderedDict[Tuple[str, int], List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.RLock()
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    # Index management
+
+    def _user_path(self, user_id: str) -> str:
+        return os.path.join(self.base_dir, quote(user_id, safe=''))
+
+    def _segment_file(self, log: _UserLog, segment: int, ext: str) -> str:
+        return os.path.join(log.path, f"{segment:08d}.{ext}")
+
+    def _load_log(self, user_id: str) -> _UserLog:
+        log = self._logs.get(user_id)
+        if log is not None:
+            return log
+
+        log = _UserLog(self._user_path(user_id))
+        entries = []
+        if os.path.isdir(log.path):
+            self._repair_tail(log)
+            for name in sorted(os.listdir(log.path)):
+                if not name.endswith(".idx"):
+                    continue
+                segment = int(name[:-4])
+                with open(os.path.join(log.path, name), "r") as f:
+                    timestamps = [float(line) for line in f if line.strip()]
+                entries.extend((ts, segment, position) for position, ts in enumerate(timestamps))
+                log.start_segment(segment)
+                log.active_count = len(timestamps)
+
+        # Records are normally appended in time order; sort covers backfills
+        entries.sort()
+        for ts, segment, position in entries:
+            log.timestamps.append(ts)
+            log.segments.append(segment)
+            log.positions.append(position)
+
+        self._logs[user_id] = log
+        return log
+
+    def _repair_tail(self, log: _UserLog):
+        """
+        Undo a write interrupted between a segment's data and its index: only
+        the last indexed segment can be torn, and positions come from the
+        index alone, so data lines past the index (or a segment with no
+        index yet) are cut, as are partial lines in either file
+        """
+        names = os.listdir(log.path)
+        indexed = [int(name[:-4]) for name in names if name.endswith(".idx")]
+        last = max(indexed, default=-1)
+        for name in names:
+            if name.endswith(".jsonl") and int(name[:-6]) > last:
+                os.remove(os.path.join(log.path, name))
+        if last < 0:
+            return
+
+        data_path, index_path = self._segment_file(log, last, "jsonl"), self._segment_file(log, last, "idx")
+        data_ends, index_ends = _line_ends(data_path), _line_ends(index_path)
+        keep = min(len(data_ends), len(index_ends))
+        for path, ends in ((data_path, data_ends), (index_path, index_ends)):
+            size = ends[keep - 1] if keep else 0
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def _read_segment(self, log: _UserLog, user_id: str, segment: int, cache: bool = True) -> List[Dict[str, Any]]:
+        key = (user_id, segment)
+        records = self._hot.get(key)
+        if records is not None:
+            self._hot.move_to_end(key)
+            return records
+
+        records = []
+        path = self._segment_file(log, segment, "jsonl")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+
+        if not cache:
+            return records
+        self._hot[key] = records
+        while len(self._hot) > self.max_hot_segments:
+            self._hot.popitem(last=False)
+        return records
+
+    def _fetch(self, log: _UserLog, user_id: str, lo: int, hi: int) -> List[Dict[str, Any]]:
+        results = []
+        for i in range(lo, hi):
+            segment_records = self._read_segment(log, user_id, log.segments[i])
+            results.append(segment_records[log.positions[i]])
+        return results
+
+    # Writes
+
+    def _write(self, log: _UserLog, user_id: str, records: List[Dict[str, Any]]) -> List[int]:
+        """Append records to the user's active segments; returns their sequence numbers"""
+        os.makedirs(log.path, exist_ok=True)
+        seqs = []
+        if not log.segment_starts:
+            log.start_segment(0)
+        i = 0
+        while i < len(records):
+            if log.active_count >= self.segment_size:
+                log.start_segment(log.active_segment + 1)
+
+            chunk = records[i:i + self.segment_size - log.active_count]
+            segment = log.active_segment
+            data_lines = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in chunk)
+            index_lines = "".join(f"{_to_epoch(r['timestamp'])!r}\n" for r in chunk)
+
+            with open(self._segment_file(log, segment, "jsonl"), "a", encoding="utf-8") as f:
+                f.write(data_lines)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            with open(self._segment_file(log, segment, "idx"), "a") as f:
+                f.write(index_lines)
+
+            hot = self._hot.get((user_id, segment))
+            for record in chunk:
+                ts = _to_epoch(record["timestamp"])
+                position = log.active_count
+                if hot is not None:
+                    hot.append(record)
+                if not log.timestamps or ts >= log.timestamps[-1]:
+                    log.timestamps.append(ts)
+                    log.segments.append(segment)
+                    log.positions.append(position)
+                else:
+                    pos = bisect_right(log.timestamps, ts)
+                    log.timestamps.insert(pos, ts)
+                    log.segments.insert(pos, segment)
+                    log.positions.insert(pos, position)
+                seqs.append(log.total())
+                log.active_count += 1
+
+            i += len(chunk)
+        return seqs
+
+    def append(self, user_id: str, record: Dict[str, Any]) -> int:
+        with self._lock:
+            return self._write(self._load_log(user_id), user_id, [record])[0]
+
+    def append_many(self, items: Iterable[Tuple[str, Dict[str, Any]]]) -> List[int]:
+        items = list(items)
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for user_id, record in items:
+            grouped.setdefault(user_id, []).append(record)
+
+        with self._lock:
+            written = {user_id: iter(self._write(self._load_log(user_id), user_id, records))
+                       for user_id, records in grouped.items()}
+        return [next(written[user_id]) for user_id, _ in items]
+
+    # Reads
+
+    def range(self, user_id: str, since: Optional[datetime] = None,
+              until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            log = self._load_log(user_id)
+            lo = bisect_right(log.timestamps, since.timestamp()) if since else 0
+            hi = bisect_right(log.timestamps, until.timestamp()) if until else len(log.timestamps)
+            return self._fetch(log, user_id, lo, hi)
+
+    def recent(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            log = self._load_log(user_id)
+            total = len(log.timestamps)
+            return self._fetch(log, user_id, max(0, total - limit), total) if limit > 0 else []
+
+    def count(self, user_id: str) -> int:
+        with self._lock:
+            return len(self._load_log(user_id).timestamps)
+
+    def count_since(self, user_id: str, since: datetime) -> int:
+        """Number of records newer than `since`, answered from the index alone"""
+        with self._lock:
+            log = self._load_log(user_id)
+            return len(log.timestamps) - bisect_right(log.timestamps, since.timestamp())
+
+    def users(self) -> List[str]:
+        with self._lock:
+            on_disk = {unquote(name) for name in os.listdir(self.base_dir)} if os.path.isdir(self.base_dir) else set()
+            return sorted(on_disk | set(self._logs.keys()))
+
+    def scan(self, user_id: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Reads one segment at a time, bypassing the hot cache"""
+        with self._lock:
+            log = self._load_log(user_id)
+            total = log.total()
+            segments = list(zip(log.segment_numbers, log.segment_starts))
+        for segment, start in segments:
+            if start >= total:
+                break
+            with self._lock:
+                records = self._read_segment(log, user_id, segment, cache=False)
+            for position, record in enumerate(records[:total - start]):
+                yield start + position, record
+
+    def get(self, user_id: str, seqs: Iterable[int]) -> List[Dict[str, Any]]:
+        with self._lock:
+            log = self._load_log(user_id)
+            results = []
+            for seq in seqs:
+                segment, position = log.locate(seq)
+                results.append(self._read_segment(log, user_id, segment)[position])
+            return results
+
+
+def create_memory_store() -> MemoryStore:
+    """
+    Build the memory store selected by the environment.
+
+    MEMORY_STORE_BACKEND: "log" (default) or "memory"
+    MEMORY_STORE_DIR: directory for the segmented log
+    """
+    backend = os.environ.get("MEMORY_STORE_BACKEND", "log").lower()
+    if backend == "memory":
+        return InMemoryMemoryStore()
+    return SegmentedLogMemoryStore(
+        base_dir=os.environ.get("MEMORY_STORE_DIR", DEFAULT_MEMORY_DIR),
+        segment_size=int(os.environ.get("MEMORY_STORE_SEGMENT_SIZE", "1000")),
+        max_hot_segments=int(os.environ.get("MEMORY_STORE_HOT_SEGMENTS", "64")),
+        fsync=os.environ.get("MEMORY_STORE_FSYNC", "0") == "1",
+    )
@@ -54,6 +54,9 @@ class PurchaseOrderService:
     def __init__(self):
         self.purchase_orders: List[PurchaseOrder] = []
         self.suppliers: List[Supplier] = []
+        # Bumped whenever orders/suppliers change (list ETags)
+        self.orders_version = 0
+        self.suppliers_version = 0
         self._load_sample_data()
     
     def _load_sample_data(self):
@@ -147,6 +150,7 @@ class PurchaseOrderService:
         )
         
         self.purchase_orders.append(purchase_order)
+        self.orders_version += 1
         print(f"Created purchase order {purchase_order.order_id} for {item_name}")
         
         return purchase_order
@@ -182,6 +186,7 @@ class PurchaseOrderService:
             return False
         
         order.status = new_status
+        self.orders_version += 1
         
         # Update timestamps based on status
         if new_status == PurchaseOrderStatus.SENT:
@@ -266,6 +271,7 @@ Clinic Inventory Management System
     def add_supplier(self, supplier: Supplier) -> bool:
         """Add a new supplier"""
         self.suppliers.append(supplier)
+        self.suppliers_version += 1
         return True
     
     def auto_generate_orders_for_low_stock(self, medical_supplies: List[Any]) -> List[PurchaseOrder]:
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Recommendation Cache for the Medicine Recommendation System
+- Formatted recommendations cached per detected-symptom fingerprint (LRU + TTL)
+- Each entry remembers the medicines it shows, so a stock change drops exactly
+  the entries that display that medicine's stock
+- Hit/miss/eviction/invalidation counters for tuning size and TTL
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+Fingerprint = Tuple[Tuple[str, float], ...]
+
+
+def symptom_fingerprint(symptoms: Dict[str, float], precision: int = 6) -> Fingerprint:
+    """Canonical key of a symptom score vector: sorted (symptom, rounded score) pairs, zeros dropped"""
+    return tuple(sorted((symptom, round(score, precision)) for symptom, score in symptoms.items() if score))
+
+
+class _Entry:
+    __slots__ = ("value", "medicine_ids", "expires_at")
+
+    def __init__(self, value: Any, medicine_ids: Tuple[str, ...], expires_at: float):
+        self.value = value
+        self.medicine_ids = medicine_ids
+        self.expires_at = expires_at
+
+
+class RecommendationCache:
+    """
+    Thread-safe LRU cache with a per-entry time to live.
+
+    Values are shared between callers and must be treated as read-only.
+    `generation` moves on every invalidation; a value computed before an
+    invalidation is refused by `put`, so a stock update racing with a
+    recommendation cannot leave a stale entry behind.
+
+    The generation is global rather than per medicine: a stock change for
+    any medicine refuses every `put` in flight, including values that do
+    not show it. That costs a recomputation on the next lookup, only while
+    stock changes overlap scoring, and keeps the check a single integer
+    comparison; the entries already cached are dropped per medicine.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries: "OrderedDict[Fingerprint, _Entry]" = OrderedDict()
+        self._by_medicine: Dict[str, Set[Fingerprint]] = {}
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _drop(self, key: Fingerprint) -> Optional[_Entry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            for medicine_id in entry.medicine_ids:
+                keys = self._by_medicine.get(medicine_id)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._by_medicine[medicine_id]
+        return entry
+
+    def get(self, key: Fingerprint) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= self.clock():
+                self._drop(key)
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def put(self, key: Fingerprint, value: Any, medicine_ids: Iterable[str], generation: Optional[int] = None):
+        """Cache a value showing `medicine_ids`; skipped if computed before the last invalidation"""
+        medicine_ids = tuple(dict.fromkeys(medicine_ids))
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._drop(key)
+            self._entries[key] = _Entry(value, medicine_ids, self.clock() + self.ttl_seconds)
+            for medicine_id in medicine_ids:
+                self._by_medicine.setdefault(medicine_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate_medicine(self, medicine_id: str) -> int:
+        """Drop every entry showing this medicine; returns how many were dropped"""
+        with self._lock:
+            self.generation += 1
+            keys = list(self._by_medicine.get(medicine_id, ()))
+            for key in keys:
+                self._drop(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._by_medicine.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "medicines_tracked": len(self._by_medicine)
+            }
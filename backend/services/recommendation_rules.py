@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Recommendation Rules for the Medicine Recommendation System
+- Rules are data (catalog/recommendation_rules.json), not code
+- Compiled into a symptoms x rules weight matrix
+- Scoring one patient is a matrix-vector product plus argpartition top-k;
+  patients reporting the same set of symptoms are scored together in one
+  matrix-matrix product
+"""
+
+import os
+import json
+from dataclasses import dataclass, field
+from typing import Container, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Patients scored per matrix product; bounds the (patients x rules) intermediates
+BATCH_ROWS = 32
+
+DEFAULT_RULES_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'catalog', 'recommendation_rules.json'))
+
+
+@dataclass
+class RecommendationRule:
+    """
+    One row of the rule table.
+
+    A rule fires when the weighted sum of its symptom scores exceeds
+    `min_score` (always, if `min_score` is None) and its `requires` /
+    `excludes` symptom thresholds hold. Confidence is that weighted sum
+    capped at `max_confidence`, or `fixed_confidence` when given.
+    Of the rules that fire, at most one per medicine is kept, and one per
+    `group`: the one with the largest weighted sum before the cap (table
+    order on ties), so a group's choice does not depend on the caps of its
+    members. Fallback rules are only tried, in table order, when no regular
+    rule fires; the first one that fires is used.
+    """
+    rule_id: str
+    medicine_id: str
+    weights: Dict[str, float]
+    reasoning: str
+    dosage_instructions: str
+    min_score: Optional[float] = 0.0
+    max_confidence: float = 1.0
+    warnings: List[str] = field(default_factory=list)
+    alternatives: List[str] = field(default_factory=list)
+    requires: Dict[str, float] = field(default_factory=dict)
+    excludes: Dict[str, float] = field(default_factory=dict)
+    group: Optional[str] = None
+    fallback: bool = False
+    fixed_confidence: Optional[float] = None
+
+
+def load_rules(path: str = DEFAULT_RULES_PATH) -> List[RecommendationRule]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [RecommendationRule(**row) for row in json.load(f)]
+
+
+class _RuleBlock:
+    """Dense arrays for a set of rules over the symptom axis"""
+
+    def __init__(self, rules: List[RecommendationRule], symptom_index: Dict[str, int]):
+        n_symptoms = len(symptom_index)
+        self.rules = rules
+        self.weights = np.zeros((n_symptoms, len(rules)))
+        self.min_score = np.full(len(rules), -np.inf)
+        self.max_confidence = np.empty(len(rules))
+        self.fixed = np.full(len(rules), np.nan)
+
+        gated = [i for i, rule in enumerate(rules) if rule.requires or rule.excludes]
+        self.gated = np.array(gated, dtype=np.int64)
+        # Required symptoms must exceed their threshold (-inf: not required);
+        # excluded symptoms must not exceed theirs (+inf: not excluded)
+        self.required = np.full((len(gated), n_symptoms), -np.inf)
+        self.excluded = np.full((len(gated), n_symptoms), np.inf)
+
+        for i, rule in enumerate(rules):
+            for symptom, weight in rule.weights.items():
+                self.weights[symptom_index[symptom], i] = weight
+            if rule.min_score is not None:
+                self.min_score[i] = rule.min_score
+            self.max_confidence[i] = rule.max_confidence
+            if rule.fixed_confidence is not None:
+                self.fixed[i] = rule.fixed_confidence
+        for row, i in enumerate(gated):
+            for symptom, threshold in rules[i].requires.items():
+                self.required[row, symptom_index[symptom]] = threshold
+            for symptom, threshold in rules[i].excludes.items():
+                self.excluded[row, symptom_index[symptom]] = threshold
+
+    def evaluate(self, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(fired, confidence, activation) arrays of shape (patients, rules)"""
+        # Patients only report a handful of symptoms: multiply the active columns only
+        active = np.flatnonzero(scores.any(axis=0))
+        activation = scores[:, active] @ self.weights[active]
+        fired = activation > self.min_score
+        if self.gated.size:
+            patients = scores[:, None, :]
+            passes = np.all(patients > self.required, axis=2) & np.all(patients <= self.excluded, axis=2)
+            fired[:, self.gated] &= passes
+        confidence = np.where(np.isnan(self.fixed), np.minimum(activation, self.max_confidence), self.fixed)
+        return fired, confidence, activation
+
+
+class RuleMatrix:
+    """Compiled rule table; rules for unknown medicines or symptoms are rejected at build time"""
+
+    def __init__(self, rules: Sequence[RecommendationRule], symptoms: Sequence[str], medicine_ids: Container[str]):
+        self.symptoms = list(symptoms)
+        self.symptom_index = {symptom: i for i, symptom in enumerate(self.symptoms)}
+
+        for rule in rules:
+            if rule.medicine_id not in medicine_ids:
+                raise ValueError(f"Rule {rule.rule_id}: unknown medicine {rule.medicine_id}")
+            for symptom in list(rule.weights) + list(rule.requires) + list(rule.excludes):
+                if symptom not in self.symptom_index:
+                    raise ValueError(f"Rule {rule.rule_id}: unknown symptom {symptom}")
+
+        self.primary = _RuleBlock([r for r in rules if not r.fallback], self.symptom_index)
+        self.fallback = _RuleBlock([r for r in rules if r.fallback], self.symptom_index)
+
+        # Rules sharing a group (default: their own ID) or a medicine exclude each other
+        groups: Dict[str, int] = {}
+        medicines: Dict[str, int] = {}
+        self._group = np.array([groups.setdefault(r.group or f"rule:{r.rule_id}", len(groups))
+                                for r in self.primary.rules], dtype=np.int64)
+        self._medicine = np.array([medicines.setdefault(r.medicine_id, len(medicines))
+                                   for r in self.primary.rules], dtype=np.int64)
+        # Rules of groups with several members, in table order
+        members: Dict[int, List[int]] = {}
+        for i, group in enumerate(self._group.tolist()):
+            members.setdefault(group, []).append(i)
+        self._members = {group: np.array(rules, dtype=np.int64) for group, rules in members.items() if len(rules) > 1}
+
+    def vector(self, symptoms: Dict[str, float]) -> np.ndarray:
+        scores = np.zeros(len(self.symptoms))
+        for symptom, score in symptoms.items():
+            i = self.symptom_index.get(symptom)
+            if i is not None:
+                scores[i] = score
+        return scores
+
+    def score(self, symptoms: Dict[str, float], k: int = 5) -> List[Tuple[RecommendationRule, float]]:
+        """Best rules for one patient's symptom scores, highest confidence first"""
+        return self.score_many([symptoms], k)[0]
+
+    def score_many(self, patients: Sequence[Dict[str, float]], k: int = 5) -> List[List[Tuple[RecommendationRule, float]]]:
+        """
+        Best rules for many patients.
+
+        A product only multiplies the symptom columns some row uses, so rows
+        are batched (BATCH_ROWS at a time) with patients reporting the same
+        symptoms: stacking patients with different symptoms would multiply
+        every row by the union of their columns and cost more than scoring
+        them one by one.
+        """
+        vectors = [self.vector(symptoms) for symptoms in patients]
+        groups: Dict[Tuple[int, ...], List[int]] = {}
+        for p, scores in enumerate(vectors):
+            groups.setdefault(tuple(np.flatnonzero(scores).tolist()), []).append(p)
+
+        results: List[List[Tuple[RecommendationRule, float]]] = [[] for _ in patients]
+        for members in groups.values():
+            for start in range(0, len(members), BATCH_ROWS):
+                rows = members[start:start + BATCH_ROWS]
+                for p, ranked in zip(rows, self._score_rows(np.vstack([vectors[p] for p in rows]), k)):
+                    results[p] = ranked
+        return results
+
+    def _score_rows(self, scores: np.ndarray, k: int) -> List[List[Tuple[RecommendationRule, float]]]:
+        fired, confidence, activation = self.primary.evaluate(scores)
+
+        results = []
+        empty = []
+        for p in range(scores.shape[0]):
+            hits = np.flatnonzero(fired[p])
+            chosen = self._top_k(hits, confidence[p, hits], k, fired[p], activation[p]) if k > 0 else []
+            if not chosen:
+                empty.append(p)
+            results.append([(self.primary.rules[i], c) for i, c in chosen])
+
+        if empty and self.fallback.rules and k > 0:
+            fired, confidence, _ = self.fallback.evaluate(scores[empty])
+            for row, p in enumerate(empty):
+                hits = np.flatnonzero(fired[row])
+                if hits.size:
+                    results[p] = [(self.fallback.rules[hits[0]], float(confidence[row, hits[0]]))]
+        return results
+
+    def _top_k(self, hits: np.ndarray, conf: np.ndarray, k: int,
+               fired: np.ndarray, activation: np.ndarray) -> List[Tuple[int, float]]:
+        """
+        The k most confident fired rules, at most one per group and medicine.
+
+        A partial sort pulls a window a few times larger than k; duplicates are
+        dropped greedily in confidence order, and the window only widens if
+        that leaves fewer than k rules. A shared group is only represented by
+        its winner (largest activation), which is met at its own confidence.
+        """
+        winners: Dict[int, int] = {}
+        window = min(hits.size, max(4 * k, 16))
+        while True:
+            if window < hits.size:
+                # Rules tied with the window's last confidence are taken in table order
+                cutoff = -np.partition(-conf, window - 1)[window - 1]
+                above = np.flatnonzero(conf > cutoff)
+                tied = np.flatnonzero(conf == cutoff)[:window - above.size]
+                candidates = np.concatenate((above, tied))
+            else:
+                candidates = np.arange(hits.size)
+            candidates = candidates[np.lexsort((hits[candidates], -conf[candidates]))]
+
+            chosen = []
+            seen_groups = set()
+            seen_medicines = set()
+            for i in candidates:
+                rule = hits[i]
+                group, medicine = self._group[rule], self._medicine[rule]
+                if group in seen_groups or medicine in seen_medicines:
+                    continue
+                if group in self._members:
+                    if group not in winners:
+                        rules = self._members[group][fired[self._members[group]]]
+                        winners[group] = rules[np.argmax(activation[rules])]
+                    if rule != winners[group]:
+                        continue
+                seen_groups.add(group)
+                seen_medicines.add(medicine)
+                chosen.append((int(rule), float(conf[i])))
+                if len(chosen) == k:
+                    return chosen
+            if window >= hits.size:
+                return chosen
+            window *= 4
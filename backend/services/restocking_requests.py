@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Restocking Request Table for the Medicine Recommendation System
+- At most one open request per medicine, found in constant time
+- Repeat low-stock triggers are merged into the open request by the caller
+- Closed requests move to a bounded history; the oldest are dropped
+"""
+
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+
+class RestockingRequestTable:
+    """
+    Open restocking requests keyed by medicine ID, plus the most recent
+    `history_limit` closed ones. Requests are any objects with `request_id`,
+    `medicine_id`, `status` and `closed_at` attributes.
+    """
+
+    def __init__(self, history_limit: int = 1000):
+        self.history_limit = history_limit
+        self._open: Dict[str, Any] = {}          # medicine_id -> request
+        self._by_id: Dict[str, Any] = {}         # request_id -> open or retained closed request
+        self._history: Deque[Any] = deque()      # closed, oldest first
+        self._next_seq = 1
+        self._lock = threading.RLock()
+        self.merged = 0
+        self.compacted = 0
+
+    @property
+    def lock(self) -> threading.RLock:
+        """Held by callers that read-modify-write an open request"""
+        return self._lock
+
+    def next_number(self) -> int:
+        """Running request number, used to build unique request IDs"""
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            return seq
+
+    def open_request(self, medicine_id: str) -> Optional[Any]:
+        with self._lock:
+            return self._open.get(medicine_id)
+
+    def get(self, request_id: str) -> Optional[Any]:
+        with self._lock:
+            return self._by_id.get(request_id)
+
+    def add(self, request: Any) -> Any:
+        with self._lock:
+            if request.medicine_id in self._open:
+                raise ValueError(f"Medicine {request.medicine_id} already has an open restocking request")
+            self._open[request.medicine_id] = request
+            self._by_id[request.request_id] = request
+            return request
+
+    def record_merge(self):
+        with self._lock:
+            self.merged += 1
+
+    def close(self, medicine_id: str, status: str = "fulfilled",
+              closed_at: Optional[datetime] = None) -> Optional[Any]:
+        """Close the medicine's open request (if any) and move it to the history"""
+        with self._lock:
+            request = self._open.pop(medicine_id, None)
+            if request is None:
+                return None
+            request.status = status
+            request.closed_at = closed_at or datetime.now()
+            self._history.append(request)
+            while len(self._history) > self.history_limit:
+                dropped = self._history.popleft()
+                self._by_id.pop(dropped.request_id, None)
+                self.compacted += 1
+            return request
+
+    def list_open(self) -> List[Any]:
+        """Open requests, oldest first"""
+        with self._lock:
+            return list(self._open.values())
+
+    def list_history(self) -> List[Any]:
+        """Retained closed requests, oldest first"""
+        with self._lock:
+            return list(self._history)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "open": len(self._open),
+                "history": len(self._history),
+                "history_limit": self.history_limit,
+                "merged_triggers": self.merged,
+                "compacted": self.compacted
+            }
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Spelling Correction for symptom vocabularies
+- Symmetric-delete index (SymSpell-style): every vocabulary word is filed
+  under the strings left after deleting up to N characters from its prefix
+- A lookup generates the misspelling's own deletes and verifies the few
+  words they hit, instead of computing the distance to every word
+- Distance is optimal string alignment (Levenshtein plus adjacent
+  transpositions), so "hedache" and "dizzyness" are one edit away
+- A word that is a symptom with letters added in front or behind ("scold",
+  "chilly") is another word, not a typo, and is left alone
+"""
+
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Only tokens this long are corrected (by 1 and by 2 edits): short words
+# are too close to each other for a correction to be trustworthy
+ONE_EDIT_MIN_LENGTH = 5
+TWO_EDIT_MIN_LENGTH = 9
+# Deletes are generated from this many leading characters (bounds index size)
+PREFIX_LENGTH = 8
+
+DEFAULT_KNOWN_WORDS_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'catalog', 'known_words.txt'))
+
+
+def load_words(path: str = DEFAULT_KNOWN_WORDS_PATH) -> List[str]:
+    """One word per line; blank lines and '#' comments are skipped"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def allowed_distance(word: str, max_edit_distance: int) -> int:
+    if len(word) >= TWO_EDIT_MIN_LENGTH:
+        return min(2, max_edit_distance)
+    if len(word) >= ONE_EDIT_MIN_LENGTH:
+        return min(1, max_edit_distance)
+    return 0
+
+
+def extends_at_edge(word: str, candidate: str) -> bool:
+    """
+    True if `word` is `candidate` with letters added only before or after it
+    ("scold" / "cold", "chilly" / "chill"): such words are usually real words
+    of their own. A repeated keystroke ("coughh") still counts as a typo.
+    """
+    extra = len(word) - len(candidate)
+    if extra <= 0:
+        return False
+    if word.startswith(candidate):
+        return set(word[len(candidate):]) != {candidate[-1]}
+    if word.endswith(candidate):
+        return set(word[:extra]) != {candidate[0]}
+    return False
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Optimal string alignment distance, or max_distance + 1 if it is larger.
+    Bit-parallel (Hyyro 2003): one column of the DP table per character of
+    `b`, each computed with a handful of integer operations.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if not a:
+        return len(b)
+    full = (1 << len(a)) - 1
+    high = 1 << (len(a) - 1)
+    masks: Dict[str, int] = {}
+    for i, ch in enumerate(a):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    vp, vn, score = full, 0, len(a)
+    d0_prev = match_prev = 0
+    for ch in b:
+        match = masks.get(ch, 0)
+        transposed = (((~d0_prev) & match) << 1) & match_prev
+        d0 = ((((match & vp) + vp) & full) ^ vp) | match | vn | transposed
+        hp = vn | (~(d0 | vp) & full)
+        hn = vp & d0
+        if hp & high:
+            score += 1
+        elif hn & high:
+            score -= 1
+        hp = ((hp << 1) | 1) & full
+        hn = (hn << 1) & full
+        vp = hn | (~(d0 | hp) & full)
+        vn = hp & d0
+        d0_prev, match_prev = d0, match
+    return score if score <= max_distance else max_distance + 1
+
+
+def _deletes(word: str, distance: int) -> Set[str]:
+    """The word and every string left after deleting up to `distance` characters"""
+    found = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - found
+        found |= frontier
+    return found
+
+
+class SpellingCorrector:
+    """
+    Corrects single words to the closest vocabulary word.
+
+    Words in the vocabulary or in `known_words` (correctly spelled words
+    that merely look like a symptom, e.g. "heard" next to "heart") are
+    never corrected, and neither is a word whose closest candidate it only
+    extends at the edges (see `extends_at_edge`). Among equally close
+    candidates the one that comes first in the vocabulary wins. Results
+    are memoized per word.
+    """
+
+    def __init__(self, vocabulary: Iterable[str], max_edit_distance: int = 2,
+                 known_words: Iterable[str] = (), cache_size: int = 65536):
+        self.max_edit_distance = max_edit_distance
+        self.words: List[str] = list(dict.fromkeys(vocabulary))
+        self._rank: Dict[str, int] = {word: rank for rank, word in enumerate(self.words)}
+        self._known = set(self._rank).union(known_words)
+        # delete -> vocabulary ranks; a bare int while there is only one (the common case)
+        self._deletes: Dict[str, object] = {}
+        for rank, word in enumerate(self.words):
+            for delete in _deletes(word[:PREFIX_LENGTH], max_edit_distance):
+                ranks = self._deletes.get(delete)
+                if ranks is None:
+                    self._deletes[delete] = rank
+                elif isinstance(ranks, int):
+                    self._deletes[delete] = [ranks, rank]
+                else:
+                    ranks.append(rank)
+        self.correct = lru_cache(maxsize=cache_size)(self._correct)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def candidates(self, word: str, max_distance: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Vocabulary words within `max_distance` edits, closest first (then vocabulary order)"""
+        if max_distance is None:
+            max_distance = self.max_edit_distance
+        max_distance = min(max_distance, self.max_edit_distance)
+        ranks: Set[int] = set()
+        for delete in _deletes(word[:PREFIX_LENGTH], max_distance):
+            hit = self._deletes.get(delete)
+            if hit is None:
+                continue
+            if isinstance(hit, int):
+                ranks.add(hit)
+            else:
+                ranks.update(hit)
+        found = []
+        for rank in ranks:
+            distance = edit_distance(word, self.words[rank], max_distance)
+            if distance <= max_distance:
+                found.append((distance, rank))
+        found.sort()
+        return [(self.words[rank], distance) for distance, rank in found]
+
+    def _correct(self, word: str) -> str:
+        if word in self._known or not word.isalpha():
+            return word
+        distance = allowed_distance(word, self.max_edit_distance)
+        if not distance:
+            return word
+        found = self.candidates(word, distance)
+        if not found or extends_at_edge(word, found[0][0]):
+            return word
+        return found[0][0]
+
+    def stats(self) -> Dict[str, int]:
+        info = self.correct.cache_info()
+        return {
+            "words": len(self.words),
+            "known_words": len(self._known),
+            "deletes": len(self._deletes),
+            "max_edit_distance": self.max_edit_distance,
+            "cache_hits": info.hits,
+            "cache_misses": info.misses
+        }
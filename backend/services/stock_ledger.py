@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Stock Ledger over the shared inventory engine
+- Atomic stock movements: dispense, receive, adjust, plus absolute counts
+- Per-item versions for optimistic compare-and-swap (expected_version)
+- Lock striping: an item's read-modify-write holds only its stripe, so
+  movements of different items never wait on each other; the only shared
+  step is the engine's short index/feed update, and change subscribers run
+  after the stripe is released
+- Bounded journal of movements, appended without a shared lock
+"""
+
+import threading
+from collections import deque
+from itertools import count
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from services.inventory_engine import InventoryEngine, inventory
+
+
+class StockError(ValueError):
+    """A stock movement was refused; the item's stock is unchanged"""
+
+
+class UnknownItemError(StockError):
+    pass
+
+
+class InsufficientStockError(StockError):
+    pass
+
+
+class VersionConflictError(StockError):
+    pass
+
+
+class StockMovement:
+    """One journal entry: `delta` moved the item to `quantity` at `version`"""
+    __slots__ = ("seq", "item_id", "op", "delta", "quantity", "version", "reason", "reference", "at")
+
+    def __init__(self, seq: int, item_id: str, op: str, delta: int, quantity: int, version: int,
+                 reason: Optional[str], reference: Optional[str], at: datetime):
+        self.seq = seq
+        self.item_id = item_id
+        self.op = op            # "dispense" | "receive" | "adjust" | "count"
+        self.delta = delta
+        self.quantity = quantity
+        self.version = version
+        self.reason = reason
+        self.reference = reference
+        self.at = at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"seq": self.seq, "item_id": self.item_id, "op": self.op, "delta": self.delta,
+                "quantity": self.quantity, "version": self.version, "reason": self.reason,
+                "reference": self.reference, "at": self.at.isoformat()}
+
+
+class StockLedger:
+    """
+    The write path for stock levels.
+
+    Every movement is a read-modify-write of one item under that item's
+    stripe lock: concurrent dispenses from several terminals all count, and
+    a movement that would take stock below zero is refused rather than
+    clamped. Pass `expected_version` (from `level`) to apply a movement only
+    if nobody else changed the item since it was read.
+    """
+
+    def __init__(self, engine: InventoryEngine = inventory, stripes: int = 64, journal_size: int = 10_000):
+        self.engine = engine
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        # Per-stripe counters, each only written under its stripe
+        self._applied = [0] * stripes
+        self._refused = [0] * stripes
+        # deque.append and next(count) are atomic, so movements are journaled
+        # and numbered without a lock shared by all items
+        self._journal: Deque[StockMovement] = deque(maxlen=journal_size)
+        self._seqs = count(1)
+
+    def _stripe_of(self, item_id: str) -> int:
+        return hash(item_id) % len(self._stripes)
+
+    def _stripe(self, item_id: str) -> threading.Lock:
+        return self._stripes[self._stripe_of(item_id)]
+
+    @property
+    def refused(self) -> int:
+        return sum(self._refused)
+
+    def _apply(self, item_id: str, op: str, new_quantity: Callable[[int], int],
+               expected_version: Optional[int], reason: Optional[str], reference: Optional[str]) -> StockMovement:
+        stripe = self._stripe_of(item_id)
+        with self._stripes[stripe]:
+            item = self.engine.get(item_id)
+            if item is None:
+                raise UnknownItemError(f"Unknown inventory item {item_id}")
+            version = self.engine.stock_version(item_id)
+            if expected_version is not None and expected_version != version:
+                self._refused[stripe] += 1
+                raise VersionConflictError(f"{item_id} is at version {version}, not {expected_version}")
+            old = item.current_stock
+            try:
+                quantity = new_quantity(old)
+            except StockError:
+                self._refused[stripe] += 1
+                raise
+            self.engine.set_stock(item_id, quantity, dispatch=False)
+            # Numbered and journaled under the stripe, so an item's movements
+            # are in version order
+            movement = StockMovement(next(self._seqs), item_id, op, quantity - old, quantity,
+                                     self.engine.stock_version(item_id), reason, reference, datetime.now())
+            self._journal.append(movement)
+            self._applied[stripe] += 1
+        self.engine.dispatch()
+        return movement
+
+    @staticmethod
+    def _positive(quantity: int):
+        if quantity <= 0:
+            raise ValueError(f"Quantity must be positive, got {quantity}")
+
+    def dispense(self, item_id: str, quantity: int, expected_version: Optional[int] = None,
+                 reason: Optional[str] = None, reference: Optional[str] = None) -> StockMovement:
+        """Take `quantity` out of stock; refused if less than that is on hand"""
+        self._positive(quantity)
+
+        def take(current: int) -> int:
+            if current < quantity:
+                raise InsufficientStockError(f"Cannot dispense {quantity} of {item_id}: {current} on hand")
+            return current - quantity
+
+        return self._apply(item_id, "dispense", take, expected_version, reason, reference)
+
+    def receive(self, item_id: str, quantity: int, expected_version: Optional[int] = None,
+                reason: Optional[str] = None, reference: Optional[str] = None) -> StockMovement:
+        """Add `quantity` to stock (deliveries, returns)"""
+        self._positive(quantity)
+        return self._apply(item_id, "receive", lambda current: current + quantity,
+                           expected_version, reason, reference)
+
+    def adjust(self, item_id: str, delta: int, reason: str, expected_version: Optional[int] = None,
+               reference: Optional[str] = None) -> StockMovement:
+        """Signed correction (breakage, expiry write-off, found stock); refused below zero"""
+
+        def shift(current: int) -> int:
+            if current + delta < 0:
+                raise InsufficientStockError(f"Cannot adjust {item_id} by {delta}: {current} on hand")
+            return current + delta
+
+        return self._apply(item_id, "adjust", shift, expected_version, reason, reference)
+
+    def count(self, item_id: str, quantity: int, expected_version: Optional[int] = None,
+              reason: Optional[str] = "stock count", reference: Optional[str] = None) -> StockMovement:
+        """Record an absolute stock count"""
+        if quantity < 0:
+            raise ValueError(f"Quantity cannot be negative, got {quantity}")
+        return self._apply(item_id, "count", lambda current: quantity, expected_version, reason, reference)
+
+    # Reads
+
+    def level(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Current quantity and version, read consistently"""
+        with self._stripe(item_id):
+            item = self.engine.get(item_id)
+            if item is None:
+                return None
+            return {"item_id": item_id, "kind": self.engine.kind_of(item_id),
+                    "quantity": item.current_stock, "version": self.engine.stock_version(item_id)}
+
+    def movements(self, item_id: Optional[str] = None, limit: int = 100) -> List[StockMovement]:
+        """Most recent retained movements (of one item, if given), oldest first"""
+        # Movements of different items may be journaled slightly out of number order
+        journal = sorted(self._journal.copy(), key=lambda movement: movement.seq)
+        if item_id is not None:
+            journal = [movement for movement in journal if movement.item_id == item_id]
+        return journal[-limit:] if limit else []
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "movements": sum(self._applied),
+            "journal_retained": len(self._journal),
+            "refused": self.refused,
+            "stripes": len(self._stripes)
+        }
+
+
+# Global instance
+ledger = StockLedger()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Substitution Graph for alternative medicines
+- Precomputed from category and indication overlap: every item keeps its
+  strongest substitutes, curated ones first
+- In-stock bitset kept current by the owner from stock changes, so "top k
+  in-stock alternatives" walks one adjacency list instead of scanning stock
+"""
+
+import heapq
+import threading
+from collections import Counter
+from typing import Container, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# Score of a substitute: Jaccard overlap of indications, plus this for the same category
+CATEGORY_WEIGHT = 0.5
+# Computed substitutes scoring below this are not linked (curated ones always are)
+MIN_SCORE = 0.25
+DEFAULT_MAX_DEGREE = 16
+# Indications shared by more items than this do not propose candidates on
+# their own (e.g. "pain" in a large formulary); they still count towards the
+# score of candidates found through rarer ones
+MAX_POSTINGS = 2000
+
+
+class SubstitutionGraph:
+    """
+    Items (by ID) linked to their best substitutes, strongest first.
+
+    Built once from each item's indications (symptoms and conditions
+    treated) and optional category. `preferred` substitutes, e.g. curated
+    rule alternatives, are placed ahead of the computed ones. The in-stock
+    bits start cleared; the owner sets them with `set_in_stock` as stock
+    changes.
+    """
+
+    def __init__(self, indications: Mapping[str, Iterable[str]],
+                 categories: Optional[Mapping[str, str]] = None,
+                 preferred: Optional[Mapping[str, Sequence[str]]] = None,
+                 max_degree: int = DEFAULT_MAX_DEGREE, max_postings: int = MAX_POSTINGS,
+                 min_score: float = MIN_SCORE):
+        self._ids: List[str] = list(indications)
+        self._index: Dict[str, int] = {item_id: i for i, item_id in enumerate(self._ids)}
+        terms = [frozenset(term.lower() for term in indications[item_id]) for item_id in self._ids]
+        category_of = [categories.get(item_id) if categories else None for item_id in self._ids]
+
+        postings: Dict[str, List[int]] = {}
+        for i, item_terms in enumerate(terms):
+            for term in item_terms:
+                postings.setdefault(term, []).append(i)
+        members: Dict[str, List[int]] = {}
+        for i, category in enumerate(category_of):
+            if category is not None:
+                members.setdefault(category, []).append(i)
+
+        sizes = [len(item_terms) for item_terms in terms]
+
+        def score(i: int, j: int) -> float:
+            union = len(terms[i] | terms[j])
+            overlap = len(terms[i] & terms[j]) / union if union else 0.0
+            same = category_of[i] is not None and category_of[i] == category_of[j]
+            return overlap + (CATEGORY_WEIGHT if same else 0.0)
+
+        self._adjacency: List[Tuple[int, ...]] = []
+        self._scores: List[Tuple[float, ...]] = []
+        for i, item_terms in enumerate(terms):
+            # Shared indications per candidate, counted through the postings
+            overlaps: Dict[int, int] = Counter()
+            common = []
+            for term in item_terms:
+                if len(postings[term]) <= max_postings:
+                    overlaps.update(postings[term])
+                else:
+                    common.append(term)
+            if common:
+                common_terms = frozenset(common)
+                overlaps = {j: n + len(common_terms & terms[j]) for j, n in overlaps.items()}
+
+            curated = [self._index[p] for p in dict.fromkeys(preferred.get(self._ids[i], ()) if preferred else ())
+                       if p in self._index and p != self._ids[i]]
+            skip = set(curated)
+            skip.add(i)
+            slots = max(0, max_degree - len(curated))
+            category, size = category_of[i], sizes[i]
+            scored = []
+            for j, overlap in overlaps.items():
+                if j not in skip:
+                    s = overlap / (size + sizes[j] - overlap)
+                    if category is not None and category_of[j] == category:
+                        s += CATEGORY_WEIGHT
+                    if s >= min_score:
+                        scored.append((-s, j))
+            # Same-category items sharing no rarer indication all score CATEGORY_WEIGHT:
+            # at most `slots` of them can make the cut, and ties go in item order
+            if category is not None and CATEGORY_WEIGHT >= min_score and slots:
+                added = 0
+                for j in members[category]:
+                    if j not in overlaps and j not in skip:
+                        scored.append((-CATEGORY_WEIGHT, j))
+                        added += 1
+                        if added == slots:
+                            break
+            # Strongest first; ties in item order
+            neighbours = curated[:max_degree] + [j for _, j in heapq.nsmallest(slots, scored)]
+            self._adjacency.append(tuple(neighbours))
+            self._scores.append(tuple(score(i, j) for j in neighbours))
+
+        self._bits = bytearray((len(self._ids) + 7) // 8)
+        self._in_stock = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._index
+
+    # In-stock bitset
+
+    def set_in_stock(self, item_id: str, in_stock: bool) -> bool:
+        """Set an item's in-stock bit; returns True if it flipped"""
+        i = self._index.get(item_id)
+        if i is None:
+            return False
+        byte, mask = i >> 3, 1 << (i & 7)
+        with self._lock:
+            if bool(self._bits[byte] & mask) == in_stock:
+                return False
+            self._bits[byte] ^= mask
+            self._in_stock += 1 if in_stock else -1
+            return True
+
+    def in_stock(self, item_id: str) -> bool:
+        i = self._index.get(item_id)
+        return i is not None and bool(self._bits[i >> 3] & (1 << (i & 7)))
+
+    # Lookups
+
+    def neighbours(self, item_id: str) -> List[Tuple[str, float]]:
+        """All precomputed substitutes with their scores, in preference order, regardless of stock"""
+        i = self._index.get(item_id)
+        if i is None:
+            return []
+        return [(self._ids[j], score) for j, score in zip(self._adjacency[i], self._scores[i])]
+
+    def alternatives(self, item_id: str, k: int = 3, exclude: Container[str] = ()) -> List[str]:
+        """Up to `k` in-stock substitutes, best first: one walk of the item's adjacency list"""
+        i = self._index.get(item_id)
+        if i is None or k <= 0:
+            return []
+        bits, ids = self._bits, self._ids
+        found = []
+        for j in self._adjacency[i]:
+            if bits[j >> 3] & (1 << (j & 7)) and ids[j] not in exclude:
+                found.append(ids[j])
+                if len(found) == k:
+                    break
+        return found
+
+    def stats(self) -> Dict[str, int]:
+        edges = sum(len(neighbours) for neighbours in self._adjacency)
+        return {
+            "items": len(self._ids),
+            "edges": edges,
+            "max_degree": max((len(neighbours) for neighbours in self._adjacency), default=0),
+            "in_stock": self._in_stock
+        }
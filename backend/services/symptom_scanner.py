@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Symptom Scanner for the Medicine Recommendation System
+- Aho-Corasick automaton over word tokens, built once from the symptom vocabulary
+- One pass over the text finds every keyword/phrase hit, whatever the vocabulary size
+- Matches respect word boundaries ("cold" does not match "scold")
+- Per-group counts of distinct keywords found
+- Optional typo tolerance: unknown words are corrected to the closest
+  vocabulary word (symmetric-delete index) before the automaton sees them
+"""
+
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from services.spelling_correction import SpellingCorrector
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)*")
+
+
+def normalize_token(token: str) -> str:
+    """Fold simple plurals so "headaches" matches "headache" (applied to keywords and text alike)"""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    text = text.lower().replace("’", "'")
+    return [normalize_token(t) for t in TOKEN_PATTERN.findall(text)]
+
+
+class SymptomScanner:
+    """
+    Multi-pattern matcher for {group: [keyword or phrase, ...]}.
+
+    The automaton's alphabet is word tokens, so every hit starts and ends on a
+    word boundary by construction. Each state stores the keywords that end
+    there, including those inherited through failure links, so a scan is a
+    single walk over the tokens.
+
+    With `max_edit_distance`, words of the text that are not in the
+    vocabulary or in `known_words` are spelling-corrected first, so
+    "hedache" counts as "headache".
+    """
+
+    def __init__(self, groups: Mapping[str, Iterable[str]], max_edit_distance: int = 0,
+                 known_words: Iterable[str] = ()):
+        self.groups: List[str] = list(groups.keys())
+        self.group_sizes: Dict[str, int] = {}
+        self.keywords: List[Tuple[str, Tuple[int, ...]]] = []   # keyword id -> (text, group ids)
+
+        keyword_ids: Dict[Tuple[str, ...], int] = {}
+        keyword_groups: List[List[int]] = []
+        for group_id, group in enumerate(self.groups):
+            keywords = list(groups[group])
+            self.group_sizes[group] = len(keywords)
+            for keyword in keywords:
+                tokens = tuple(tokenize(keyword))
+                if not tokens:
+                    continue
+                keyword_id = keyword_ids.get(tokens)
+                if keyword_id is None:
+                    keyword_id = keyword_ids[tokens] = len(keyword_groups)
+                    keyword_groups.append([])
+                    self.keywords.append((keyword, ()))
+                if group_id not in keyword_groups[keyword_id]:
+                    keyword_groups[keyword_id].append(group_id)
+        self.keywords = [(text, tuple(keyword_groups[i])) for i, (text, _) in enumerate(self.keywords)]
+
+        self.corrector: Optional[SpellingCorrector] = None
+        if max_edit_distance > 0:
+            vocabulary = [token for tokens in keyword_ids for token in tokens]
+            known = [token for word in known_words for token in tokenize(word)]
+            self.corrector = SpellingCorrector(vocabulary, max_edit_distance, known)
+
+        # Trie of token sequences
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[Tuple[int, ...]] = [()]
+        for tokens, keyword_id in keyword_ids.items():
+            state = 0
+            for token in tokens:
+                nxt = self._goto[state].get(token)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][token] = nxt
+                    self._goto.append({})
+                    self._out.append(())
+                state = nxt
+            self._out[state] += (keyword_id,)
+
+        # Failure links (breadth first), merging outputs along the way
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def tokens(self, text: str) -> List[str]:
+        """The text's tokens as matched: normalized, and spelling-corrected if enabled"""
+        tokens = tokenize(text)
+        if self.corrector is not None:
+            correct = self.corrector.correct
+            tokens = [correct(token) for token in tokens]
+        return tokens
+
+    def find(self, text: str) -> List[int]:
+        """Distinct keyword ids found in the text, in order of first hit"""
+        return self.find_many([text])[0]
+
+    def find_many(self, texts: Iterable[str]) -> List[List[int]]:
+        """
+        `find` for a batch of texts in one walk of the automaton, returning
+        to the root at each text's end so no match spans two texts
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        root = goto[0]
+        results = []
+        for text in texts:
+            found: Dict[int, None] = {}
+            state = 0
+            for token in self.tokens(text):
+                while state and token not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(token, 0) if state else root.get(token, 0)
+                for keyword_id in out[state]:
+                    found[keyword_id] = None
+            results.append(list(found))
+        return results
+
+    def count_groups(self, text: str) -> Dict[str, int]:
+        """Number of distinct keywords of each group found in the text (groups with hits only)"""
+        return self.count_groups_many([text])[0]
+
+    def count_groups_many(self, texts: Iterable[str]) -> List[Dict[str, int]]:
+        """`count_groups` for a batch of texts, scanned together by `find_many`"""
+        groups, keywords = self.groups, self.keywords
+        results = []
+        for found in self.find_many(texts):
+            counts: Dict[str, int] = {}
+            for keyword_id in found:
+                for group_id in keywords[keyword_id][1]:
+                    group = groups[group_id]
+                    counts[group] = counts.get(group, 0) + 1
+            results.append(counts)
+        return results
+
+    def matched_keywords(self, text: str) -> List[str]:
+        return [self.keywords[keyword_id][0] for keyword_id in self.find(text)]
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Task Scheduler for the Infinite Memory backend
+- Tasks indexed by ID for constant-time lookup and completion
+- Pending tasks kept sorted on end_date, per patient and across all patients
+- "Upcoming" and "overdue" queries are a binary search plus the page read
+"""
+
+import re
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+
+# "YYYY-MM-DD", optionally followed by a time; only these sort chronologically as strings
+DUE_DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}([T ].*)?")
+
+
+def today() -> str:
+    return datetime.now().strftime('%Y-%m-%d')
+
+
+def check_due_date(value: str) -> str:
+    """Return an ISO due date unchanged; raise ValueError for anything else"""
+    if not isinstance(value, str) or not DUE_DATE_PATTERN.fullmatch(value):
+        raise ValueError(f"Invalid end_date {value!r}: expected YYYY-MM-DD or an ISO timestamp")
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid end_date {value!r}: expected YYYY-MM-DD or an ISO timestamp") from None
+    return value
+
+
+def _check_limit(limit: Optional[int]):
+    if limit is not None and limit < 0:
+        raise ValueError("limit must not be negative")
+
+
+class TaskScheduler:
+    """
+    In-memory task index.
+
+    Due dates are ISO strings ("YYYY-MM-DD" or full timestamps), so they sort
+    chronologically as strings. A task is upcoming while its end_date is on or
+    after today and overdue once it is before today, the same day-granularity
+    rule the DynamoDB task service applies.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._by_patient: Dict[str, List[str]] = {}                    # creation order
+        self._pending_by_patient: Dict[str, List[Tuple[str, int, str]]] = {}
+        self._pending: List[Tuple[str, int, str]] = []                 # (end_date, seq, task_id)
+        self._seq: Dict[str, int] = {}
+        self._next_seq = 1
+        self._lock = threading.RLock()
+
+    def next_number(self) -> int:
+        """Running task number, used to build readable task IDs"""
+        with self._lock:
+            return self._next_seq
+
+    def add(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Index a task dict (as produced by main.Task.model_dump()); raises ValueError for a malformed end_date"""
+        check_due_date(task["end_date"])
+        with self._lock:
+            task_id = task["task_id"]
+            if task_id in self._tasks:
+                raise ValueError(f"Task {task_id} already exists")
+            seq = self._next_seq
+            self._next_seq += 1
+            self._tasks[task_id] = task
+            self._seq[task_id] = seq
+            self._by_patient.setdefault(task["patient_id"], []).append(task_id)
+            if not task.get("completed"):
+                entry = (task["end_date"], seq, task_id)
+                insort(self._pending, entry)
+                insort(self._pending_by_patient.setdefault(task["patient_id"], []), entry)
+            return task
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def complete(self, patient_id: str, task_id: str) -> Optional[Dict[str, Any]]:
+        """Mark a patient's task as completed; returns None if it does not exist"""
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None or task["patient_id"] != patient_id:
+                return None
+            if not task["completed"]:
+                task["completed"] = True
+                entry = (task["end_date"], self._seq[task_id], task_id)
+                self._discard(self._pending, entry)
+                patient_pending = self._pending_by_patient[patient_id]
+                self._discard(patient_pending, entry)
+                if not patient_pending:
+                    del self._pending_by_patient[patient_id]
+            return task
+
+    @staticmethod
+    def _discard(entries: List[Tuple[str, int, str]], entry: Tuple[str, int, str]):
+        pos = bisect_left(entries, entry)
+        if pos < len(entries) and entries[pos] == entry:
+            del entries[pos]
+
+    def for_patient(self, patient_id: str) -> List[Dict[str, Any]]:
+        """All of a patient's tasks in creation order"""
+        with self._lock:
+            return [self._tasks[task_id] for task_id in self._by_patient.get(patient_id, [])]
+
+    def upcoming(self, patient_id: str, limit: Optional[int] = None,
+                 as_of: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Not-completed tasks due today or later, soonest first"""
+        _check_limit(limit)
+        with self._lock:
+            entries = self._pending_by_patient.get(patient_id, [])
+            start = bisect_left(entries, (as_of or today(),))
+            end = len(entries) if limit is None else start + limit
+            return [self._tasks[task_id] for _, _, task_id in entries[start:end]]
+
+    def overdue(self, limit: Optional[int] = None, as_of: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Not-completed tasks of every patient due before today, most overdue first"""
+        _check_limit(limit)
+        with self._lock:
+            end = bisect_left(self._pending, (as_of or today(),))
+            if limit is not None:
+                end = min(end, limit)
+            return [self._tasks[task_id] for _, _, task_id in self._pending[:end]]
+
+    def count_overdue(self, as_of: Optional[str] = None) -> int:
+        with self._lock:
+            return bisect_left(self._pending, (as_of or today(),))
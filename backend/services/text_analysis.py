@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Text Analysis Engine for the Infinite Memory backend
+- Lexicons compiled once into a single word -> flags table
+- All sentiment phrase patterns combined into one named-group regex
+- One tokenization pass shared by sentiment, urgency and keyword extraction
+"""
+
+import re
+from typing import Dict, Any, List, Iterable, Tuple
+
+POSITIVE_WORDS = frozenset([
+    'good', 'better', 'improved', 'healthy', 'recovered', 'well', 'fine', 'great',
+    'excellent', 'amazing', 'wonderful', 'happy', 'relieved', 'comfortable',
+    'strong', 'energetic', 'positive', 'optimistic', 'confident', 'peaceful',
+    'calm', 'relaxed', 'satisfied', 'content', 'joyful', 'excited', 'grateful'
+])
+
+NEGATIVE_WORDS = frozenset([
+    'pain', 'sick', 'worse', 'bad', 'problem', 'hurt', 'ache', 'suffering',
+    'terrible', 'awful', 'horrible', 'depressed', 'sad', 'angry', 'frustrated',
+    'worried', 'anxious', 'scared', 'afraid', 'fear', 'dead', 'dying', 'suicide',
+    'kill', 'death', 'hopeless', 'helpless', 'lonely', 'alone', 'empty', 'numb',
+    'tired', 'exhausted', 'weak', 'dizzy', 'nausea', 'vomit', 'bleeding', 'swelling',
+    'fever', 'chills', 'cough', 'cold', 'flu', 'infection', 'disease', 'cancer',
+    'heart', 'attack', 'stroke', 'emergency', 'urgent', 'critical', 'severe',
+    'remember', 'memory', 'forget', 'forgetting', 'confused', 'confusion', 'lost',
+    'disoriented', 'unable', 'cannot', 'cant', 'dont', 'not', 'never', 'hate',
+    'despise', 'loathe', 'miserable', 'desperate', 'panic', 'terrified', 'devastated'
+])
+
+# Medical/health keywords
+MEDICAL_KEYWORDS = frozenset([
+    'medicine', 'patient', 'doctor', 'hospital', 'treatment', 'symptoms', 'diagnosis',
+    'health', 'medical', 'therapy', 'medication', 'prescription', 'appointment',
+    'checkup', 'examination', 'test', 'scan', 'x-ray', 'blood', 'pressure',
+    'temperature', 'pulse', 'heart', 'lung', 'brain', 'stomach', 'pain'
+])
+
+# Phrase patterns (each is implicitly anchored at a word boundary)
+NEGATIVE_PATTERNS = (
+    r'not\s+feeling\b', r'not\s+alive\b', r'too\s+depressed\b',
+    r'want\s+to\s+die\b', r'kill\s+myself\b', r'not\s+being\s+able\s+to\b',
+    r'cannot\s+remember\b', r'unable\s+to\b', r'not\s+able\s+to\b',
+    r'dont\s+remember\b', r'cant\s+remember\b', r'forgetting\s+everything\b',
+    r'memory\s+loss\b', r'not\s+working\b', r'not\s+functioning\b',
+    r'broken\b', r'damaged\b', r'hopeless\b', r'helpless\b',
+    r'want\s+to\s+end\s+it\b', r'no\s+point\b', r'worthless\b'
+)
+
+POSITIVE_PATTERNS = (
+    r'feeling\s+good\b', r'much\s+better\b', r'recovering\s+well\b',
+    r'improving\b', r'getting\s+better\b', r'feeling\s+better\b',
+    r'much\s+improved\b', r'very\s+happy\b', r'excellent\s+progress\b'
+)
+
+# Word flags stored in the compiled lexicon
+POSITIVE = 1
+NEGATIVE = 2
+MEDICAL = 4
+
+
+class TextAnalyzer:
+    """Precompiled analyzer; build once and reuse across requests"""
+
+    def __init__(self,
+                 positive_words: Iterable[str] = POSITIVE_WORDS,
+                 negative_words: Iterable[str] = NEGATIVE_WORDS,
+                 medical_keywords: Iterable[str] = MEDICAL_KEYWORDS,
+                 negative_patterns: Tuple[str, ...] = NEGATIVE_PATTERNS,
+                 positive_patterns: Tuple[str, ...] = POSITIVE_PATTERNS):
+        # One hash lookup per token instead of one list scan per lexicon
+        lexicon: Dict[str, int] = {}
+        for words, flag in ((positive_words, POSITIVE), (negative_words, NEGATIVE), (medical_keywords, MEDICAL)):
+            for word in words:
+                lexicon[word] = lexicon.get(word, 0) | flag
+        self.lexicon = lexicon
+
+        # A zero-width lookahead lets phrases from both polarities overlap
+        # ("not feeling good" hits a negative and a positive pattern), so the
+        # single regex counts exactly what the separate searches would.
+        alternatives = [f"(?P<neg_{i}>{p})" for i, p in enumerate(negative_patterns)]
+        alternatives += [f"(?P<pos_{i}>{p})" for i, p in enumerate(positive_patterns)]
+        self.phrase_regex = re.compile(r"\b(?=" + "|".join(alternatives) + ")")
+
+    def tokenize(self, text: str) -> Tuple[str, List[str]]:
+        """Lower-case the text once and split it into whitespace tokens"""
+        text_lower = text.lower()
+        return text_lower, text_lower.split()
+
+    def _scan(self, text_lower: str, words: List[str]) -> Tuple[Dict[str, Any], List[str]]:
+        lexicon = self.lexicon
+        positive_count = negative_count = 0
+        found_keywords = []
+        for word in words:
+            flags = lexicon.get(word)
+            if flags:
+                if flags & POSITIVE:
+                    positive_count += 1
+                if flags & NEGATIVE:
+                    negative_count += 1
+                if flags & MEDICAL:
+                    found_keywords.append(word)
+
+        # Each pattern counts once, however many times it occurs
+        matched = {m.lastgroup for m in self.phrase_regex.finditer(text_lower)}
+        negative_pattern_matches = sum(1 for name in matched if name[0] == 'n')
+        positive_pattern_matches = len(matched) - negative_pattern_matches
+
+        # Calculate sentiment score
+        sentiment_score = (positive_count + positive_pattern_matches) - (negative_count + negative_pattern_matches)
+
+        if sentiment_score > 0:
+            sentiment = "positive"
+        elif sentiment_score < 0:
+            sentiment = "negative"
+        else:
+            sentiment = "neutral"
+
+        # Determine urgency level
+        urgency_level = "normal"
+        if negative_count > 3 or negative_pattern_matches > 0:
+            urgency_level = "high"
+        elif negative_count > 1:
+            urgency_level = "medium"
+
+        return {
+            "sentiment": sentiment,
+            "sentiment_score": sentiment_score,
+            "positive_count": positive_count,
+            "negative_count": negative_count,
+            "medical_count": len(found_keywords),
+            "negative_patterns": negative_pattern_matches,
+            "positive_patterns": positive_pattern_matches,
+            "urgency_level": urgency_level
+        }, found_keywords
+
+    def sentiment(self, text: str) -> Dict[str, Any]:
+        """Sentiment, urgency and lexicon counts for a text"""
+        return self._scan(*self.tokenize(text))[0]
+
+    def analyze(self, text: str) -> Dict[str, Any]:
+        """Full memory analysis (fields of main.MemoryAnalysis) from a single pass"""
+        sentiment_analysis, found_keywords = self._scan(*self.tokenize(text))
+
+        # Calculate importance score
+        base_score = 0.3
+        medical_bonus = len(found_keywords) * 0.1
+        sentiment_bonus = 0.3 if sentiment_analysis["sentiment"] == "negative" else 0.1 if sentiment_analysis["sentiment"] == "positive" else 0.05
+        urgency_bonus = 0.2 if sentiment_analysis["urgency_level"] == "high" else 0.1 if sentiment_analysis["urgency_level"] == "medium" else 0.0
+        length_bonus = min(0.2, len(text) / 1000)
+
+        importance_score = min(1.0, base_score + medical_bonus + sentiment_bonus + urgency_bonus + length_bonus)
+
+        # Generate summary based on sentiment and content
+        if sentiment_analysis["sentiment"] == "negative":
+            if sentiment_analysis["urgency_level"] == "high":
+                summary = f"URGENT: Patient reported severe concerning symptoms. Key topics: {', '.join(found_keywords[:3]) if found_keywords else 'mental health'}"
+            else:
+                summary = f"Patient reported concerning symptoms. Key topics: {', '.join(found_keywords[:3]) if found_keywords else 'mental health'}"
+            action_items = ["Immediate follow-up required", "Schedule urgent appointment", "Consider mental health support"]
+        elif sentiment_analysis["sentiment"] == "positive":
+            summary = f"Patient reported improvement. Key topics: {', '.join(found_keywords[:3]) if found_keywords else 'recovery'}"
+            action_items = ["Continue current treatment", "Schedule follow-up appointment"]
+        else:
+            summary = f"Patient interaction recorded. Key topics: {', '.join(found_keywords[:3]) if found_keywords else 'general health'}"
+            action_items = ["Follow up with patient", "Schedule next appointment"] if importance_score > 0.5 else None
+
+        # Determine topics
+        topics = found_keywords[:3] if found_keywords else ['general health']
+        if sentiment_analysis["sentiment"] == "negative" and not found_keywords:
+            topics = ['mental health']
+
+        return {
+            "importance_score": importance_score,
+            "summary": summary,
+            "entities": found_keywords,
+            "sentiment": sentiment_analysis["sentiment"],
+            "topics": topics,
+            "action_items": action_items,
+            "urgency_level": sentiment_analysis["urgency_level"]
+        }
+
+
+# Global instance
+text_analyzer = TextAnalyzer()
+
+
+def analyze_batch(texts: List[str]) -> List[Dict[str, Any]]:
+    """Analyze a chunk of texts; top-level so it can run in a process pool"""
+    analyze = text_analyzer.analyze
+    return [analyze(text) for text in texts]
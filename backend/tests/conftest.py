@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# Tests import backend modules the way main.py does (services.*, medicine_recommendation_system)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep the app's module-level stores off the working tree
+os.environ.setdefault("MEMORY_STORE_BACKEND", "memory")
+os.environ.setdefault("ALERT_ARCHIVE_DIR", tempfile.mkdtemp(prefix="alert_archive_"))
@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services.admin_alerts import AdminAlertStore
+
+
+@pytest.fixture
+def store():
+    store = AdminAlertStore()
+    for i, patient_id in enumerate(["alice", "bob", "alice", "carol", "alice"]):
+        store.add(patient_id, "high_urgency", f"message {i}", f"2026-03-01T09:0{i}:00")
+    return store
+
+
+def ids(alerts):
+    return [alert["alert_id"] for alert in alerts]
+
+
+def test_created_alerts_are_unacknowledged_and_retrievable(store):
+    alert = store.add("dave", "high_urgency", "chest pain")
+    assert alert["alert_id"] == "alert_6" and alert["acknowledged"] is False and alert["timestamp"]
+    assert store.get("alert_6") is alert
+    assert store.get("alert_99") is None and store.get("task_1") is None and store.get("alert_x") is None
+    assert (store.count(), store.count(unacknowledged=True)) == (6, 6)
+
+
+def test_alert_ids_are_never_reused_even_under_concurrent_adds():
+    store = AdminAlertStore()
+    with ThreadPoolExecutor(8) as pool:
+        created = list(pool.map(lambda i: store.add(f"p{i % 3}", "high_urgency", str(i)), range(400)))
+    assert len(set(ids(created))) == 400
+    assert ids(store.list_alerts(limit=1000)[0]) == [f"alert_{n}" for n in range(1, 401)]
+
+
+def test_acknowledging_is_idempotent(store):
+    version = store.version
+    assert store.acknowledge("alert_3")["acknowledged"] is True
+    assert store.acknowledge("alert_3")["acknowledged"] is True
+    assert store.version == version + 1
+    assert store.count(unacknowledged=True) == 4
+    assert store.acknowledge("alert_42") is None
+
+
+def test_listing_filters_by_patient_and_acknowledgement(store):
+    store.acknowledge("alert_1")
+    store.acknowledge("alert_4")
+    assert ids(store.list_alerts()[0]) == ["alert_1", "alert_2", "alert_3", "alert_4", "alert_5"]
+    assert ids(store.list_alerts("alice")[0]) == ["alert_1", "alert_3", "alert_5"]
+    assert ids(store.list_alerts(unacknowledged=True)[0]) == ["alert_2", "alert_3", "alert_5"]
+    assert ids(store.list_alerts("alice", unacknowledged=True)[0]) == ["alert_3", "alert_5"]
+    assert store.list_alerts("carol", unacknowledged=True) == ([], None)
+    assert store.list_alerts("nobody") == ([], None)
+
+
+def test_cursor_pages_through_a_filtered_view(store):
+    page, cursor = store.list_alerts("alice", limit=2)
+    assert ids(page) == ["alert_1", "alert_3"] and cursor == "alert_3"
+    page, cursor = store.list_alerts("alice", after=cursor, limit=2)
+    assert ids(page) == ["alert_5"] and cursor is None
+    with pytest.raises(ValueError):
+        store.list_alerts(after="bogus")
+
+
+def test_acknowledge_endpoint_returns_404_for_unknown_alerts():
+    with TestClient(main.app) as client:
+        alert = main.alert_store.add("endpoint_patient", "high_urgency", "check in")
+        assert client.post(f"/admin/acknowledge-alert/{alert['alert_id']}").status_code == 200
+        assert main.alert_store.get(alert["alert_id"])["acknowledged"] is True
+        assert client.post("/admin/acknowledge-alert/alert_999999").status_code == 404
+        assert client.get("/admin/alerts", params={"after": "bogus"}).status_code == 400
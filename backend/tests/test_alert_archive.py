@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from services import alerts_service as alerts_module
+from services.alert_archive import MANIFEST_FILE, AlertArchive
+from services.alerts_service import AlertsService, AlertStatus, AlertType
+from services.inventory_engine import InventoryEngine
+from services.stock_ledger import StockLedger
+
+BASE = datetime(2026, 3, 1, 9, 0, 0)
+
+
+def record(number, item_id="ms_001", status="resolved", hours=0):
+    return {"alert_id": f"alert_{number}", "item_id": item_id, "item_name": item_id, "type": "low_stock",
+            "message": "Low stock", "created_at": (BASE + timedelta(hours=hours)).isoformat(),
+            "status": status, "severity": "medium"}
+
+
+def test_segments_round_trip_through_a_reopened_archive(tmp_path):
+    archive = AlertArchive(str(tmp_path))
+    first = [record(i, hours=i) for i in range(1, 4)]
+    second = [record(4, "ms_002", "dismissed", hours=30), record(5, hours=31)]
+    assert archive.append(first) == 3 and archive.append(second) == 2
+    assert archive.append([]) == 0
+
+    reopened = AlertArchive(str(tmp_path))
+    assert (reopened.count(), reopened.max_number()) == (5, 5)
+    assert reopened.status_counts() == {"resolved": 4, "dismissed": 1}
+
+    found, read = reopened.query()
+    assert found == list(reversed(first + second)) and read == 2
+    # Only segments overlapping the window (and holding the status) are opened
+    found, read = reopened.query(since=BASE + timedelta(hours=24))
+    assert [r["alert_id"] for r in found] == ["alert_5", "alert_4"] and read == 1
+    found, read = reopened.query(status="dismissed", item_id="ms_002")
+    assert [r["alert_id"] for r in found] == ["alert_4"] and read == 1
+
+
+def test_a_torn_manifest_line_is_ignored(tmp_path):
+    AlertArchive(str(tmp_path)).append([record(1, hours=1), record(2, hours=2)])
+    with open(tmp_path / MANIFEST_FILE, "a", encoding="utf-8") as f:
+        f.write('{"segment": 1, "file": "00000001.js')
+
+    reopened = AlertArchive(str(tmp_path))
+    assert reopened.count() == 2
+    assert reopened.append([record(3, hours=3)]) == 1
+    assert [r["alert_id"] for r in AlertArchive(str(tmp_path)).query()[0]] == ["alert_3", "alert_2", "alert_1"]
+
+
+@pytest.fixture
+def archive_dir(tmp_path):
+    return str(tmp_path / "archive")
+
+
+def new_service(archive_dir):
+    engine = InventoryEngine()
+    return AlertsService(engine, StockLedger(engine), AlertArchive(archive_dir))
+
+
+def test_closed_alerts_move_to_the_archive_and_numbering_continues(archive_dir, monkeypatch):
+    monkeypatch.setattr(alerts_module, "ALERT_HOT_CLOSED_LIMIT", 1)
+    service = new_service(archive_dir)
+    try:
+        closed = [alert.alert_id for alert in service.get_alerts_by_type(AlertType.LOW_STOCK)]
+        for alert_id in closed:
+            service.dismiss_alert(alert_id)
+        active_before = service.get_alert_statistics()["active_alerts"]
+
+        # Everything but the newest closed alert leaves the hot set
+        assert service._archive_closed_alerts() == len(closed) - 1
+        assert [service.get_alert(alert_id) is None for alert_id in closed] == [True] * (len(closed) - 1) + [False]
+        stats = service.get_alert_statistics()
+        assert stats["archived_alerts"] == len(closed) - 1
+        assert stats["dismissed_alerts"] == len(closed) and stats["active_alerts"] == active_before
+
+        archived, _ = service.query_archived_alerts(status=AlertStatus.DISMISSED)
+        assert sorted(a["alert_id"] for a in archived) == sorted(closed[:-1])
+    finally:
+        service.scheduler.shutdown(wait=False)
+
+    restarted = new_service(archive_dir)
+    try:
+        assert restarted.get_alert_statistics()["archived_alerts"] == len(closed) - 1
+        # IDs of new alerts never collide with archived ones
+        numbers = [int(alert.alert_id.rsplit("_", 1)[-1]) for alert in restarted.get_all_alerts()]
+        assert min(numbers) > max(int(alert_id.rsplit("_", 1)[-1]) for alert_id in closed[:-1])
+    finally:
+        restarted.scheduler.shutdown(wait=False)
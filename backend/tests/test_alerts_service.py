@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.alert_archive import AlertArchive
+from services.alerts_service import AlertsService, AlertStatus, AlertType, MedicalSupply, SUPPLY_KIND
+from services.expiry_schedule import ExpirySchedule
+from services.inventory_engine import InventoryEngine
+from services.stock_ledger import StockLedger
+
+NOW = datetime(2026, 3, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def service(tmp_path):
+    engine = InventoryEngine()
+    service = AlertsService(engine, StockLedger(engine), AlertArchive(str(tmp_path / "archive")))
+    yield service
+    service.scheduler.shutdown(wait=False)
+
+
+def supply(item_id, stock=50, threshold=10, expires_in_days=365):
+    return MedicalSupply(id=item_id, name=f"Supply {item_id}", current_stock=stock, threshold_quantity=threshold,
+                         expiry_date=datetime.now() + timedelta(days=expires_in_days),
+                         supplier_id="sup_test", supplier_name="Test Supplies")
+
+
+def active(service, item_id, alert_type):
+    return [alert for alert in service.get_alerts_by_type(alert_type) if alert.item_id == item_id]
+
+
+def test_low_stock_alert_is_opened_once_and_refreshed(service):
+    service.add_medical_supply(supply("t_001"))
+    assert active(service, "t_001", AlertType.LOW_STOCK) == []
+
+    service.update_stock("t_001", 8)
+    service.update_stock("t_001", 4)
+    alerts = active(service, "t_001", AlertType.LOW_STOCK)
+    assert len(alerts) == 1 and alerts[0].severity == "medium" and "has 4" in alerts[0].message
+
+    service.update_stock("t_001", 0)
+    assert active(service, "t_001", AlertType.LOW_STOCK) == alerts and alerts[0].severity == "high"
+
+    service.update_stock("t_001", 30)
+    assert active(service, "t_001", AlertType.LOW_STOCK) == []
+    assert service.get_alert(alerts[0].alert_id).status == AlertStatus.RESOLVED
+
+    # Dropping again opens a new alert rather than reviving the resolved one
+    service.update_stock("t_001", 2)
+    reopened = active(service, "t_001", AlertType.LOW_STOCK)
+    assert len(reopened) == 1 and reopened[0].alert_id != alerts[0].alert_id
+
+
+def test_bulk_counts_evaluate_each_supply_once(service):
+    service.add_medical_supply(supply("t_002"))
+    assert service.bulk_update_stock([("t_002", 5), ("t_002", 0), ("t_002", 3), ("missing", 1)]) == \
+        [None, None, None, "Medical supply not found"]
+    alerts = active(service, "t_002", AlertType.LOW_STOCK)
+    assert len(alerts) == 1 and alerts[0].severity == "medium" and "has 3" in alerts[0].message
+
+
+def test_expiry_alert_escalates_through_the_stages_and_resolves(service):
+    service.add_medical_supply(supply("t_003", expires_in_days=20))
+    alerts = active(service, "t_003", AlertType.EXPIRY)
+    assert len(alerts) == 1 and alerts[0].severity == "medium"
+
+    for days, severity in ((10, "high"), (3, "critical")):
+        service.inventory.update("t_003", expiry_date=datetime.now() + timedelta(days=days))
+        assert active(service, "t_003", AlertType.EXPIRY) == alerts and alerts[0].severity == severity
+
+    service.inventory.update("t_003", expiry_date=datetime.now() + timedelta(days=60))
+    assert active(service, "t_003", AlertType.EXPIRY) == []
+    assert service.get_alert(alerts[0].alert_id).status == AlertStatus.RESOLVED
+
+
+def test_schedule_pops_each_stage_once_when_it_is_crossed():
+    schedule = ExpirySchedule()
+    assert schedule.track("a", NOW + timedelta(days=40), NOW) == -1
+    assert schedule.track("b", NOW + timedelta(days=20), NOW) == 0
+    assert schedule.pop_due(NOW + timedelta(days=5)) == []
+
+    assert schedule.pop_due(NOW + timedelta(days=10, hours=1)) == [("b", 1), ("a", 0)]
+    assert schedule.pop_due(NOW + timedelta(days=10, hours=2)) == []
+    # A check that comes late reports only the furthest stage reached
+    assert schedule.pop_due(NOW + timedelta(days=34)) == [("b", 2), ("a", 2)]
+
+    # A new expiry date supersedes the pending stage changes
+    assert schedule.track("b", NOW + timedelta(days=400), NOW + timedelta(days=34)) == -1
+    assert schedule.pop_due(NOW + timedelta(days=40)) == []
+    assert schedule.stage_of("a") == 2 and schedule.stage_of("b") == -1
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Two rows per chunk, so errors and counts span several chunks
+    monkeypatch.setattr(main, "STOCK_COUNT_CHUNK_SIZE", 2)
+    with TestClient(main.app) as client:
+        yield client
+
+
+def upload(client, body, content_type):
+    response = client.post("/inventory/supplies/bulk-update-stock", content=body,
+                           headers={"content-type": content_type})
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_csv_counts_are_applied_in_chunks_with_per_row_errors(client):
+    body = "\n".join([
+        "item_id,new_quantity",
+        "ms_001,40",
+        "ms_missing,10",
+        "ms_002,not-a-number",
+        "ms_003,7",
+        "ms_004,-1",
+        "ms_001,41",
+        "ms_005,2,extra",
+    ])
+    lines = upload(client, body, "text/csv")
+
+    errors = [line for line in lines if "error" in line]
+    assert [(e["index"], e["item_id"]) for e in errors] == [
+        (1, "ms_missing"), (2, "ms_002"), (4, "ms_004"), (6, None)]
+    assert errors[0]["error"] == "Medical supply not found"
+    assert lines[-1] == {"summary": {"received": 7, "updated": 3, "failed": 4}}
+
+    # Later rows for the same supply win, even across chunks
+    assert main.alerts_service.get_supply_by_id("ms_001").current_stock == 41
+    assert main.alerts_service.get_supply_by_id("ms_003").current_stock == 7
+
+
+def test_ndjson_counts_update_low_stock_alerts(client):
+    lines = upload(client, "\n".join(json.dumps(row) for row in [
+        {"item_id": "ms_005", "new_quantity": 500},
+        {"item_id": "ms_005", "new_quantity": 0},
+    ]), "application/x-ndjson")
+
+    assert lines == [{"summary": {"received": 2, "updated": 2, "failed": 0}}]
+    alert = main.alerts_service._get_existing_alert("ms_005", main.AlertType.LOW_STOCK)
+    assert alert is not None and alert.severity == "high"
+
+
+def test_unsupported_upload_type_is_refused(client):
+    response = client.post("/inventory/supplies/bulk-update-stock", content="{}",
+                           headers={"content-type": "application/json"})
+    assert response.status_code == 415
@@ -0,0 +1,76 @@
+import importlib.util
+import json
+import sys
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from enum import Enum
+
+import pytest
+from pydantic import BaseModel
+
+from services import json_encoding
+
+pytest.importorskip("orjson")
+
+
+class Status(str, Enum):
+    ACTIVE = "active"
+
+
+class Level(Enum):
+    HIGH = 3
+
+
+class Alert(BaseModel):
+    alert_id: str
+    status: Status
+    created_at: datetime
+
+
+@dataclass
+class Movement:
+    item_id: str
+    at: datetime
+    level: Level
+
+
+@pytest.fixture
+def stdlib_encoding(monkeypatch):
+    """A second copy of json_encoding loaded as if orjson were not installed"""
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    spec = importlib.util.spec_from_file_location("json_encoding_stdlib", json_encoding.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert module.orjson is None
+    return module
+
+
+CONTENT = [
+    {"naive": datetime(2026, 3, 1, 9, 30, 0), "micro": datetime(2026, 3, 1, 9, 30, 0, 123456),
+     "aware": datetime(2026, 3, 1, 9, 30, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+     "utc": datetime(2026, 3, 1, 9, 30, tzinfo=timezone.utc), "day": date(2026, 3, 1)},
+    {"str_enum": Status.ACTIVE, "enum": Level.HIGH, "list": [Status.ACTIVE, Level.HIGH]},
+    {"text": "Paracétamol — 500 mg, 头痛, emoji 💊", "quote": 'say "hi"\n', "numbers": [0, -1, 2.5, None, True]},
+    Alert(alert_id="alert_1", status=Status.ACTIVE, created_at=datetime(2026, 3, 1, 9, 0)),
+    Movement("ms_001", datetime(2026, 3, 1, 9, 0, 0, 5), Level.HIGH),
+    {"nested": {"models": [Alert(alert_id="alert_2", status="active", created_at=datetime(2026, 1, 1))]}},
+]
+
+
+@pytest.mark.parametrize("content", CONTENT)
+def test_orjson_and_stdlib_encodings_produce_the_same_bytes(stdlib_encoding, content):
+    fast = json_encoding.dumps(content)
+    fallback = stdlib_encoding.dumps(content)
+    assert fast == fallback
+    json.loads(fast)
+
+
+def test_non_ascii_text_is_written_as_utf8(stdlib_encoding):
+    for module in (json_encoding, stdlib_encoding):
+        assert module.dumps({"name": "Crème"}) == '{"name":"Crème"}'.encode("utf-8")
+
+
+def test_float_exponents_may_differ_in_notation_only(stdlib_encoding):
+    # orjson writes 1e-7, json writes 1e-07: same value once decoded
+    content = {"values": [1e-7, 1.5e300, 0.1 + 0.2]}
+    assert json.loads(json_encoding.dumps(content)) == json.loads(stdlib_encoding.dumps(content)) == content
@@ -0,0 +1,77 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def pages(client, path, limit, **params):
+    """Follow X-Next-Cursor from the first page to the last"""
+    items, cursors = [], []
+    cursor = None
+    while True:
+        query = dict(params, limit=limit, **({"cursor": cursor} if cursor else {}))
+        response = client.get(path, params=query)
+        assert response.status_code == 200
+        items += response.json()
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            return items, cursors
+        cursors.append(cursor)
+
+
+@pytest.mark.parametrize("path", ["/medicine/all", "/inventory/supplies"])
+def test_cursor_pages_add_up_to_the_full_listing(client, path):
+    full = client.get(path).json()
+    assert "x-next-cursor" not in client.get(path).headers
+    paged, cursors = pages(client, path, 2)
+    assert paged == full
+    assert len(cursors) == (len(full) - 1) // 2
+    # Revisiting a cursor returns the same page
+    again = client.get(path, params={"limit": 2, "cursor": cursors[0]}).json()
+    assert again == full[2:4]
+
+
+def test_fields_project_every_page(client):
+    paged, _ = pages(client, "/inventory/supplies", 3, fields="id,status")
+    assert paged and all(set(item) == {"id", "status"} for item in paged)
+    assert client.get("/inventory/supplies", params={"fields": "id,nope"}).status_code == 400
+    assert client.get("/inventory/supplies", params={"cursor": "-1"}).status_code == 400
+    assert client.get("/inventory/supplies", params={"cursor": "abc"}).status_code == 400
+
+
+def test_if_none_match_returns_304_until_supplies_change(client):
+    first = client.get("/inventory/supplies")
+    etag = first.headers["etag"]
+    assert client.get("/inventory/supplies", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/inventory/supplies", headers={"If-None-Match": "*"}).status_code == 304
+    # Another page or projection is another representation
+    assert client.get("/inventory/supplies", params={"limit": 1}).headers["etag"] != etag
+
+    supply = main.alerts_service.get_supply_by_id("ms_003")
+    version = main.alerts_service.supplies_version
+    main.alerts_service.update_stock("ms_003", supply.current_stock + 1)
+    assert main.alerts_service.supplies_version > version
+    fresh = client.get("/inventory/supplies", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+    assert client.get("/inventory/supplies", headers={"If-None-Match": f'W/"other", {fresh.headers["etag"]}'}) \
+        .status_code == 304
+
+
+def test_medicine_etag_follows_the_catalog_version(client):
+    etag = client.get("/medicine/all").headers["etag"]
+    assert client.get("/medicine/all", headers={"If-None-Match": etag}).status_code == 304
+
+    before = main.ledger.level("paracetamol")["quantity"]
+    version = main.medicine_engine.version
+    try:
+        main.ledger.count("paracetamol", before + 1)
+        assert main.medicine_engine.version > version
+        assert client.get("/medicine/all", headers={"If-None-Match": etag}).status_code == 200
+    finally:
+        main.ledger.count("paracetamol", before)
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from medicine_recommendation_system import medicine_engine
+from services.symptom_scanner import SymptomScanner
+
+
+def test_score_many_matches_scoring_each_patient():
+    matrix = medicine_engine.rule_matrix
+    symptoms = list(medicine_engine.symptom_scanner.groups)
+    rng = random.Random(3)
+    common = [{s: rng.choice([0.3, 0.6, 1.0]) for s in rng.sample(symptoms, rng.randint(1, 4))} for _ in range(5)]
+    # Mixed symptom sets, repeated complaints (more than one batch of them) and no symptoms
+    patients = [dict(rng.choice(common)) for _ in range(80)]
+    patients += [{s: 0.5 for s in rng.sample(symptoms, rng.randint(1, 4))} for _ in range(20)] + [{}]
+    rng.shuffle(patients)
+
+    assert matrix.score_many(patients, 3) == [matrix.score(patient, 3) for patient in patients]
+
+
+def test_batch_scan_keeps_texts_apart():
+    scanner = SymptomScanner({"cold": ["runny nose", "cold"], "cough": ["cough"]})
+    texts = ["my nose is runny", "nose and a cough", "a cold and a runny nose", ""]
+    assert scanner.count_groups_many(texts) == [scanner.count_groups(text) for text in texts]
+    assert scanner.count_groups_many(["it is runny", "nose bleeds"]) == [{}, {}]
+
+
+def test_batch_triage_matches_single_patient_triage():
+    texts = ["I have a headache and fever", "bad cough and a cold", "I have a headache and fever", "feeling fine"]
+    batch = medicine_engine.process_medicine_recommendations([(f"p{i}", text) for i, text in enumerate(texts)])
+
+    for i, (text, result) in enumerate(zip(texts, batch["results"])):
+        single = medicine_engine.process_medicine_recommendation(text, f"p{i}")
+        assert result["symptoms_detected"] == single["symptoms_detected"] == medicine_engine.analyze_symptoms(text)
+        assert [r["medicine_id"] for r in result["recommendations"]] == \
+            [r["medicine_id"] for r in single["recommendations"]]
+
+
+@pytest.mark.parametrize("symptoms, medicine, reasoning", [
+    ({"depression": 0.5, "anxiety": 0.8}, "alprazolam", "Anxiety"),
+    ({"depression": 0.8, "anxiety": 0.5}, "sertraline", "Depression"),
+    ({"depression": 0.5, "anxiety": 0.5}, "alprazolam", "Anxiety"),   # ties go to anxiety, as before the rule table
+    ({"dizziness": 0.5, "nausea": 0.8}, "paracetamol", "Nausea"),
+    ({"dizziness": 0.4, "nausea": 0.4}, "paracetamol", "Nausea"),
+])
+def test_exclusive_groups_pick_the_dominant_symptom_before_the_cap(symptoms, medicine, reasoning):
+    recommendations = medicine_engine.recommend_medicines(symptoms)
+    assert recommendations[0].medicine.id == medicine
+    assert recommendations[0].reasoning.startswith(reasoning)
+    assert len(recommendations) == 1
+
+
+def test_dominant_symptom_wins_from_text():
+    result = medicine_engine.process_medicine_recommendation("I am so anxious and depressed")
+    assert [rec["medicine_id"] for rec in result["recommendations"]][:1] == ["alprazolam"]
@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from services.memory_aggregates import MemoryAggregates
+from services.memory_store import InMemoryMemoryStore
+
+BASE = datetime(2026, 3, 1, 9, 0, 0)
+
+
+def record(i: int, sentiment: str = "neutral") -> dict:
+    return {
+        "text": f"note {i}",
+        "timestamp": (BASE + timedelta(hours=i)).isoformat(),
+        "analysis": {"importance_score": 0.5, "sentiment": sentiment},
+    }
+
+
+def test_records_seen_by_the_initial_scan_are_counted_once():
+    store = InMemoryMemoryStore()
+    aggregates = MemoryAggregates(store)
+    store.append("alice", record(0))
+
+    # Stored before the buckets are built, reported to the aggregates after
+    seq = store.append("alice", record(1, "positive"))
+    aggregates.add("alice", seq, record(1, "positive"))
+    seq = store.append("alice", record(2, "negative"))
+    aggregates.add("alice", seq, record(2, "negative"))
+
+    summary = aggregates.summarize("alice", since=BASE - timedelta(days=1))
+    assert summary["total_interactions"] == 3
+    assert summary["sentiment_distribution"] == {"positive": 1, "negative": 1, "neutral": 1}
+
+
+def test_concurrent_writers_and_a_cold_cache_agree_with_the_store():
+    store = InMemoryMemoryStore()
+    aggregates = MemoryAggregates(store)
+
+    def save(i):
+        seq = store.append("alice", record(i))
+        if i % 50 == 0:
+            aggregates.forget("alice")
+        aggregates.add("alice", seq, record(i))
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(save, range(400)))
+
+    summary = aggregates.summarize("alice", since=BASE - timedelta(days=1))
+    assert summary["total_interactions"] == store.count("alice") == 400
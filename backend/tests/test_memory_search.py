@@ -0,0 +1,117 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from services import memory_search as memory_search_module
+from services.memory_search import MemorySearchIndex
+from services.memory_store import InMemoryMemoryStore
+
+NOW = datetime(2026, 6, 1, 12, 0, 0)
+
+
+def record(text: str, hours_ago: float = 0.0, importance: float = 0.5) -> dict:
+    return {
+        "text": text,
+        "timestamp": (NOW - timedelta(hours=hours_ago)).isoformat(),
+        "analysis": {"importance_score": importance, "entities": [], "topics": []},
+    }
+
+
+def filled_store(records, user_id="alice"):
+    store = InMemoryMemoryStore()
+    store.append_many((user_id, r) for r in records)
+    return store
+
+
+def test_bm25_ranks_frequent_terms_and_short_memories_first():
+    store = filled_store([
+        record("headache headache headache"),
+        record("headache after lunch"),
+        record("a mild headache after a long walk in the park with friends"),
+        record("went for a walk"),
+    ])
+    results = MemorySearchIndex(store).search("alice", "headache", k=5, now=NOW)
+
+    assert [r["record"]["text"] for r in results] == [
+        "headache headache headache",
+        "headache after lunch",
+        "a mild headache after a long walk in the park with friends",
+    ]
+    assert results[0]["bm25"] > results[1]["bm25"] > results[2]["bm25"]
+
+
+def test_recency_and_importance_break_equal_relevance():
+    store = filled_store([
+        record("dizzy spell", hours_ago=24 * 90, importance=0.5),
+        record("dizzy spell", hours_ago=1, importance=0.5),
+        record("dizzy spell", hours_ago=1, importance=0.9),
+    ])
+    results = MemorySearchIndex(store).search("alice", "dizzy", k=3, now=NOW)
+
+    assert [(r["record"]["timestamp"], r["record"]["analysis"]["importance_score"]) for r in results] == [
+        (store.get("alice", [2])[0]["timestamp"], 0.9),
+        (store.get("alice", [1])[0]["timestamp"], 0.5),
+        (store.get("alice", [0])[0]["timestamp"], 0.5),
+    ]
+
+
+def synthetic(count: int, seed: int = 3):
+    rng = random.Random(seed)
+    vocabulary = ["pain", "sleep", "tired", "walk"] + [f"w{i}" for i in range(200)] + ["vertigo"]
+    weights = [1.0 / (rank + 1) for rank in range(len(vocabulary))]
+    return [
+        record(" ".join(rng.choices(vocabulary, weights=weights, k=rng.randint(3, 15))),
+               hours_ago=rng.uniform(0, 24 * 365), importance=rng.random())
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.skipif(memory_search_module.np is None, reason="NumPy scoring not available")
+@pytest.mark.parametrize("block_size", [64, 512, 8192])
+@pytest.mark.parametrize("query", ["vertigo", "pain sleep", "pain sleep tired walk", "vertigo pain w7"])
+def test_block_pruned_scoring_matches_exhaustive_scoring(monkeypatch, block_size, query):
+    store = filled_store(synthetic(3000))
+    pruned = MemorySearchIndex(store, block_size=block_size).search("alice", query, k=10, now=NOW)
+
+    monkeypatch.setattr(memory_search_module, "np", None)
+    exhaustive = MemorySearchIndex(store).search("alice", query, k=10, now=NOW)
+
+    assert [r["score"] for r in pruned] == pytest.approx([r["score"] for r in exhaustive])
+    assert [r["record"] for r in pruned] == [r["record"] for r in exhaustive]
+
+
+def test_index_holds_no_records_and_reads_results_from_the_store():
+    store = filled_store([record("knee pain"), record("slept well")])
+    index = MemorySearchIndex(store)
+    index.search("alice", "pain", now=NOW)
+
+    user_index = index._users["alice"]
+    assert not hasattr(user_index, "records")
+    assert list(user_index.doc_seq) == [0, 1]
+
+    reads = []
+    original_get = store.get
+
+    def tracking_get(user_id, seqs):
+        reads.append(list(seqs))
+        return original_get(user_id, seqs)
+
+    store.get = tracking_get
+    assert [r["record"]["text"] for r in index.search("alice", "pain", now=NOW)] == ["knee pain"]
+    assert reads == [[0]]
+
+
+def test_records_seen_by_the_initial_scan_are_not_indexed_twice():
+    store = filled_store([record("back pain", hours_ago=3)])
+    index = MemorySearchIndex(store)
+
+    # Written to the store before the index loads, then reported by the writer
+    seq = store.append("alice", record("neck pain", hours_ago=2))
+    index.add("alice", seq, store.get("alice", [seq])[0])
+    assert len(index._users["alice"]) == 2
+
+    seq = store.append("alice", record("hip pain", hours_ago=1))
+    index.add("alice", seq, store.get("alice", [seq])[0])
+    assert [r["record"]["text"] for r in index.search("alice", "pain", k=5, now=NOW)] == [
+        "hip pain", "neck pain", "back pain"]
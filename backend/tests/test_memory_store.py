@@ -0,0 +1,95 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.memory_store import InMemoryMemoryStore, MemoryStore, SegmentedLogMemoryStore
+
+BASE = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def record(i: int, text: str = "note") -> dict:
+    return {"text": f"{text} {i}", "timestamp": (BASE + timedelta(hours=i)).isoformat()}
+
+
+def test_incomplete_backend_fails_at_construction():
+    class Partial(MemoryStore):
+        def append(self, user_id, record):
+            return record
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_segments_roll_over_at_segment_size(tmp_path):
+    store = SegmentedLogMemoryStore(str(tmp_path), segment_size=3)
+    store.append_many(("alice", record(i)) for i in range(7))
+
+    user_dir = os.path.join(str(tmp_path), "alice")
+    assert sorted(os.listdir(user_dir)) == [
+        "00000000.idx", "00000000.jsonl", "00000001.idx", "00000001.jsonl", "00000002.idx", "00000002.jsonl"]
+    assert store.count("alice") == 7
+    assert [r["text"] for r in store.recent("alice", 2)] == ["note 5", "note 6"]
+
+
+def test_time_range_reads_are_half_open(tmp_path):
+    store = SegmentedLogMemoryStore(str(tmp_path), segment_size=4)
+    for i in range(10):
+        store.append("alice", record(i))
+
+    found = store.range("alice", since=BASE + timedelta(hours=2), until=BASE + timedelta(hours=6))
+    assert [r["text"] for r in found] == ["note 3", "note 4", "note 5", "note 6"]
+    assert store.count_since("alice", BASE + timedelta(hours=7)) == 2
+    assert store.range("bob") == []
+
+
+def test_index_is_rebuilt_after_restart_with_backfills_in_order(tmp_path):
+    store = SegmentedLogMemoryStore(str(tmp_path), segment_size=2)
+    for i in (0, 1, 4, 5):
+        store.append("alice", record(i))
+    store.append("alice", record(2, "backfill"))
+
+    reopened = SegmentedLogMemoryStore(str(tmp_path), segment_size=2, max_hot_segments=1)
+    assert [r["text"] for r in reopened.range("alice")] == ["note 0", "note 1", "backfill 2", "note 4", "note 5"]
+    assert reopened.users() == ["alice"]
+
+
+def test_in_memory_store_matches_log_store(tmp_path):
+    log_store = SegmentedLogMemoryStore(str(tmp_path), segment_size=3)
+    memory = InMemoryMemoryStore()
+    for store in (log_store, memory):
+        store.append_many(("alice", record(i)) for i in (3, 1, 2, 0))
+    since = BASE + timedelta(hours=1)
+    assert log_store.range("alice", since=since) == memory.range("alice", since=since)
+
+
+@pytest.mark.parametrize("torn_index", [False, True])
+def test_records_written_without_their_index_line_are_cut_on_load(tmp_path, torn_index):
+    store = SegmentedLogMemoryStore(str(tmp_path), segment_size=3)
+    store.append_many(("alice", record(i)) for i in range(4))
+
+    # Crash after the data line of record 4 was flushed, before (or while) its index line was written
+    user_dir = os.path.join(str(tmp_path), "alice")
+    with open(os.path.join(user_dir, "00000001.jsonl"), "a", encoding="utf-8") as f:
+        f.write('{"text": "lost 4", "timestamp": "2026-01-01T16:00:00"}\n{"text": "lo')
+    if torn_index:
+        with open(os.path.join(user_dir, "00000001.idx"), "a") as f:
+            f.write("17670")
+
+    reopened = SegmentedLogMemoryStore(str(tmp_path), segment_size=3)
+    assert reopened.count("alice") == 4
+    assert reopened.append("alice", record(5)) == 4
+    assert [r["text"] for r in reopened.get("alice", [3, 4])] == ["note 3", "note 5"]
+    again = SegmentedLogMemoryStore(str(tmp_path), segment_size=3)
+    assert [r["text"] for r in again.range("alice")] == ["note 0", "note 1", "note 2", "note 3", "note 5"]
+
+
+def test_a_segment_whose_index_was_never_written_is_dropped(tmp_path):
+    store = SegmentedLogMemoryStore(str(tmp_path), segment_size=2)
+    store.append_many(("alice", record(i)) for i in range(2))
+    with open(os.path.join(str(tmp_path), "alice", "00000001.jsonl"), "w", encoding="utf-8") as f:
+        f.write('{"text": "lost 2", "timestamp": "2026-01-01T14:00:00"}\n')
+
+    reopened = SegmentedLogMemoryStore(str(tmp_path), segment_size=2)
+    assert reopened.append("alice", record(3)) == 2
+    assert [r["text"] for r in reopened.get("alice", [0, 1, 2])] == ["note 0", "note 1", "note 3"]
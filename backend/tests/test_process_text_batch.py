@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Small chunks and a window of one exercise the bounded in-flight path
+    monkeypatch.setattr(main, "BATCH_CHUNK_SIZE", 2)
+    monkeypatch.setattr(main, "BATCH_MAX_IN_FLIGHT", 1)
+    with TestClient(main.app) as client:
+        yield client
+
+
+def post_ndjson(client, lines):
+    body = "".join(line + "\n" for line in lines)
+    response = client.post("/process-text/batch", content=body, headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_ndjson_batch_streams_results_and_per_record_errors(client):
+    records = [json.dumps({"user_id": "batch_user_1", "text": f"I feel great today {i}"}) for i in range(5)]
+    lines = post_ndjson(client, records[:2] + ["{not json", json.dumps({"user_id": 7, "text": "x"})] + records[2:])
+
+    summary = lines[-1]["summary"]
+    assert summary == {"received": 7, "processed": 5, "failed": 2}
+    errors = {line["index"]: line["error"] for line in lines if "error" in line}
+    assert set(errors) == {2, 3}
+    assert errors[2].startswith("Invalid JSON line")
+    results = sorted(line["index"] for line in lines if "analysis" in line)
+    assert results == [0, 1, 4, 5, 6]
+    assert all(line["user_id"] == "batch_user_1" for line in lines if "analysis" in line)
+
+
+def test_batch_records_are_stored(client):
+    before = main.memory_store.count("batch_user_2")
+    post_ndjson(client, [json.dumps({"user_id": "batch_user_2", "text": f"note {i}"}) for i in range(5)])
+    assert main.memory_store.count("batch_user_2") == before + 5
+
+
+def test_json_array_body_is_accepted(client):
+    response = client.post("/process-text/batch", json=[{"user_id": "batch_user_3", "text": "hello"}])
+    assert json.loads(response.text.splitlines()[-1])["summary"]["processed"] == 1
+
+
+def route_completed(route):
+    return main.cpu_executor.metrics()["routes"].get(route, {}).get("completed", 0)
+
+
+def test_audio_and_image_analysis_run_on_the_cpu_executor(client):
+    before = main.memory_store.count("media_user_1")
+    audio, image = route_completed("process-audio"), route_completed("process-image")
+
+    response = client.post("/process-audio", json={"user_id": "media_user_1", "filepath": "visit.wav"})
+    assert response.status_code == 200 and "summary" in response.json()
+    response = client.post("/process-image", data={"user_id": "media_user_1", "caption": "rash"},
+                           files={"image": ("rash.png", b"\x89PNG", "image/png")})
+    assert response.status_code == 200 and "summary" in response.json()
+
+    assert route_completed("process-audio") == audio + 1
+    assert route_completed("process-image") == image + 1
+    assert main.memory_store.count("media_user_1") == before + 2
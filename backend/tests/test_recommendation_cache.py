@@ -0,0 +1,77 @@
+from medicine_recommendation_system import medicine_engine
+from services.recommendation_cache import RecommendationCache, symptom_fingerprint
+from services.stock_ledger import ledger
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def key(name):
+    return symptom_fingerprint({name: 0.5})
+
+
+def test_invalidation_drops_only_entries_showing_the_medicine():
+    cache = RecommendationCache()
+    cache.put(key("fever"), "A", ["paracetamol", "ibuprofen"])
+    cache.put(key("cough"), "B", ["dextromethorphan"])
+    cache.put(key("pain"), "C", ["ibuprofen"])
+
+    assert cache.invalidate_medicine("ibuprofen") == 2
+    assert cache.get(key("fever")) is None and cache.get(key("pain")) is None
+    assert cache.get(key("cough")) == "B"
+    assert cache.invalidate_medicine("paracetamol") == 0   # its entry is already gone
+    assert cache.metrics()["invalidations"] == 2 and cache.metrics()["medicines_tracked"] == 1
+
+
+def test_values_computed_before_any_invalidation_are_refused():
+    cache = RecommendationCache()
+    generation = cache.generation
+    cache.invalidate_medicine("unrelated")   # global generation: refuses every put in flight
+    cache.put(key("fever"), "stale", ["paracetamol"], generation)
+    assert cache.get(key("fever")) is None
+    cache.put(key("fever"), "fresh", ["paracetamol"], cache.generation)
+    assert cache.get(key("fever")) == "fresh"
+
+
+def test_entries_expire_and_the_least_recently_used_is_evicted():
+    clock = Clock()
+    cache = RecommendationCache(max_entries=2, ttl_seconds=10, clock=clock)
+    cache.put(key("fever"), "A", ["paracetamol"])
+    cache.put(key("cough"), "B", ["dextromethorphan"])
+    assert cache.get(key("fever")) == "A"
+    cache.put(key("pain"), "C", ["ibuprofen"])
+    assert cache.get(key("cough")) is None and cache.metrics()["evictions"] == 1
+
+    clock.now = 10
+    assert cache.get(key("fever")) is None and cache.metrics()["expired"] == 1
+    assert cache.metrics()["medicines_tracked"] == 1
+
+
+def test_a_stock_change_evicts_only_responses_that_show_the_medicine_or_a_substitute():
+    cache = medicine_engine.recommendation_cache
+    cache.clear()
+    sets = [{"insomnia": 0.5}, {"cough": 0.5}, {"skin_problems": 0.5}]
+    shown = [set(medicine_engine._shown_medicines(formatted))
+             for formatted in medicine_engine._formatted_recommendations(sets)]
+
+    def cached():
+        return [symptom_fingerprint(symptoms) in cache._entries for symptoms in sets]
+
+    assert cached() == [True, True, True]
+    # A medicine shown by the first response only (e.g. as a substitute), then one shown by none
+    changed = [sorted(shown[0] - shown[1] - shown[2])[0],
+               next(m.id for m in medicine_engine.get_all_medicines() if m.id not in set().union(*shown))]
+    levels = {medicine_id: ledger.level(medicine_id)["quantity"] for medicine_id in changed}
+    try:
+        ledger.count(changed[0], levels[changed[0]] + 1)
+        assert cached() == [False, True, True]
+        ledger.count(changed[1], levels[changed[1]] + 1)
+        assert cached() == [False, True, True]
+    finally:
+        for medicine_id, quantity in levels.items():
+            ledger.count(medicine_id, quantity)
@@ -0,0 +1,75 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from medicine_recommendation_system import medicine_engine
+from services.restocking_requests import RestockingRequestTable
+from services.stock_ledger import ledger
+
+
+def request(request_id, medicine_id):
+    return SimpleNamespace(request_id=request_id, medicine_id=medicine_id, status="pending", closed_at=None)
+
+
+def test_one_open_request_per_medicine():
+    table = RestockingRequestTable()
+    first = table.add(request("r1", "aspirin"))
+    assert table.open_request("aspirin") is first and table.get("r1") is first
+    with pytest.raises(ValueError):
+        table.add(request("r2", "aspirin"))
+    table.add(request("r3", "melatonin"))
+    assert [r.request_id for r in table.list_open()] == ["r1", "r3"]
+
+
+def test_closing_moves_a_request_to_the_history():
+    table = RestockingRequestTable()
+    table.add(request("r1", "aspirin"))
+    closed_at = datetime(2026, 3, 1, 9, 0)
+    closed = table.close("aspirin", "fulfilled", closed_at)
+    assert (closed.status, closed.closed_at) == ("fulfilled", closed_at)
+    assert table.open_request("aspirin") is None and table.get("r1") is closed
+    assert table.close("aspirin") is None
+    # A new request can be opened once the old one is closed
+    table.add(request("r2", "aspirin"))
+    assert table.stats()["open"] == 1 and table.stats()["history"] == 1
+
+
+def test_history_is_compacted_oldest_first():
+    table = RestockingRequestTable(history_limit=2)
+    for i in range(4):
+        table.add(request(f"r{i}", f"m{i}"))
+        table.close(f"m{i}")
+    assert [r.request_id for r in table.list_history()] == ["r2", "r3"]
+    assert table.get("r0") is None and table.get("r1") is None and table.get("r3") is not None
+    assert table.stats()["compacted"] == 2
+
+
+def test_repeat_triggers_merge_and_the_feed_closes_the_request_as_fulfilled():
+    medicine_id = "melatonin"
+    item = medicine_engine.inventory.get(medicine_id)
+    quantity, threshold = item.current_stock, item.threshold_quantity
+    table = medicine_engine.restocking_requests
+    table.close(medicine_id, "cancelled")   # start without an open request
+    try:
+        ledger.count(medicine_id, threshold)
+        first = medicine_engine.check_stock_and_create_restocking_request(medicine_id)
+        assert first.urgency_level == "medium" and first.trigger_count == 1
+        merged = table.merged
+
+        ledger.count(medicine_id, 0)
+        again = medicine_engine.check_stock_and_create_restocking_request(medicine_id)
+        assert again is first
+        assert (first.trigger_count, first.current_stock, first.urgency_level) == (2, 0, "high")
+        assert table.merged == merged + 1
+        assert [r.request_id for r in medicine_engine.get_restocking_requests() if r.medicine_id == medicine_id] \
+            == [first.request_id]
+
+        # Restocked above the threshold: the change feed closes it
+        ledger.count(medicine_id, threshold + 1)
+        assert table.open_request(medicine_id) is None
+        assert first.status == "fulfilled" and first.closed_at is not None
+        assert first in medicine_engine.get_restocking_requests(include_history=True)
+        assert medicine_engine.check_stock_and_create_restocking_request(medicine_id) is None
+    finally:
+        ledger.count(medicine_id, quantity)
@@ -0,0 +1,23 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import main
+
+
+def test_concurrent_assignments_tag_each_untagged_supply_once(monkeypatch):
+    monkeypatch.setattr(main, "rfid_tags", {})
+    monkeypatch.setattr(main, "rfid_tags_version", 0)
+    supplies = main.alerts_service.get_medical_supplies()
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: main._assign_rfid_tags(), range(8)))
+
+    # One call tags every supply; the rest see full coverage and add the
+    # three demonstration tags each
+    assert sorted(result["assigned"] for result in results)[-1] == len(supplies)
+    assert sum(result["assigned"] for result in results) == len(supplies) + 3 * 7
+    assert main.rfid_tags_version == 8
+    assert len(main.rfid_tags) == len(supplies) + 3 * 7
+
+    statistics = main._rfid_statistics()
+    assert statistics["supplies_with_rfid"] == len(supplies)
+    assert main._validate_rfid_tags()["valid_tags"] == statistics["total_rfid_tags"]
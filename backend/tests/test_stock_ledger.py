@@ -0,0 +1,125 @@
+import threading
+
+import pytest
+
+from services.inventory_engine import InventoryEngine, StockItem
+from services.stock_ledger import InsufficientStockError, StockLedger, UnknownItemError, VersionConflictError
+
+
+@pytest.fixture
+def ledger():
+    engine = InventoryEngine()
+    engine.add_many([StockItem("a", "Item A", 10, 2), StockItem("b", "Item B", 5, 2)], "supply")
+    return StockLedger(engine, stripes=4)
+
+
+def test_expected_version_applies_only_to_an_unchanged_item(ledger):
+    level = ledger.level("a")
+    assert level["version"] == 0
+
+    movement = ledger.dispense("a", 3, expected_version=0)
+    assert (movement.quantity, movement.version) == (7, 1)
+
+    with pytest.raises(VersionConflictError):
+        ledger.receive("a", 5, expected_version=0)
+    assert ledger.level("a") == {"item_id": "a", "kind": "supply", "quantity": 7, "version": 1}
+    assert ledger.stats()["refused"] == 1
+
+    ledger.receive("a", 5, expected_version=1)
+    assert ledger.level("a")["quantity"] == 12
+
+
+def test_refused_movements_leave_stock_unchanged(ledger):
+    with pytest.raises(InsufficientStockError):
+        ledger.dispense("b", 6)
+    with pytest.raises(UnknownItemError):
+        ledger.dispense("missing", 1)
+    assert ledger.level("b") == {"item_id": "b", "kind": "supply", "quantity": 5, "version": 0}
+    assert ledger.stats() == {"movements": 0, "journal_retained": 0, "refused": 1, "stripes": 4}
+
+
+def test_concurrent_movements_all_count_and_journal_in_version_order(ledger):
+    def work():
+        for _ in range(200):
+            ledger.receive("a", 1)
+            ledger.dispense("a", 1)
+
+    workers = [threading.Thread(target=work) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert ledger.level("a") == {"item_id": "a", "kind": "supply", "quantity": 10, "version": 1600}
+    versions = [movement.version for movement in ledger.movements("a", limit=2000)]
+    assert versions == list(range(1, 1601))
+
+
+def test_subscribers_run_after_the_locks_are_released(ledger):
+    engine = ledger.engine
+    seen = []
+
+    def probe(free):
+        # Another thread can take the engine lock and the item's stripe meanwhile
+        for lock in (engine._lock, ledger._stripe("a")):
+            acquired = lock.acquire(timeout=1)
+            free.append(acquired)
+            if acquired:
+                lock.release()
+
+    def subscriber(change):
+        free = []
+        thread = threading.Thread(target=probe, args=(free,))
+        thread.start()
+        thread.join()
+        seen.append((change.seq, change.new["current_stock"], all(free)))
+
+    engine.subscribe(subscriber)
+    ledger.dispense("a", 1)
+    ledger.dispense("a", 1)
+    assert [(stock, free) for _, stock, free in seen] == [(9, True), (8, True)]
+    assert seen[0][0] < seen[1][0]
+
+
+def test_a_write_returns_only_after_its_change_is_delivered(ledger):
+    engine = ledger.engine
+    reached, release = threading.Event(), threading.Event()
+    delivered = []
+
+    def subscriber(change):
+        if change.item_id == "b":
+            reached.set()
+            release.wait(5)
+        delivered.append(change.item_id)
+
+    engine.subscribe(subscriber)
+    engine.set_stock("a", 9, dispatch=False)
+    engine.set_stock("b", 4, dispatch=False)
+    # Another thread pops both changes and is still delivering "b"
+    deliverer = threading.Thread(target=engine.dispatch)
+    deliverer.start()
+    assert reached.wait(5) and delivered == ["a"]
+    writer = threading.Thread(target=engine.dispatch)
+    writer.start()
+    writer.join(0.2)
+    assert writer.is_alive()
+
+    release.set()
+    writer.join(5)
+    deliverer.join(5)
+    assert delivered == ["a", "b"]
+
+
+def test_a_failing_subscriber_does_not_stop_the_others(ledger):
+    engine = ledger.engine
+    seen = []
+
+    def failing(change):
+        raise RuntimeError("subscriber bug")
+
+    engine.subscribe(failing)
+    engine.subscribe(lambda change: seen.append(change.new["current_stock"]))
+    ledger.dispense("a", 1)
+    ledger.dispense("a", 1)
+    assert seen == [9, 8]
+    assert ledger.level("a")["quantity"] == 8
@@ -0,0 +1,88 @@
+import pytest
+
+from services.stock_ledger import ledger
+from services.substitution_graph import CATEGORY_WEIGHT, SubstitutionGraph
+
+INDICATIONS = {
+    "a": ["pain", "fever", "inflammation"],
+    "b": ["pain", "fever"],
+    "c": ["pain", "inflammation", "swelling"],
+    "d": ["cough"],
+    "e": ["sleep"],
+}
+CATEGORIES = {"a": "analgesic", "b": "analgesic", "c": "nsaid", "d": "respiratory", "e": "analgesic"}
+
+
+def ids(pairs):
+    return [item_id for item_id, _ in pairs]
+
+
+def test_neighbours_are_scored_by_overlap_and_category():
+    graph = SubstitutionGraph(INDICATIONS, CATEGORIES)
+    # b: 2/3 overlap + same category; c: 2/4 overlap; e: same category only
+    assert graph.neighbours("a") == [("b", pytest.approx(2 / 3 + CATEGORY_WEIGHT)), ("c", 0.5),
+                                     ("e", CATEGORY_WEIGHT)]
+    assert ids(graph.neighbours("d")) == []
+    assert graph.neighbours("missing") == []
+    assert graph.stats()["items"] == 5 and graph.stats()["in_stock"] == 0
+
+
+def test_min_score_and_max_degree_bound_the_adjacency():
+    graph = SubstitutionGraph(INDICATIONS, CATEGORIES, max_degree=1)
+    assert ids(graph.neighbours("a")) == ["b"]
+    strict = SubstitutionGraph(INDICATIONS, min_score=0.6)
+    assert ids(strict.neighbours("a")) == ["b"]
+    assert ids(strict.neighbours("c")) == []
+
+
+def test_curated_substitutes_come_first_in_their_given_order():
+    preferred = {"a": ["d", "c", "d", "a", "unknown"]}
+    graph = SubstitutionGraph(INDICATIONS, CATEGORIES, preferred, max_degree=3)
+    # Duplicates, the item itself and unknown IDs are dropped; computed ones fill the rest
+    assert ids(graph.neighbours("a")) == ["d", "c", "b"]
+    assert graph.neighbours("a")[0] == ("d", 0.0)
+
+
+def test_common_indications_only_count_towards_candidates_found_through_rarer_ones():
+    indications = {"x": ["pain", "fever"], "y": ["pain", "fever"], "z": ["pain"], "w": ["pain"]}
+    full = SubstitutionGraph(indications)
+    capped = SubstitutionGraph(indications, max_postings=2)
+    assert ids(full.neighbours("x")) == ["y", "z", "w"]
+    # "pain" is in 4 items: it no longer proposes z and w, but still counts in y's score
+    assert capped.neighbours("x") == full.neighbours("x")[:1] == [("y", 1.0)]
+    assert ids(capped.neighbours("z")) == []
+
+
+def test_alternatives_follow_the_in_stock_bits():
+    graph = SubstitutionGraph(INDICATIONS, CATEGORIES)
+    assert graph.alternatives("a") == []
+    assert graph.set_in_stock("c", True) and graph.set_in_stock("e", True)
+    assert not graph.set_in_stock("c", True)            # unchanged
+    assert not graph.set_in_stock("missing", True)
+    assert graph.alternatives("a") == ["c", "e"]
+    assert graph.alternatives("a", k=1) == ["c"]
+    assert graph.alternatives("a", exclude={"c"}) == ["e"]
+    assert graph.set_in_stock("c", False)
+    assert graph.alternatives("a") == ["e"] and graph.in_stock("e") and not graph.in_stock("c")
+    assert graph.stats()["in_stock"] == 1
+
+
+def test_voice_assistant_only_offers_in_stock_substitutes_for_the_same_condition():
+    from voice_medicine_service import llm_service
+
+    # Naproxen treats headaches: the in-stock medicine for headaches not already listed
+    assert llm_service._get_alternatives([{"name": "Naproxen", "stock_status": "out-of-stock"},
+                                          {"name": "Ibuprofen", "stock_status": "in-stock"}]) == ["Acetaminophen"]
+    # No cough medicine is in stock: nothing unrelated (e.g. throat lozenges) is offered instead
+    expectorant = [{"name": "Expectorant", "stock_status": "out-of-stock"}]
+    assert llm_service._get_alternatives(expectorant) == []
+
+    # Restocking a substitute sets its bit through the change feed
+    item = llm_service.inventory.find_by_name("Cough suppressant")[0]
+    quantity = item.current_stock
+    try:
+        ledger.count(item.id, item.threshold_quantity + 10)
+        assert llm_service._get_alternatives(expectorant) == ["Cough suppressant"]
+    finally:
+        ledger.count(item.id, quantity)
+    assert llm_service._get_alternatives(expectorant) == []
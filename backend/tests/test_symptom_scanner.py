@@ -0,0 +1,81 @@
+import pytest
+
+from services.spelling_correction import SpellingCorrector, extends_at_edge, load_words
+from services.symptom_scanner import SymptomScanner
+
+GROUPS = {
+    "cold": ["cold", "runny nose", "chill"],
+    "headache": ["headache", "head pain"],
+    "dizziness": ["dizziness", "dizzy"],
+    "cough": ["cough"],
+}
+
+
+@pytest.fixture(scope="module")
+def scanner():
+    return SymptomScanner(GROUPS)
+
+
+@pytest.fixture(scope="module")
+def tolerant():
+    return SymptomScanner(GROUPS, max_edit_distance=2)
+
+
+@pytest.mark.parametrize("text", [
+    "she will scold me", "a coldness between them", "the room was chilly", "forehead pains nobody",
+])
+def test_keywords_only_match_whole_words(scanner, text):
+    assert scanner.count_groups(text) == {}
+
+
+def test_phrases_and_plurals_match_on_word_boundaries(scanner):
+    assert scanner.count_groups("Headaches, a runny nose and a cold!") == {"headache": 1, "cold": 2}
+    assert scanner.matched_keywords("head pain and head-pain") == ["head pain"]
+
+
+@pytest.mark.parametrize("typo, expected", [
+    ("hedache", "headache"), ("diziness", "dizziness"), ("dizzyness", "dizziness"), ("coughh", "cough"),
+])
+def test_misspelled_symptoms_are_corrected(tolerant, typo, expected):
+    assert tolerant.corrector.correct(typo) == expected
+
+
+@pytest.mark.parametrize("word", ["scold", "chilly", "coughing"])
+def test_words_that_only_extend_a_symptom_are_not_corrected(tolerant, word):
+    assert tolerant.corrector.correct(word) == word
+    assert tolerant.count_groups(f"they {word} again") == {}
+
+
+def test_edge_extension_rule():
+    assert extends_at_edge("scold", "cold")
+    assert extends_at_edge("chilly", "chill")
+    assert not extends_at_edge("coughh", "cough")   # repeated keystroke
+    assert not extends_at_edge("hedache", "headache")
+    assert not extends_at_edge("cold", "cold")
+
+
+def test_known_words_are_never_corrected():
+    corrector = SpellingCorrector(["heart", "fever"], known_words=["heard"])
+    assert corrector.correct("heard") == "heard"
+    assert corrector.correct("fevr") == "fevr"    # too short for a correction
+    assert corrector.correct("feverr") == "fever"
+
+
+@pytest.fixture(scope="module")
+def shipped():
+    groups = {"pain": ["tender", "throbbing"], "ear": ["hearing", "ringing"], "chest": ["heartburn", "heart"],
+              "mood": ["depressed", "tense", "stress"], "dizziness": ["dizzy"], "stomach": ["reflux", "bloating"]}
+    return SymptomScanner(groups, max_edit_distance=2, known_words=load_words())
+
+
+@pytest.mark.parametrize("word", [
+    "render", "vender", "hearting", "herring", "fearing", "impressed", "tease", "fizzy", "reflex", "boating",
+])
+def test_shipped_known_words_keep_ordinary_words_uncorrected(shipped, word):
+    assert shipped.corrector.correct(word) == word
+    assert shipped.count_groups(f"they {word} it") == {}
+
+
+@pytest.mark.parametrize("typo, expected", [("tendr", "tender"), ("hearign", "hearing"), ("depresed", "depressed")])
+def test_shipped_known_words_still_allow_corrections(shipped, typo, expected):
+    assert shipped.corrector.correct(typo) == expected
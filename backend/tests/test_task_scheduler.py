@@ -0,0 +1,70 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services.task_scheduler import TaskScheduler
+
+AS_OF = "2026-03-10"
+
+
+def task(task_id, patient_id, end_date, completed=False):
+    return {"task_id": task_id, "patient_id": patient_id, "summary": task_id, "description": "",
+            "start_date": "2026-03-01", "end_date": end_date, "completed": completed,
+            "created_at": "2026-03-01T09:00:00", "priority": "medium"}
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = TaskScheduler()
+    for args in [("t1", "alice", "2026-03-12"), ("t2", "alice", "2026-03-10T08:00:00"), ("t3", "alice", "2026-03-09"),
+                 ("t4", "bob", "2026-03-01"), ("t5", "alice", "2026-03-11"), ("t6", "bob", "2026-03-20", True)]:
+        scheduler.add(task(*args))
+    return scheduler
+
+
+def ids(tasks):
+    return [t["task_id"] for t in tasks]
+
+
+def test_upcoming_and_overdue_are_ordered_by_due_date(scheduler):
+    assert ids(scheduler.upcoming("alice", as_of=AS_OF)) == ["t2", "t5", "t1"]
+    assert ids(scheduler.overdue(as_of=AS_OF)) == ["t4", "t3"]
+    assert scheduler.count_overdue(as_of=AS_OF) == 2
+    assert ids(scheduler.upcoming("bob", as_of=AS_OF)) == []
+    assert ids(scheduler.for_patient("alice")) == ["t1", "t2", "t3", "t5"]
+
+
+def test_completed_tasks_leave_both_indexes(scheduler):
+    assert scheduler.complete("bob", "t3") is None            # another patient's task
+    assert scheduler.complete("alice", "t3")["completed"]
+    assert scheduler.complete("alice", "t2")["completed"]
+    assert ids(scheduler.overdue(as_of=AS_OF)) == ["t4"]
+    assert ids(scheduler.upcoming("alice", as_of=AS_OF)) == ["t5", "t1"]
+    assert scheduler.complete("alice", "missing") is None
+
+
+def test_limits_take_the_first_tasks_and_must_not_be_negative(scheduler):
+    assert ids(scheduler.upcoming("alice", limit=2, as_of=AS_OF)) == ["t2", "t5"]
+    assert ids(scheduler.overdue(limit=1, as_of=AS_OF)) == ["t4"]
+    assert scheduler.upcoming("alice", limit=0, as_of=AS_OF) == []
+    with pytest.raises(ValueError):
+        scheduler.upcoming("alice", limit=-1)
+    with pytest.raises(ValueError):
+        scheduler.overdue(limit=-1)
+
+
+@pytest.mark.parametrize("end_date", ["03/12/2026", "2026-3-12", "20260312", "2026-02-30", "soon"])
+def test_malformed_due_dates_are_refused(scheduler, end_date):
+    with pytest.raises(ValueError):
+        scheduler.add(task("bad", "alice", end_date))
+    assert scheduler.get("bad") is None
+
+
+def test_endpoints_refuse_negative_limits_and_malformed_dates():
+    with TestClient(main.app) as client:
+        assert client.get("/tasks/alice", params={"limit": -1}).status_code == 422
+        assert client.get("/tasks/alice", params={"upcoming": True, "limit": -1}).status_code == 422
+        assert client.get("/admin/overdue-tasks", params={"limit": -1}).status_code == 422
+        response = client.post("/tasks/create", json={"patient_id": "alice", "summary": "Refill", "description": "",
+                                                      "start_date": "2026-03-01", "end_date": "next week"})
+        assert response.status_code == 422
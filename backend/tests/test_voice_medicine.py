@@ -0,0 +1,34 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def stock(client, name):
+    response = client.get(f"/voice/api/stock-status/{name}")
+    assert response.status_code == 200
+    return response.json()["stock_status"], response.json()["quantity"]
+
+
+def test_voice_routes_share_the_medicine_stock(client):
+    before = main.ledger.level("ibuprofen")["quantity"]
+    assert stock(client, "Ibuprofen") == ("in-stock", before)
+    try:
+        main.ledger.count("ibuprofen", 0)
+        assert stock(client, "Ibuprofen") == ("out-of-stock", 0)
+        assert main.medicine_engine.check_stock_and_create_restocking_request("ibuprofen") is not None
+    finally:
+        main.ledger.count("ibuprofen", before)
+    assert stock(client, "Ibuprofen") == ("in-stock", before)
+
+
+def test_voice_analysis_is_served_by_the_main_app(client):
+    response = client.post("/voice/api/voice-medicine-analysis", json={"text": "my throat pain is awful"})
+    assert response.status_code == 200
+    assert [rec["disease"] for rec in response.json()["recommendations"]] == ["Sore Throat"]
@@ -17,6 +17,46 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
 
+from services.inventory_engine import InventoryChange, StockItem, inventory
+from services.substitution_graph import SubstitutionGraph
+from services.symptom_scanner import SymptomScanner
+from services.spelling_correction import DEFAULT_KNOWN_WORDS_PATH, load_words
+
+# OTC items the assistant recommends that are not in the medicine catalog,
+# seeded into the inventory engine (name: quantity). The engine is only shared
+# with medicine and supply stock when these routes are mounted in main.py
+# (under /voice); run on its own (port 5002) this service has a private engine
+# holding just these seeds, and its stock never reaches alerts or restocking.
+OTC_STOCK_SEED = {
+    "Ibuprofen": 45,
+    "Acetaminophen": 32,
+    "Aspirin": 8,
+    "Naproxen": 0,
+    "Decongestant": 23,
+    "Cough syrup": 15,
+    "Throat lozenges": 67,
+    "Cough suppressant": 12,
+    "Expectorant": 0
+}
+OTC_KIND = "otc"
+OTC_LOW_STOCK_THRESHOLD = 12
+# Inventory kinds the assistant can recommend
+RECOMMENDABLE_KINDS = ("medicine", OTC_KIND)
+MAX_ALTERNATIVES = 3
+# Transcripts are matched within this many edits per word (0: exact matching only)
+SYMPTOM_TYPO_DISTANCE = int(os.environ.get("SYMPTOM_TYPO_DISTANCE", "2"))
+KNOWN_WORDS_PATH = os.environ.get("SYMPTOM_KNOWN_WORDS_PATH", DEFAULT_KNOWN_WORDS_PATH)
+
+def _name_key(name: str) -> str:
+    return " ".join(name.lower().split())
+
+def stock_status(item) -> str:
+    if item.current_stock <= 0:
+        return "out-of-stock"
+    if item.current_stock <= item.threshold_quantity:
+        return "low-stock"
+    return "in-stock"
+
 # Mock LLM service (replace with actual LLM API)
 class MockLLMService:
     def __init__(self):
@@ -58,26 +98,76 @@ class MockLLMService:
             }
         }
         
-        self.stock_database = {
-            "Ibuprofen": {"quantity": 45, "status": "in-stock"},
-            "Acetaminophen": {"quantity": 32, "status": "in-stock"},
-            "Aspirin": {"quantity": 8, "status": "low-stock"},
-            "Naproxen": {"quantity": 0, "status": "out-of-stock"},
-            "Decongestant": {"quantity": 23, "status": "in-stock"},
-            "Cough syrup": {"quantity": 15, "status": "in-stock"},
-            "Throat lozenges": {"quantity": 67, "status": "in-stock"},
-            "Cough suppressant": {"quantity": 12, "status": "low-stock"},
-            "Expectorant": {"quantity": 0, "status": "out-of-stock"}
-        }
+        # Condition symptoms matched on word boundaries, tolerating transcription typos
+        self.condition_scanner = SymptomScanner(
+            {condition: data["symptoms"] for condition, data in self.medicine_database.items()},
+            SYMPTOM_TYPO_DISTANCE, load_words(KNOWN_WORDS_PATH) if SYMPTOM_TYPO_DISTANCE else ())
+        
+        # Substitutes: medicines offered for the same conditions, keyed by name
+        indications: Dict[str, List[str]] = {}
+        for condition, data in self.medicine_database.items():
+            for medicine in data["medicines"]:
+                indications.setdefault(medicine, []).append(condition)
+        self.substitutes = SubstitutionGraph(indications)
+        self._substitute_names = {_name_key(name): name for name in indications}
+        
+        # Stock comes from the process's inventory engine; status counts follow its change feed
+        self.inventory = inventory
+        self.status_counts = {"in-stock": 0, "low-stock": 0, "out-of-stock": 0}
+        self._status: Dict[str, str] = {}
+        self.inventory.subscribe(self._on_inventory_change)
+        for kind in RECOMMENDABLE_KINDS:
+            for item in self.inventory.items(kind):
+                self._track(item)
+        self._seed_stock()
+
+    def _seed_stock(self):
+        """Register OTC items that no other service already stocks under the same name"""
+        missing = [name for name in OTC_STOCK_SEED if not self.inventory.find_by_name(name)]
+        self.inventory.add_many([
+            StockItem(f"otc_{name.lower().replace(' ', '_')}", name, OTC_STOCK_SEED[name], OTC_LOW_STOCK_THRESHOLD)
+            for name in missing
+        ], OTC_KIND)
+
+    def _track(self, item):
+        status = stock_status(item)
+        previous = self._status.get(item.id)
+        if previous != status:
+            if previous is not None:
+                self.status_counts[previous] -= 1
+            self.status_counts[status] += 1
+            self._status[item.id] = status
+            name = self._substitute_names.get(_name_key(item.name))
+            if name is not None:
+                self.substitutes.set_in_stock(name, status == "in-stock")
+
+    def _on_inventory_change(self, change: InventoryChange):
+        if change.kind in RECOMMENDABLE_KINDS:
+            self._track(self.inventory.get(change.item_id))
+
+    def stock_info(self, medicine_name: str) -> Dict[str, Any]:
+        """Quantity and status by name (hash index lookup); unknown names are out of stock"""
+        for kind in RECOMMENDABLE_KINDS:
+            items = self.inventory.find_by_name(medicine_name, kind)
+            if items:
+                return {"quantity": items[0].current_stock, "status": stock_status(items[0])}
+        return {"quantity": 0, "status": "out-of-stock"}
+
+    def stock_overview(self) -> Dict[str, Dict[str, Any]]:
+        """Every recommendable item by name with quantity and status"""
+        overview = {}
+        for kind in RECOMMENDABLE_KINDS:
+            for item in self.inventory.items(kind):
+                overview.setdefault(item.name, {"quantity": item.current_stock, "status": stock_status(item)})
+        return overview
 
     async def analyze_symptoms(self, voice_input: str) -> Dict[str, Any]:
         """Analyze voice input and provide medicine recommendations"""
-        voice_input_lower = voice_input.lower()
-        
         # Find matching conditions
+        hits = self.condition_scanner.count_groups(voice_input)
         matched_conditions = []
         for condition, data in self.medicine_database.items():
-            if any(symptom in voice_input_lower for symptom in data["symptoms"]):
+            if condition in hits:
                 matched_conditions.append({
                     "condition": condition,
                     "data": data
@@ -101,7 +191,7 @@ class MockLLMService:
         for match in matched_conditions:
             medicines_with_stock = []
             for medicine in match["data"]["medicines"]:
-                stock_info = self.stock_database.get(medicine, {"quantity": 0, "status": "out-of-stock"})
+                stock_info = self.stock_info(medicine)
                 medicines_with_stock.append({
                     "name": medicine,
                     "stock_status": stock_info["status"],
@@ -128,14 +218,14 @@ class MockLLMService:
     def _get_alternatives(self, medicines: List[Dict]) -> List[str]:
         """Get alternative medicines for out-of-stock items"""
         alternatives = []
+        names = {m["name"] for m in medicines}
         for medicine in medicines:
+            if len(alternatives) == MAX_ALTERNATIVES:
+                break
             if medicine["stock_status"] == "out-of-stock":
-                # Find similar medicines in stock
-                for name, stock_info in self.stock_database.items():
-                    if stock_info["status"] == "in-stock" and name not in [m["name"] for m in medicines]:
-                        alternatives.append(name)
-                        break
-        return alternatives[:3]  # Limit to 3 alternatives
+                # Best in-stock substitute: one walk of its adjacency list
+                alternatives += self.substitutes.alternatives(medicine["name"], 1, names.union(alternatives))
+        return alternatives
 
 # Pydantic models
 class VoiceInput(BaseModel):
@@ -203,7 +293,7 @@ async def analyze_voice_medicine(input_data: VoiceInput):
 @app.get("/api/stock-status/{medicine_name}")
 async def get_stock_status(medicine_name: str):
     """Get stock status for a specific medicine"""
-    stock_info = llm_service.stock_database.get(medicine_name, {"quantity": 0, "status": "out-of-stock"})
+    stock_info = llm_service.stock_info(medicine_name)
     return {
         "medicine": medicine_name,
         "stock_status": stock_info["status"],
@@ -214,12 +304,13 @@ async def get_stock_status(medicine_name: str):
 @app.get("/api/available-medicines")
 async def get_available_medicines():
     """Get list of all available medicines with stock status"""
+    medicines = llm_service.stock_overview()
     return {
-        "medicines": llm_service.stock_database,
-        "total_medicines": len(llm_service.stock_database),
-        "in_stock": len([m for m in llm_service.stock_database.values() if m["status"] == "in-stock"]),
-        "low_stock": len([m for m in llm_service.stock_database.values() if m["status"] == "low-stock"]),
-        "out_of_stock": len([m for m in llm_service.stock_database.values() if m["status"] == "out-of-stock"])
+        "medicines": medicines,
+        "total_medicines": len(medicines),
+        "in_stock": llm_service.status_counts["in-stock"],
+        "low_stock": llm_service.status_counts["low-stock"],
+        "out_of_stock": llm_service.status_counts["out-of-stock"]
     }
 
 @app.post("/api/simulate-voice-input")
@@ -243,6 +334,8 @@ async def get_medicine_database():
     }
 
 if __name__ == "__main__":
+    # Standalone mode keeps its own inventory; main.py serves these routes under /voice
+    # with the stock shared with medicines and supplies
     print("🚀 Starting Voice Medicine Assistant Service...")
     print("📊 Health check: http://localhost:5002/health")
     print("🎤 Voice analysis: http://localhost:5002/api/voice-medicine-analysis")
@@ -3,7 +3,7 @@
 Unified Backend Services Startup Script
 - Starts FastAPI server (port 8000)
 - Starts Flask server (port 5001) 
-- Starts Voice Medicine Assistant (port 5002)
+- Serves the Voice Medicine Assistant from the FastAPI server (/voice), sharing its inventory
 - Handles dependencies and health checks
 """
 
@@ -65,24 +65,12 @@ def start_flask_server():
     except KeyboardInterrupt:
         print("🛑 Flask server stopped")
 
-def start_voice_medicine_service():
-    """Start the Voice Medicine Assistant service"""
-    print("🚀 Starting Voice Medicine Assistant on port 5002...")
-    try:
-        subprocess.run([
-            sys.executable, "backend/voice_medicine_service.py"
-        ], check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Voice Medicine Assistant failed to start: {e}")
-    except KeyboardInterrupt:
-        print("🛑 Voice Medicine Assistant stopped")
-
 def health_check():
     """Check if all services are running"""
     services = [
         {"name": "FastAPI", "url": "http://localhost:8000/health"},
         {"name": "Flask", "url": "http://localhost:5001/health"},
-        {"name": "Voice Medicine", "url": "http://localhost:5002/health"}
+        {"name": "Voice Medicine", "url": "http://localhost:8000/voice/health"}
     ]
     
     print("\n🏥 Health Check Results:")
@@ -120,10 +108,6 @@ def main():
     flask_thread = threading.Thread(target=start_flask_server, daemon=True)
     threads.append(flask_thread)
     
-    # Voice Medicine Assistant
-    voice_thread = threading.Thread(target=start_voice_medicine_service, daemon=True)
-    threads.append(voice_thread)
-    
     # Start all threads
     for thread in threads:
         thread.start()
@@ -131,7 +115,7 @@ def main():
     print("\n🎯 All services starting...")
     print("📊 FastAPI: http://localhost:8000")
     print("🌐 Flask: http://localhost:5001")
-    print("🎤 Voice Medicine: http://localhost:5002")
+    print("🎤 Voice Medicine: http://localhost:8000/voice")
     print("🏥 React Frontend: http://localhost:3006")
     
     # Wait a moment for services to start